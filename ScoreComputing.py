@@ -4,12 +4,24 @@
 # Output fields per subzone:
 # name, subzone, planarea, population, pop_0_25, pop_25_65, pop_65plus, hawker, mrt, bus, H_score
 
+import argparse
+import json
+import sys
+import os
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+
 import geopandas as gpd
 import pandas as pd
 import numpy as np
+import shapely
 from pathlib import Path
 from bs4 import BeautifulSoup
 
+import accessibility
+
 # ------------- Paths (same folder) -------------
 BASE = Path(__file__).resolve().parent
 MP   = "data/MasterPlan2019SubzoneBoundaryNoSeaGEOJSON.geojson"
@@ -18,6 +30,7 @@ HAWK = "data/HawkerCentresGEOJSON.geojson"
 MRT  = "data/LTAMRTStationExitGEOJSON.geojson"    # exits, CRS84/WGS84
 BUS  = "data/bus_stops.geojson"                    # your sample is EPSG:3414
 OUT  = "hawker_opportunities_ver2.geojson"           # (requested spelling)
+CACHE_DIR = "data/cache"                            # 2SFCA supply, keyed by input hash
 
 # ------------- Helpers -------------
 def parse_from_desc(html: str, key: str):
@@ -61,138 +74,268 @@ def load_population(pop_csv: Path) -> pd.DataFrame:
     pop["subzone"] = pop["Number"].str.upper().str.strip()
     return pop[["subzone","population","pop_0_25","pop_25_65","pop_65plus"]]
 
-# ------------- Main -------------
-def main():
+# ------------- Stage timing / profiling -------------
+class StageTimer:
+    """Per-stage wall time and, when memory tracing is on, the tracemalloc peak of each stage.
+
+    tracemalloc sees Python and NumPy allocations; memory held inside GEOS/GDAL is not counted.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name: str):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            rec = {"stage": name, "seconds": time.perf_counter() - t0}
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                rec["peak_mb"] = peak / 2**20
+                rec["current_mb"] = current / 2**20
+            self.stages.append(rec)
+
+    def extend(self, records, worker: str):
+        """Add stage records timed in a worker process; they overlap the parent's wall time."""
+        for r in records:
+            self.stages.append({**r, "worker": worker})
+
+    def total(self) -> float:
+        return sum(r["seconds"] for r in self.stages if "worker" not in r)
+
+    def report(self) -> str:
+        total = self.total() or 1.0
+        lines = [f"{'stage':<22}{'seconds':>10}{'share':>8}" + (f"{'peak MB':>10}" if self.trace_memory else "")]
+        for r in self.stages:
+            name = f"  {r['stage']}" if "worker" in r else r["stage"]
+            line = f"{name:<22}{r['seconds']:>10.3f}{r['seconds'] / total:>8.1%}"
+            if self.trace_memory and "peak_mb" in r:
+                line += f"{r['peak_mb']:>10.1f}"
+            lines.append(line)
+        lines.append(f"{'total':<22}{self.total():>10.3f}")
+        return "\n".join(lines)
+
+
+_NO_TIMER = StageTimer()
+
+
+# Exported fields, in order (geometry is written in WGS84)
+OUT_COLUMNS = ["name","subzone","planarea","population","pop_0_25","pop_25_65","pop_65plus","hawker","mrt","bus","H_score","H_rank","geometry","Dem","Sup","Acc"]
+
+
+# ------------- Pipeline stages -------------
+def load_subzones(path, timer: StageTimer = _NO_TIMER) -> gpd.GeoDataFrame:
     # 1) Master Plan polygons
-    gdf_poly = gpd.read_file(MP)
+    with timer.stage("read_subzones"):
+        gdf_poly = gpd.read_file(path)
 
     # Parse names out of Description if missing
-    if "SUBZONE_N" not in gdf_poly.columns or "PLN_AREA_N" not in gdf_poly.columns:
-        gdf_poly["SUBZONE_N"] = gdf_poly.get("SUBZONE_N")
-        gdf_poly["PLN_AREA_N"] = gdf_poly.get("PLN_AREA_N")
-        need = gdf_poly["SUBZONE_N"].isna() | gdf_poly["PLN_AREA_N"].isna()
-        if "Description" in gdf_poly.columns:
-            desc = gdf_poly.loc[need, "Description"].fillna("")
-            gdf_poly.loc[need, "SUBZONE_N"] = desc.apply(lambda h: parse_from_desc(h, "SUBZONE_N"))
-            gdf_poly.loc[need, "PLN_AREA_N"] = desc.apply(lambda h: parse_from_desc(h, "PLN_AREA_N"))
-
-    # Normalize names
-    gdf_poly["name"]     = gdf_poly.get("Name", None)
-    gdf_poly["subzone"]  = gdf_poly["SUBZONE_N"].fillna("").str.upper().str.strip()
-    gdf_poly["planarea"] = gdf_poly["PLN_AREA_N"].fillna("").str.upper().str.strip()
+    with timer.stage("parse_subzone_names"):
+        if "SUBZONE_N" not in gdf_poly.columns or "PLN_AREA_N" not in gdf_poly.columns:
+            gdf_poly["SUBZONE_N"] = gdf_poly.get("SUBZONE_N")
+            gdf_poly["PLN_AREA_N"] = gdf_poly.get("PLN_AREA_N")
+            need = gdf_poly["SUBZONE_N"].isna() | gdf_poly["PLN_AREA_N"].isna()
+            if "Description" in gdf_poly.columns:
+                desc = gdf_poly.loc[need, "Description"].fillna("")
+                gdf_poly.loc[need, "SUBZONE_N"] = desc.apply(lambda h: parse_from_desc(h, "SUBZONE_N"))
+                gdf_poly.loc[need, "PLN_AREA_N"] = desc.apply(lambda h: parse_from_desc(h, "PLN_AREA_N"))
+
+        # Normalize names
+        gdf_poly["name"]     = gdf_poly.get("Name", None)
+        gdf_poly["subzone"]  = gdf_poly["SUBZONE_N"].fillna("").str.upper().str.strip()
+        gdf_poly["planarea"] = gdf_poly["PLN_AREA_N"].fillna("").str.upper().str.strip()
 
     # IMPORTANT: set polygon CRS correctly.
     # If your Master Plan is SVY21, set to 3414. If lon/lat, set to 4326.
     if gdf_poly.crs is None:
         gdf_poly = gdf_poly.set_crs(4326)  # change to 3414 if your MP is SVY21
     # fix invalid polygons
-    gdf_poly["geometry"] = gdf_poly.buffer(0)
+    with timer.stage("fix_polygons"):
+        gdf_poly["geometry"] = gdf_poly.buffer(0)
+    return gdf_poly
+
 
+def load_hawkers(path, crs, timer: StageTimer = _NO_TIMER) -> gpd.GeoDataFrame:
     # 2) Hawker centres → project to polygon CRS
     try:
-        gdf_hawk = gpd.read_file(HAWK)
+        with timer.stage("read_hawkers"):
+            gdf_hawk = gpd.read_file(path)
         if gdf_hawk.crs is None:
             gdf_hawk = gdf_hawk.set_crs(4326)
-        gdf_hawk = gdf_hawk.to_crs(gdf_poly.crs)
+        with timer.stage("reproject_hawkers"):
+            gdf_hawk = gdf_hawk.to_crs(crs)
     except Exception:
-        gdf_hawk = gpd.GeoDataFrame(geometry=[], crs=gdf_poly.crs)
+        gdf_hawk = gpd.GeoDataFrame(geometry=[], crs=crs)
+    return gdf_hawk
+
 
+def load_mrt_stations(path, crs, timer: StageTimer = _NO_TIMER) -> gpd.GeoDataFrame:
     # 3) MRT exits → stations
-    gdf_mrt = gpd.read_file(MRT)
-    gdf_mrt = gdf_mrt.set_crs(4326, allow_override=True).to_crs(gdf_poly.crs)
+    with timer.stage("read_mrt"):
+        gdf_mrt = gpd.read_file(path)
+    with timer.stage("reproject_mrt"):
+        gdf_mrt = gdf_mrt.set_crs(4326, allow_override=True).to_crs(crs)
 
     # Extract station name for grouping
-    if "STATION_NA" not in gdf_mrt.columns or gdf_mrt["STATION_NA"].isna().all():
-        gdf_mrt["STATION_NA"] = gdf_mrt.get("STATION_NA")
-        if "Description" in gdf_mrt.columns:
-            need_st = gdf_mrt["STATION_NA"].isna()
-            gdf_mrt.loc[need_st, "STATION_NA"] = (
-                gdf_mrt.loc[need_st, "Description"].fillna("")
-                .apply(lambda h: parse_from_desc(h, "STATION_NA"))
-            )
-    gdf_mrt["STATION_NA"] = gdf_mrt["STATION_NA"].fillna("").str.strip()
+    with timer.stage("parse_station_names"):
+        if "STATION_NA" not in gdf_mrt.columns or gdf_mrt["STATION_NA"].isna().all():
+            gdf_mrt["STATION_NA"] = gdf_mrt.get("STATION_NA")
+            if "Description" in gdf_mrt.columns:
+                need_st = gdf_mrt["STATION_NA"].isna()
+                gdf_mrt.loc[need_st, "STATION_NA"] = (
+                    gdf_mrt.loc[need_st, "Description"].fillna("")
+                    .apply(lambda h: parse_from_desc(h, "STATION_NA"))
+                )
+        gdf_mrt["STATION_NA"] = gdf_mrt["STATION_NA"].fillna("").str.strip()
 
     # Collapse exits → one point per station (centroid of exits in same station)
-    gdf_station = gdf_mrt.dissolve(by="STATION_NA")
-    # Convert to projected CRS for accurate centroid calculation
-    if gdf_station.crs.is_geographic:
-        # Use a projected CRS for Singapore (EPSG:3414 - SVY21)
-        gdf_station_proj = gdf_station.to_crs(3414)
-        gdf_station_proj["geometry"] = gdf_station_proj.geometry.centroid
-        gdf_station = gdf_station_proj.to_crs(gdf_poly.crs).reset_index()[["STATION_NA","geometry"]].set_crs(gdf_poly.crs)
-    else:
-        gdf_station["geometry"] = gdf_station.geometry.centroid
-        gdf_station = gdf_station.reset_index()[["STATION_NA","geometry"]].set_crs(gdf_poly.crs)
+    with timer.stage("dissolve_stations"):
+        gdf_station = gdf_mrt.dissolve(by="STATION_NA")
+        # Convert to projected CRS for accurate centroid calculation
+        if gdf_station.crs.is_geographic:
+            # Use a projected CRS for Singapore (EPSG:3414 - SVY21)
+            gdf_station_proj = gdf_station.to_crs(3414)
+            gdf_station_proj["geometry"] = gdf_station_proj.geometry.centroid
+            gdf_station = gdf_station_proj.to_crs(crs).reset_index()[["STATION_NA","geometry"]].set_crs(crs)
+        else:
+            gdf_station["geometry"] = gdf_station.geometry.centroid
+            gdf_station = gdf_station.reset_index()[["STATION_NA","geometry"]].set_crs(crs)
+    return gdf_station
 
+
+def load_bus_stops(path, crs, timer: StageTimer = _NO_TIMER) -> gpd.GeoDataFrame:
     # 4) Bus stops (EPSG:3414 in your sample) → project to polygon CRS
     try:
-        gdf_bus = gpd.read_file(BUS)
-        gdf_bus = gdf_bus.set_crs(3414, allow_override=True).to_crs(gdf_poly.crs)
+        with timer.stage("read_bus"):
+            gdf_bus = gpd.read_file(path)
+        with timer.stage("reproject_bus"):
+            gdf_bus = gdf_bus.set_crs(3414, allow_override=True).to_crs(crs)
     except Exception:
-        gdf_bus = gpd.GeoDataFrame(geometry=[], crs=gdf_poly.crs)
+        gdf_bus = gpd.GeoDataFrame(geometry=[], crs=crs)
+    return gdf_bus
 
-    # 5) Spatial joins → counts
-    # hawker: intersects (include boundary)
-    if len(gdf_hawk):
-        hk = gpd.sjoin(
-            gdf_hawk[["geometry"]],
-            gdf_poly[["subzone","planarea","geometry"]],
-            how="inner", predicate="intersects"
-        )
-        hawker_counts = (hk.groupby(["subzone","planarea"], as_index=False)
-                           .size().rename(columns={"size":"hawker"}))
-    else:
-        hawker_counts = pd.DataFrame(columns=["subzone","planarea","hawker"])
 
-    # mrt stations: within (station centroid must be inside polygon)
-    if len(gdf_station):
-        st = gpd.sjoin(
-            gdf_station[["STATION_NA","geometry"]],
-            gdf_poly[["subzone","planarea","geometry"]],
-            how="inner", predicate="within"
-        )
-        mrt_counts = (st.groupby(["subzone","planarea"], as_index=False)
-                        .agg(mrt=("STATION_NA","nunique")))
-    else:
-        mrt_counts = pd.DataFrame(columns=["subzone","planarea","mrt"])
+# ------------- Parallel layer loading -------------
+# Columns each loader's result needs downstream; only these cross the process boundary.
+_LAYER_COLUMNS = {
+    "subzones": ["name", "subzone", "planarea"],
+    "hawkers": [],
+    "mrt": ["STATION_NA"],
+    "bus": [],
+}
 
-    # bus: intersects (include boundary)
-    if len(gdf_bus):
-        bs = gpd.sjoin(
-            gdf_bus[["geometry"]],
-            gdf_poly[["subzone","planarea","geometry"]],
-            how="inner", predicate="intersects"
-        )
-        bus_counts = (bs.groupby(["subzone","planarea"], as_index=False)
-                        .size().rename(columns={"size":"bus"}))
+
+def _pack(gdf: gpd.GeoDataFrame, columns) -> dict:
+    """GeoDataFrame -> WKB array + plain NumPy columns (cheap to pickle, exact round trip)."""
+    return {
+        "wkb": shapely.to_wkb(gdf.geometry.values),
+        "crs": gdf.crs,
+        "index": gdf.index.to_numpy(),
+        "columns": {c: gdf[c].to_numpy() for c in columns if c in gdf.columns},
+    }
+
+
+def _unpack(packed: dict) -> gpd.GeoDataFrame:
+    return gpd.GeoDataFrame(
+        packed["columns"],
+        index=pd.Index(packed["index"]),
+        geometry=shapely.from_wkb(packed["wkb"]),
+        crs=packed["crs"],
+    )
+
+
+def _load_layer(job):
+    """Worker entry point: run one loader and return its packed result and stage times."""
+    layer, path, crs = job
+    timer = StageTimer()
+    if layer == "subzones":
+        gdf = load_subzones(path, timer)
+    elif layer == "hawkers":
+        gdf = load_hawkers(path, crs, timer)
+    elif layer == "mrt":
+        gdf = load_mrt_stations(path, crs, timer)
     else:
-        bus_counts = pd.DataFrame(columns=["subzone","planarea","bus"])
+        gdf = load_bus_stops(path, crs, timer)
+    return _pack(gdf, _LAYER_COLUMNS[layer]), timer.stages
 
-    # 6) Merge counts back to polygons
-    keep_poly = ["name","subzone","planarea","geometry"]
-    gdf = (gdf_poly[keep_poly]
-           .merge(hawker_counts, on=["subzone","planarea"], how="left")
-           .merge(mrt_counts,    on=["subzone","planarea"], how="left")
-           .merge(bus_counts,    on=["subzone","planarea"], how="left"))
 
-    for c in ["hawker","mrt","bus"]:
-        gdf[c] = gdf[c].fillna(0).astype(int)
+def load_layers(mp, hawk, mrt, bus, workers: int = 1, timer: StageTimer = _NO_TIMER):
+    """Load subzones, hawkers, MRT stations and bus stops; in `workers` processes when > 1.
+
+    The point layers are reprojected to the subzone CRS, which is read up front from the
+    file header so all four loaders can start at once. Results come back as WKB.
+    """
+    if workers <= 1:
+        gdf_poly = load_subzones(mp, timer)
+        return (gdf_poly, load_hawkers(hawk, gdf_poly.crs, timer),
+                load_mrt_stations(mrt, gdf_poly.crs, timer), load_bus_stops(bus, gdf_poly.crs, timer))
+    with timer.stage("load_layers"):
+        # Same default as load_subzones when the file carries no CRS
+        crs = gpd.read_file(mp, rows=1).crs or "EPSG:4326"
+        jobs = [("subzones", mp, None), ("hawkers", hawk, crs), ("mrt", mrt, crs), ("bus", bus, crs)]
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(_load_layer, jobs))
+        layers = []
+        for (name, _, _), (packed, stages) in zip(jobs, results):
+            timer.extend(stages, worker=name)
+            layers.append(_unpack(packed))
+    return tuple(layers)
+
 
+def count_points(gdf_points, gdf_poly, column: str, predicate: str, unique_by: str = None) -> pd.DataFrame:
+    """Count points per (subzone, planarea); with `unique_by`, count distinct values of that column."""
+    if not len(gdf_points):
+        return pd.DataFrame(columns=["subzone","planarea",column])
+    keep = [unique_by, "geometry"] if unique_by else ["geometry"]
+    joined = gpd.sjoin(
+        gdf_points[keep],
+        gdf_poly[["subzone","planarea","geometry"]],
+        how="inner", predicate=predicate
+    )
+    if unique_by:
+        return joined.groupby(["subzone","planarea"], as_index=False).agg(**{column: (unique_by, "nunique")})
+    return (joined.groupby(["subzone","planarea"], as_index=False)
+                  .size().rename(columns={"size":column}))
+
+
+def compute_access(origins, gdf_station, gdf_bus) -> dict:
+    """Distance-decay access to MRT stations and bus stops per subzone (see accessibility.py)."""
+    supplies = {
+        "acc_mrt": (accessibility.SupplyIndex.from_gdf(gdf_station), accessibility.MRT_DECAY),
+        "acc_bus": (accessibility.SupplyIndex.from_gdf(gdf_bus), accessibility.BUS_DECAY),
+    }
+    return accessibility.zone_access(origins, supplies)
+
+
+def compute_supply(origins, gdf_hawk, cache_dir=CACHE_DIR):
+    """2SFCA hawker centres per 1,000 residents within the catchment (see accessibility.py)."""
+    return accessibility.zone_supply_2sfca(origins, accessibility.SupplyIndex.from_gdf(gdf_hawk), cache_dir=cache_dir)
+
+
+def compute_scores(gdf: gpd.GeoDataFrame, pop: pd.DataFrame = None) -> gpd.GeoDataFrame:
     # 7) Population + Accessibility + H_score (demand vs supply plus access)
-    pop = load_population(POP)  # columns: subzone, population
-    gdf = gdf.merge(pop, on="subzone", how="left")
+    # pop=None: population columns are already on gdf (grid mode)
+    if pop is not None:
+        gdf = gdf.merge(pop, on="subzone", how="left")
 
-    # Accessibility proxy: combine mrt and bus counts (simple count-based access)
-    # If either column is missing, treat as 0. This avoids NaNs propagating.
-    gdf["_mrt_for_acc"] = pd.to_numeric(gdf.get("mrt", 0), errors="coerce").fillna(0)
-    gdf["_bus_for_acc"] = pd.to_numeric(gdf.get("bus", 0), errors="coerce").fillna(0)
+    # Accessibility: distance-decay access when compute_access ran, else mrt and bus counts
+    # inside the polygon. If either column is missing, treat as 0. This avoids NaNs propagating.
+    mrt_col, bus_col = ("acc_mrt", "acc_bus") if "acc_mrt" in gdf.columns else ("mrt", "bus")
+    gdf["_mrt_for_acc"] = pd.to_numeric(gdf.get(mrt_col, 0), errors="coerce").fillna(0)
+    gdf["_bus_for_acc"] = pd.to_numeric(gdf.get(bus_col, 0), errors="coerce").fillna(0)
     gdf["Acc"] = 0.7*gdf["_mrt_for_acc"] + 0.3*gdf["_bus_for_acc"]
 
     # H_score = normalized ( w_dem*Z(population) - w_sup*Z(hawker) + w_acc*Z(access) )
     # Rebalance weights to include accessibility
     w_dem, w_sup, w_acc = 0.5, 0.3, 0.2
     Z_Dem = zscore(gdf["population"])
-    Z_Sup = zscore(gdf["hawker"])
+    # Supply: 2SFCA catchment supply when compute_supply ran, else centres inside the polygon
+    Z_Sup = zscore(gdf["hawker_2sfca"] if "hawker_2sfca" in gdf.columns else gdf["hawker"])
     Z_Acc = zscore(gdf["Acc"])
     H_raw = w_dem*Z_Dem - w_sup*Z_Sup + w_acc*Z_Acc
     hmin, hmax = H_raw.min(skipna=True), H_raw.max(skipna=True)
@@ -209,17 +352,219 @@ def main():
 
     total_subzones = len(gdf)
     gdf["H_rank_label"] = gdf["H_rank"].astype(str) + "/" + str(total_subzones)
+    return gdf
+
+
+def run_pipeline(
+    *,
+    mp=MP, pop_csv=POP, hawk=HAWK, mrt=MRT, bus=BUS, out=OUT,
+    access_model: str = "count", access_origins: str = "grid", access_cell: float = 250.0,
+    supply_model: str = "count", cache_dir=CACHE_DIR, workers: int = 1,
+    timer: StageTimer = _NO_TIMER,
+) -> gpd.GeoDataFrame:
+    """Run every stage and write `out`. Returns the exported GeoDataFrame.
+
+    access_model "count" (the published score) uses the number of stations and stops
+    inside each polygon; "decay" scores accessibility by distance-decay access to stations
+    and stops within walking range (from a population grid or subzone centroids).
+    supply_model "count" (the published score) uses hawker centres intersecting each
+    polygon; "2sfca" scores supply as a two-step floating catchment area from the same
+    origins (cached under `cache_dir`, None disables).
+    With workers > 1 the four input layers are loaded concurrently (see load_layers);
+    the output is identical to a serial run.
+    """
+    gdf_poly, gdf_hawk, gdf_station, gdf_bus = load_layers(mp, hawk, mrt, bus, workers, timer)
+
+    # 5) Spatial joins → counts
+    # hawker: intersects (include boundary)
+    with timer.stage("sjoin_hawker"):
+        hawker_counts = count_points(gdf_hawk, gdf_poly, "hawker", "intersects")
+    # mrt stations: within (station centroid must be inside polygon)
+    with timer.stage("sjoin_mrt"):
+        mrt_counts = count_points(gdf_station, gdf_poly, "mrt", "within", unique_by="STATION_NA")
+    # bus: intersects (include boundary)
+    with timer.stage("sjoin_bus"):
+        bus_counts = count_points(gdf_bus, gdf_poly, "bus", "intersects")
+
+    # 6) Merge counts back to polygons
+    with timer.stage("merge_counts"):
+        keep_poly = ["name","subzone","planarea","geometry"]
+        gdf = (gdf_poly[keep_poly]
+               .merge(hawker_counts, on=["subzone","planarea"], how="left")
+               .merge(mrt_counts,    on=["subzone","planarea"], how="left")
+               .merge(bus_counts,    on=["subzone","planarea"], how="left"))
+
+        for c in ["hawker","mrt","bus"]:
+            gdf[c] = gdf[c].fillna(0).astype(int)
+
+    with timer.stage("load_population"):
+        pop = load_population(pop_csv)  # columns: subzone, population
+    if access_model not in ("decay", "count"):
+        raise ValueError(f"unknown access model {access_model!r}")
+    if supply_model not in ("2sfca", "count"):
+        raise ValueError(f"unknown supply model {supply_model!r}")
+    if access_model == "decay" or supply_model == "2sfca":
+        with timer.stage("origins"):
+            zone_pop = gdf[["subzone"]].merge(pop, on="subzone", how="left")["population"].to_numpy()
+            origins = accessibility.make_origins(gdf, access_origins, cell=access_cell, population=zone_pop)
+    if access_model == "decay":
+        with timer.stage("accessibility"):
+            for col, values in compute_access(origins, gdf_station, gdf_bus).items():
+                gdf[col] = values
+    if supply_model == "2sfca":
+        with timer.stage("supply_2sfca"):
+            gdf["hawker_2sfca"] = compute_supply(origins, gdf_hawk, cache_dir)
+    with timer.stage("score"):
+        gdf = compute_scores(gdf, pop)
 
     # 8) Final field order + export (WGS84)
     # Keep as GeoDataFrame to maintain geometry column
     # Export without intermediate Acc field
-    gdf_out = gdf[["name","subzone","planarea","population","pop_0_25","pop_25_65","pop_65plus","hawker","mrt","bus","H_score","H_rank","geometry","Dem","Sup","Acc"]].copy()
-    gdf_out = gdf_out.to_crs(4326)
-    gdf_out.to_file(OUT, driver="GeoJSON")
+    with timer.stage("reproject_output"):
+        gdf_out = gdf[OUT_COLUMNS].copy()
+        gdf_out = gdf_out.to_crs(4326)
+    with timer.stage("write_output"):
+        gdf_out.to_file(out, driver="GeoJSON")
+    return gdf_out
 
-    print(f"[ok] wrote {OUT} with {len(gdf_out)} features.")
+
+def _profiler(args):
+    """Optional whole-run profiler: cProfile (.prof / .txt) or pyinstrument (.html / .txt)."""
+    if args.pyinstrument:
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise SystemExit("pyinstrument is not installed (pip install pyinstrument)")
+        prof = Profiler()
+
+        @contextmanager
+        def run():
+            prof.start()
+            try:
+                yield
+            finally:
+                prof.stop()
+                path = Path(args.pyinstrument)
+                path.write_text(prof.output_html() if path.suffix == ".html" else prof.output_text(), encoding="utf-8")
+                print(f"[profile] pyinstrument report written to {path}")
+        return run()
+    if args.cprofile:
+        import cProfile
+        import pstats
+
+        prof = cProfile.Profile()
+
+        @contextmanager
+        def run():
+            prof.enable()
+            try:
+                yield
+            finally:
+                prof.disable()
+                path = Path(args.cprofile)
+                if path.suffix == ".prof":
+                    prof.dump_stats(str(path))
+                else:
+                    with path.open("w", encoding="utf-8") as fh:
+                        pstats.Stats(prof, stream=fh).sort_stats("cumulative").print_stats(40)
+                print(f"[profile] cProfile report written to {path}")
+        return run()
+    return nullcontext()
+
+
+def write_snapshot(path, note=None, config=None, set_current=False) -> str:
+    """Ingest an output GeoJSON as a new snapshot through the backend's snapshot service."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    from backend.src.db import get_session
+    from backend.src.repositories import snapshot_repo
+    from backend.src.services import data_service, json_service, snapshot_service
+
+    fc = json_service.decode_feature_collection(Path(path).read_bytes())
+    with get_session() as s:
+        sid = snapshot_service.create_snapshot_and_ingest(
+            s, geojson=fc, note=note or f"ScoreComputing {config.get('mode', 'subzone') if config else 'subzone'}",
+            created_by="ScoreComputing", set_current=set_current,
+        )
+        snapshot_repo.get_snapshot(s, sid).config_json = config
+        snapshot_service.write_rank_stability(s, sid)
+        if set_current:
+            snapshot_service.export_current_geojson(s, sid, data_service.DATA_DIR / "out")
+    return sid
+
+
+# ------------- Main -------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compute the hawker opportunity score per subzone or grid cell.")
+    ap.add_argument("--out", default=OUT, help="output GeoJSON path")
+    ap.add_argument("--mode", choices=["subzone", "grid"], default="subzone",
+                    help="score Master Plan subzones (default) or grid cells (see grid_scoring.py)")
+    ap.add_argument("--grid", choices=["square", "h3"], default="square", help="grid mode: cell shape")
+    ap.add_argument("--cell-size", type=float, default=250.0, help="grid mode: square cell size in metres")
+    ap.add_argument("--h3-resolution", type=int, default=9, help="grid mode: H3 resolution (9 is ~0.1 km2)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="worker processes for input loading and grid overlays (default: all cores; 1 = serial)")
+    ap.add_argument("--snapshot", action="store_true",
+                    help="also ingest the output as a new DB snapshot (needs DATABASE_URL)")
+    ap.add_argument("--snapshot-note", default=None, help="note stored with the snapshot")
+    ap.add_argument("--set-current", action="store_true", help="make the ingested snapshot current")
+    ap.add_argument("--access-model", choices=["decay", "count"], default="count",
+                    help="accessibility term: counts inside the polygon (default) or distance-decay access")
+    ap.add_argument("--access-origins", choices=["grid", "centroid"], default="grid",
+                    help="measure decay access from a population grid (default) or subzone centroids")
+    ap.add_argument("--access-cell", type=float, default=250.0, help="population grid cell size in metres")
+    ap.add_argument("--supply-model", choices=["2sfca", "count"], default="count",
+                    help="hawker supply term: centres inside the polygon (default) or two-step floating catchment")
+    ap.add_argument("--cache-dir", default=CACHE_DIR, help="cache for 2SFCA results keyed by input hash")
+    ap.add_argument("--no-cache", action="store_true", help="always recompute 2SFCA supply")
+    ap.add_argument("--profile", action="store_true",
+                    help="print per-stage wall time and tracemalloc peak memory")
+    ap.add_argument("--profile-json", metavar="PATH", help="also write the stage timings as JSON")
+    ap.add_argument("--cprofile", metavar="PATH", help="write a cProfile report (.prof for pstats, else text)")
+    ap.add_argument("--pyinstrument", metavar="PATH", help="write a pyinstrument report (.html or text)")
+    args = ap.parse_args(argv)
+
+    profiling = args.profile or args.profile_json
+    if profiling:
+        tracemalloc.start()
+    timer = StageTimer(trace_memory=bool(profiling))
+    with _profiler(args):
+        cache_dir = None if args.no_cache else args.cache_dir
+        if args.mode == "grid":
+            import grid_scoring
+
+            gdf_out = grid_scoring.run_grid_pipeline(
+                out=args.out, grid=args.grid, cell_size=args.cell_size, h3_resolution=args.h3_resolution,
+                access_model=args.access_model, supply_model=args.supply_model, cache_dir=cache_dir,
+                workers=args.workers, timer=timer,
+            )
+        else:
+            gdf_out = run_pipeline(out=args.out, access_model=args.access_model,
+                                   access_origins=args.access_origins, access_cell=args.access_cell,
+                                   supply_model=args.supply_model, cache_dir=cache_dir, workers=args.workers,
+                                   timer=timer)
+    if profiling:
+        tracemalloc.stop()
+
+    print(f"[ok] wrote {args.out} with {len(gdf_out)} features.")
     print(gdf_out[["name","subzone","planarea","population","pop_0_25","pop_25_65","pop_65plus","hawker","mrt","bus","H_score","H_rank","Dem","Sup","Acc"]]
           .head(10).to_string(index=False))
 
+    if args.snapshot:
+        config = {k: getattr(args, k) for k in ("mode", "access_model", "access_origins", "access_cell", "supply_model")}
+        if args.mode == "grid":
+            config.update(grid=args.grid, cell_size=args.cell_size, h3_resolution=args.h3_resolution)
+        sid = write_snapshot(args.out, note=args.snapshot_note, config=config, set_current=args.set_current)
+        print(f"[ok] ingested snapshot {sid}" + (" (current)" if args.set_current else ""))
+
+    if args.profile:
+        print()
+        print(timer.report())
+    if args.profile_json:
+        Path(args.profile_json).write_text(
+            json.dumps({"stages": timer.stages, "total_seconds": timer.total()}, indent=2), encoding="utf-8"
+        )
+
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# accessibility.py
+# Distance-decay accessibility for ScoreComputing.py.
+#
+#   A_o = sum_j  w_j * f(d_oj)   over every supply point j within `radius` of origin o
+#
+# Origins are either one representative point per subzone or the cells of a
+# regular population grid inside each subzone; grid access is averaged per
+# subzone weighted by cell population. All distances are metres in EPSG:3414
+# (SVY21) and neighbours come from a KD-tree, so a run over ~5k bus stops and
+# ~330 subzones takes a few tens of milliseconds. SciPy is imported by SupplyIndex
+# only, so count-based runs that merely reuse SVY21/point_xy do not need it.
+#
+# Hawker supply uses a two-step floating catchment area (2SFCA) over the same
+# origins: each centre's capacity is shared among the population within its
+# catchment, and an origin sums the shares of the centres it can reach.
+
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+SVY21 = 3414
+
+
+# ------------- Decay kernels (vectorized, d in metres) -------------
+def _gaussian(d, h):
+    return np.exp(-0.5 * (d / h) ** 2)
+
+
+def _exponential(d, h):
+    return np.exp(-d / h)
+
+
+def _linear(d, h):
+    return np.clip(1.0 - d / h, 0.0, None)
+
+
+def _uniform(d, h):
+    return np.ones_like(d)
+
+
+KERNELS = {
+    "gaussian": _gaussian,
+    "exponential": _exponential,
+    "linear": _linear,
+    "uniform": _uniform,
+}
+
+
+def decay(d: np.ndarray, kernel: str = "gaussian", bandwidth: float = 500.0) -> np.ndarray:
+    try:
+        fn = KERNELS[kernel]
+    except KeyError:
+        raise ValueError(f"unknown kernel {kernel!r}; expected one of {', '.join(KERNELS)}")
+    return fn(np.asarray(d, dtype=float), float(bandwidth))
+
+
+@dataclass
+class DecaySpec:
+    """Catchment of one mode: supply within `radius` metres, weighted by `kernel`(d, bandwidth)."""
+    radius: float
+    bandwidth: float
+    kernel: str = "gaussian"
+
+
+# Walking catchments: ~10 min to an MRT station, ~5 min to a bus stop
+MRT_DECAY = DecaySpec(radius=1200.0, bandwidth=600.0)
+BUS_DECAY = DecaySpec(radius=600.0, bandwidth=300.0)
+# Hawker catchment: ~15-20 min walk, shared by everyone inside it
+HAWKER_CATCHMENT = DecaySpec(radius=1500.0, bandwidth=750.0)
+
+
+def point_xy(gdf: gpd.GeoDataFrame) -> np.ndarray:
+    """(n, 2) EPSG:3414 coordinates of point geometries (representative points otherwise)."""
+    if not len(gdf):
+        return np.empty((0, 2))
+    geom = gdf.geometry.to_crs(SVY21) if gdf.crs is not None else gdf.geometry
+    if not (geom.geom_type == "Point").all():
+        geom = geom.representative_point()
+    return np.column_stack([geom.x.to_numpy(), geom.y.to_numpy()])
+
+
+class SupplyIndex:
+    """KD-tree over supply points (stations, stops) with an optional weight per point."""
+
+    def __init__(self, xy: np.ndarray, weights=None):
+        from scipy.spatial import cKDTree
+
+        self.xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+        self.weights = np.ones(len(self.xy)) if weights is None else np.asarray(weights, dtype=float)
+        self.tree = cKDTree(self.xy) if len(self.xy) else None
+
+    @classmethod
+    def from_gdf(cls, gdf: gpd.GeoDataFrame, weight_col: str = None) -> "SupplyIndex":
+        weights = gdf[weight_col].to_numpy(dtype=float) if weight_col else None
+        return cls(point_xy(gdf), weights)
+
+    def pairs(self, origins_xy: np.ndarray, radius: float):
+        """(origin index, supply index, distance) for every pair closer than `radius`."""
+        origins_xy = np.asarray(origins_xy, dtype=float).reshape(-1, 2)
+        if self.tree is None or not len(origins_xy):
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty, np.empty(0)
+        from scipy.spatial import cKDTree
+
+        m = cKDTree(origins_xy).sparse_distance_matrix(self.tree, radius, output_type="coo_matrix")
+        return m.row, m.col, m.data
+
+    def access(self, origins_xy: np.ndarray, spec: DecaySpec) -> np.ndarray:
+        origins_xy = np.asarray(origins_xy, dtype=float).reshape(-1, 2)
+        rows, cols, d = self.pairs(origins_xy, spec.radius)
+        w = decay(d, spec.kernel, spec.bandwidth) * self.weights[cols]
+        return np.bincount(rows, weights=w, minlength=len(origins_xy))
+
+
+# ------------- Origins -------------
+@dataclass
+class Origins:
+    """Points access is measured from; `zone` maps each point to one of `n_zones` subzone rows."""
+    xy: np.ndarray
+    zone: np.ndarray
+    weight: np.ndarray
+    n_zones: int
+
+    def aggregate(self, values: np.ndarray) -> np.ndarray:
+        """Weighted mean of per-origin `values` for each zone."""
+        num = np.bincount(self.zone, weights=values * self.weight, minlength=self.n_zones)
+        den = np.bincount(self.zone, weights=self.weight, minlength=self.n_zones)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out = num / den
+        return np.where(den > 0, out, 0.0)
+
+
+def _as_float(values) -> np.ndarray:
+    return pd.to_numeric(pd.Series(np.asarray(values)), errors="coerce").fillna(0).to_numpy(dtype=float)
+
+
+def centroid_origins(gdf_poly: gpd.GeoDataFrame, population=None) -> Origins:
+    xy = point_xy(gdf_poly)
+    n = len(xy)
+    if population is None:
+        weight = np.ones(n)
+    else:
+        pop = _as_float(population)
+        weight = np.where(pop > 0, pop, 1e-9)
+    return Origins(xy=xy, zone=np.arange(n), weight=weight, n_zones=n)
+
+
+def grid_origins(gdf_poly: gpd.GeoDataFrame, cell: float = 250.0, population=None) -> Origins:
+    """Cell centres of a `cell`-metre grid inside each polygon.
+
+    A zone's population (if given) is split evenly over its cells, so weighted means
+    reduce to means within a zone but stay comparable if cell weights are refined.
+    Zones smaller than a cell get their representative point as the only origin.
+    """
+    poly = gdf_poly.geometry.to_crs(SVY21).reset_index(drop=True)
+    minx, miny, maxx, maxy = poly.total_bounds
+    xs = np.arange(minx + cell / 2, maxx, cell)
+    ys = np.arange(miny + cell / 2, maxy, cell)
+    gx, gy = np.meshgrid(xs, ys)
+    pts = gpd.GeoSeries(gpd.points_from_xy(gx.ravel(), gy.ravel()), crs=SVY21)
+    hit_pt, hit_zone = poly.sindex.query(pts, predicate="within")
+    # A centre on a shared boundary can fall in two polygons; keep the first
+    hit_pt, first = np.unique(hit_pt, return_index=True)
+    hit_zone = hit_zone[first]
+
+    n = len(poly)
+    missing = np.setdiff1d(np.arange(n), hit_zone)
+    rep = poly.iloc[missing].representative_point()
+    xy = np.vstack([
+        np.column_stack([gx.ravel()[hit_pt], gy.ravel()[hit_pt]]),
+        np.column_stack([rep.x.to_numpy(), rep.y.to_numpy()]),
+    ])
+    zone = np.concatenate([hit_zone, missing]).astype(np.intp)
+
+    cells_per_zone = np.bincount(zone, minlength=n)
+    if population is None:
+        weight = np.ones(len(zone))
+    else:
+        pop = _as_float(population)
+        weight = pop[zone] / cells_per_zone[zone]
+        # Unpopulated zones still get a plain mean instead of a 0/0
+        weight = np.where(pop[zone] > 0, weight, 1e-9)
+    return Origins(xy=xy, zone=zone, weight=weight, n_zones=n)
+
+
+def make_origins(gdf_poly: gpd.GeoDataFrame, origins: str = "grid", cell: float = 250.0, population=None) -> Origins:
+    if origins == "grid":
+        return grid_origins(gdf_poly, cell=cell, population=population)
+    if origins == "centroid":
+        return centroid_origins(gdf_poly, population=population)
+    raise ValueError(f"unknown origins {origins!r}; expected 'grid' or 'centroid'")
+
+
+# ------------- Input-hash cache -------------
+def input_hash(*arrays, **params) -> str:
+    """sha256 over array contents (dtype, shape, bytes) and keyword parameters."""
+    h = hashlib.sha256()
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(f"{a.dtype.str}{a.shape}".encode())
+        h.update(a.tobytes())
+    h.update(repr(sorted(params.items())).encode())
+    return h.hexdigest()
+
+
+def cached_array(cache_dir, name: str, key: str, compute) -> np.ndarray:
+    """Load `<cache_dir>/<name>-<key>.npy` or compute and store it; no cache_dir disables caching."""
+    if cache_dir is None:
+        return compute()
+    path = Path(cache_dir) / f"{name}-{key[:32]}.npy"
+    if path.exists():
+        return np.load(path)
+    result = np.asarray(compute(), dtype=float)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as fh:
+        np.save(fh, result)
+    tmp.replace(path)
+    return result
+
+
+# ------------- Two-step floating catchment area -------------
+def two_step_fca(origins: Origins, supply: SupplyIndex, spec: DecaySpec, scale: float = 1000.0) -> np.ndarray:
+    """Per-origin 2SFCA access in supply units per `scale` people.
+
+    Step 1: R_j = S_j / sum_k P_k f(d_kj)   over origins k within the radius of centre j
+    Step 2: A_i = sum_j R_j f(d_ij)          over centres j within the radius of origin i
+    Both steps reuse one KD-tree pair query.
+    """
+    rows, cols, d = supply.pairs(origins.xy, spec.radius)
+    f = decay(d, spec.kernel, spec.bandwidth)
+    demand = np.bincount(cols, weights=origins.weight[rows] * f, minlength=len(supply.xy))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(demand > 0, supply.weights / demand, 0.0)
+    return np.bincount(rows, weights=ratio[cols] * f, minlength=len(origins.xy)) * scale
+
+
+def zone_supply_2sfca(
+    origins: Origins,
+    supply: SupplyIndex,
+    *,
+    spec: DecaySpec = HAWKER_CATCHMENT,
+    cache_dir=None,
+) -> np.ndarray:
+    """2SFCA supply per zone (population-weighted over its origins), cached per input hash."""
+    o = origins
+    key = input_hash(o.xy, o.zone, o.weight, supply.xy, supply.weights,
+                     radius=spec.radius, bandwidth=spec.bandwidth, kernel=spec.kernel)
+    return cached_array(cache_dir, "supply-2sfca", key, lambda: o.aggregate(two_step_fca(o, supply, spec)))
+
+
+# ------------- Zone accessibility -------------
+def zone_access(origins: Origins, supplies: dict) -> dict:
+    """Access per zone for each named supply.
+
+    supplies: {column: (SupplyIndex, DecaySpec)}; returns {column: array aligned with the zones}.
+    """
+    return {col: origins.aggregate(index.access(origins.xy, spec)) for col, (index, spec) in supplies.items()}
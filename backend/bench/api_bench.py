@@ -0,0 +1,368 @@
+"""
+End-to-end load test for the API hot paths.
+
+Seeds a database from data/out/hawker_opportunities_ver2.geojson, starts a stub Ollama
+server and the API (one uvicorn worker), then drives each scenario at increasing
+concurrency and writes p50/p95/p99 latency and throughput as JSON.
+
+    python -m backend.bench.api_bench                      # SQLite stand-in in a temp dir
+    python -m backend.bench.api_bench --database-url postgresql+psycopg://...  # local Postgres
+    python -m backend.bench.api_bench --baseline backend/bench/results/abc1234.json
+
+The Postgres database should be a throwaway one: the schema is applied and a
+benchmark user and snapshot are created if missing.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import httpx
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SQL_DIR = REPO_ROOT / "backend" / "sql"
+SEED_PATH = REPO_ROOT / "data" / "out" / "hawker_opportunities_ver2.geojson"
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "Bench-Passw0rd!"
+
+
+# ---------------------------------------------------------------- setup
+
+def seed_database(url: str) -> None:
+    """Apply the schema and make sure a current snapshot and a verified user exist."""
+    os.environ["DATABASE_URL"] = url
+    if url.startswith("sqlite"):
+        from .sqlite_compat import create_schema
+        create_schema(url)
+    else:
+        from sqlalchemy import create_engine, text
+        engine = create_engine(url, future=True)
+        with engine.begin() as conn:
+            for p in sorted(SQL_DIR.glob("*.sql")):
+                conn.execute(text(p.read_text(encoding="utf-8")))
+        engine.dispose()
+
+    from backend.src.db import get_session
+    from backend.src.repositories import snapshot_repo, user_repo
+    from backend.src.services import auth_service, snapshot_service
+
+    with get_session() as s:
+        if not snapshot_repo.get_current_snapshot_id(s):
+            fc = json.loads(SEED_PATH.read_text(encoding="utf-8"))
+            snapshot_service.create_snapshot_and_ingest(s, geojson=fc, note="benchmark seed", created_by="bench")
+        if not user_repo.get_user_by_email(s, BENCH_EMAIL):
+            user_repo.create_user(
+                s,
+                email=BENCH_EMAIL,
+                password_hash=auth_service.hash_password(BENCH_PASSWORD),
+                role="client",
+                display_name="Bench",
+                email_verified=True,
+            )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_api(url: str, ollama_url: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": url,
+        "OLLAMA_BASE_URL": ollama_url,
+        "OLLAMA_MODEL": "bench-stub",
+        "JWT_SECRET": env.get("JWT_SECRET") or "bench-secret-" + "0" * 32,
+        "SNAPSHOT_RETENTION_INTERVAL": "0",
+        "LOG_LEVEL": env.get("LOG_LEVEL", "WARNING"),
+    })
+    return subprocess.Popen(
+        [sys.executable, "-m", "backend.bench.server", "--port", str(port)],
+        cwd=str(REPO_ROOT),
+        env=env,
+    )
+
+
+def wait_ready(base_url: str, proc: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"API server exited with code {proc.returncode}")
+        try:
+            if httpx.get(f"{base_url}/healthz", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit("API server did not become ready")
+
+
+# ---------------------------------------------------------------- scenarios
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    # Builds the JSON body for one request from the worker's state
+    body: Callable[[dict[str, Any]], Optional[dict]] = lambda st: None
+    # Send the worker's access token; each worker logs in once before the timed run
+    auth: bool = True
+    # Called with the response to update worker state (e.g. rotated refresh token)
+    after: Optional[Callable[[dict[str, Any], httpx.Response], None]] = None
+
+
+async def _setup_tokens(client: httpx.AsyncClient, state: dict[str, Any]) -> None:
+    r = await client.post("/auth/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+    r.raise_for_status()
+    tokens = r.json()
+    state["refresh_token"] = tokens["refresh_token"]
+    state["access_token"] = tokens["access_token"]
+
+
+def _rotate(state: dict[str, Any], r: httpx.Response) -> None:
+    if r.status_code == 200:
+        state["refresh_token"] = r.json()["refresh_token"]
+
+
+CHAT_BODY = {"messages": [{"role": "user", "content": "Which subzone has the highest H-Score?"}], "stream": False}
+
+SCENARIOS: dict[str, Scenario] = {s.name: s for s in [
+    Scenario("opportunity_file", "GET", "/data/opportunity.geojson"),
+    Scenario("opportunity_db", "GET", "/data/opportunity-db.geojson"),
+    Scenario("subzones", "GET", "/subzones/", auth=False),
+    Scenario(
+        "auth_login", "POST", "/auth/login",
+        body=lambda st: {"email": BENCH_EMAIL, "password": BENCH_PASSWORD},
+        auth=False,
+    ),
+    Scenario(
+        "auth_refresh", "POST", "/auth/refresh",
+        body=lambda st: {"refresh_token": st["refresh_token"]},
+        after=_rotate,
+    ),
+    Scenario("chat", "POST", "/chat/", body=lambda st: CHAT_BODY),
+]}
+
+
+# ---------------------------------------------------------------- load generation
+
+@dataclass
+class LevelResult:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    bytes: int = 0
+    elapsed: float = 0.0
+    first_error: Optional[str] = None
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def summarize(res: LevelResult) -> dict[str, Any]:
+    lat = sorted(res.latencies)
+    ok = len(lat) - res.errors
+    return {
+        "requests": len(lat),
+        "errors": res.errors,
+        "throughput_rps": round(len(lat) / res.elapsed, 2) if res.elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(lat, 50) * 1000, 2),
+            "p95": round(percentile(lat, 95) * 1000, 2),
+            "p99": round(percentile(lat, 99) * 1000, 2),
+            "mean": round(sum(lat) / len(lat) * 1000, 2) if lat else 0.0,
+            "max": round(lat[-1] * 1000, 2) if lat else 0.0,
+        },
+        "bytes_per_response": int(res.bytes / ok) if ok > 0 else 0,
+        "first_error": res.first_error,
+    }
+
+
+async def run_level(base_url: str, sc: Scenario, concurrency: int, duration: float, warmup: int) -> LevelResult:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        states: list[dict[str, Any]] = [{} for _ in range(concurrency)]
+        if sc.auth:
+            await asyncio.gather(*(_setup_tokens(client, st) for st in states))
+
+        async def one(st: dict[str, Any]) -> httpx.Response:
+            headers = {"Authorization": f"Bearer {st['access_token']}"} if sc.auth else {}
+            r = await client.request(sc.method, sc.path, json=sc.body(st), headers=headers)
+            if sc.after:
+                sc.after(st, r)
+            return r
+
+        for i in range(warmup):
+            await one(states[i % concurrency])
+
+        res = LevelResult()
+        deadline = time.perf_counter() + duration
+
+        async def worker(st: dict[str, Any]) -> None:
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                error = None
+                try:
+                    r = await one(st)
+                    if r.status_code >= 400:
+                        error = f"HTTP {r.status_code}: {r.text[:200]}"
+                except httpx.HTTPError as e:
+                    error = f"{type(e).__name__}: {e}"
+                res.latencies.append(time.perf_counter() - t0)
+                if error is None:
+                    res.bytes += len(r.content)
+                else:
+                    res.errors += 1
+                    res.first_error = res.first_error or error
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(st) for st in states))
+        res.elapsed = time.perf_counter() - started
+        return res
+
+
+async def run_all(base_url: str, names: list[str], levels: list[int], duration: float, warmup: int) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    for name in names:
+        sc = SCENARIOS[name]
+        results[name] = {"method": sc.method, "path": sc.path, "levels": {}}
+        for c in levels:
+            summary = summarize(await run_level(base_url, sc, c, duration, warmup))
+            results[name]["levels"][str(c)] = summary
+            lat = summary["latency_ms"]
+            print(
+                f"{name:<18} c={c:<3} {summary['throughput_rps']:>9.1f} req/s"
+                f"  p50={lat['p50']:>8.2f}ms p95={lat['p95']:>8.2f}ms p99={lat['p99']:>8.2f}ms"
+                f"  errors={summary['errors']}",
+                flush=True,
+            )
+    return results
+
+
+# ---------------------------------------------------------------- reporting
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", *args], cwd=str(REPO_ROOT), text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], max_regression: float) -> list[str]:
+    """Return human-readable regressions where p95 grew or throughput dropped by more than max_regression %."""
+    problems: list[str] = []
+    for name, sc in current["results"].items():
+        base_sc = baseline.get("results", {}).get(name)
+        if not base_sc:
+            continue
+        for level, cur in sc["levels"].items():
+            base = base_sc["levels"].get(level)
+            if not base:
+                continue
+            p95_old, p95_new = base["latency_ms"]["p95"], cur["latency_ms"]["p95"]
+            rps_old, rps_new = base["throughput_rps"], cur["throughput_rps"]
+            if p95_old and (p95_new - p95_old) / p95_old * 100 > max_regression:
+                problems.append(f"{name} c={level}: p95 {p95_old}ms -> {p95_new}ms")
+            if rps_old and (rps_old - rps_new) / rps_old * 100 > max_regression:
+                problems.append(f"{name} c={level}: throughput {rps_old} -> {rps_new} req/s")
+    return problems
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"),
+                    help="Postgres URL of a throwaway database (default: SQLite stand-in)")
+    ap.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrency levels")
+    ap.add_argument("--duration", type=float, default=5.0, help="seconds per scenario and level")
+    ap.add_argument("--warmup", type=int, default=3, help="untimed requests before each level")
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of scenarios")
+    ap.add_argument("--ollama-delay-ms", type=float, default=50.0, help="stub LLM latency")
+    ap.add_argument("--output", type=Path, help="result file (default: backend/bench/results/<commit>.json)")
+    ap.add_argument("--baseline", type=Path, help="earlier result file to compare against")
+    ap.add_argument("--max-regression", type=float, default=20.0, help="allowed p95/throughput change in %%")
+    args = ap.parse_args(argv)
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        ap.error(f"unknown scenarios: {', '.join(unknown)}")
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    sys.path.insert(0, str(REPO_ROOT))
+    tmpdir = None
+    url = args.database_url
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory(prefix="hawker-bench-")
+        url = f"sqlite:///{Path(tmpdir.name) / 'bench.db'}"
+    print(f"seeding {url.split('://')[0]} database...", flush=True)
+    seed_database(url)
+
+    from . import stub_ollama
+    ollama, ollama_url = stub_ollama.start(delay_ms=args.ollama_delay_ms)
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    proc = start_api(url, ollama_url, port)
+    try:
+        wait_ready(base_url, proc)
+        results = asyncio.run(run_all(base_url, names, levels, args.duration, args.warmup))
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        ollama.shutdown()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    commit = _git("rev-parse", "--short", "HEAD")
+    report = {
+        "meta": {
+            "commit": commit,
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "database": url.split("://")[0].split("+")[0],
+            "concurrency": levels,
+            "duration_s": args.duration,
+            "ollama_delay_ms": args.ollama_delay_ms,
+        },
+        "results": results,
+    }
+    out = args.output or RESULTS_DIR / f"{commit or 'unknown'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"wrote {out}")
+
+    if args.baseline:
+        problems = compare(report, json.loads(args.baseline.read_text(encoding="utf-8")), args.max_regression)
+        for p in problems:
+            print(f"REGRESSION {p}")
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,85 @@
+"""
+Cold-start import budget for the API workers.
+
+Runs `python -X importtime -c "import backend.src.main"` in fresh interpreters. The check
+fails when the fastest run exceeds the budget, or when a dependency that should be
+deferred until first use (Google auth, passlib/bcrypt, SMTP, the LLM HTTP client) is
+imported at startup.
+
+    python -m backend.bench.import_budget                  # budget from IMPORT_BUDGET_MS (default 900)
+    python -m backend.bench.import_budget --budget-ms 800 --runs 5
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Optional
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+TARGET = "backend.src.main"
+
+# Imported lazily by auth_controller / auth_service / email_service / chat_service
+DEFERRED = (
+    "google.oauth2",
+    "google.auth.transport.requests",
+    "passlib.context",
+    "httpx",
+    "smtplib",
+)
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def measure(target: str = TARGET) -> dict[str, tuple[int, int]]:
+    """Import `target` in a fresh interpreter. Returns {module: (self_us, cumulative_us)}."""
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite://")  # never connected at import time
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=str(REPO_ROOT), env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"importing {target} failed:\n{proc.stderr[-2000:]}")
+    modules: dict[str, tuple[int, int]] = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            modules[m.group(4)] = (int(m.group(1)), int(m.group(2)))
+    return modules
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "900")))
+    ap.add_argument("--runs", type=int, default=3, help="fresh interpreters; the fastest run is compared")
+    ap.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    args = ap.parse_args(argv)
+
+    runs = [measure() for _ in range(max(1, args.runs))]
+    best = min(runs, key=lambda r: r[TARGET][1])
+    total_ms = best[TARGET][1] / 1000.0
+    print(f"{TARGET}: {total_ms:.1f} ms cumulative (best of {len(runs)}, budget {args.budget_ms:.0f} ms)")
+
+    print("slowest modules by cumulative time:")
+    for name, (self_us, cum_us) in sorted(best.items(), key=lambda kv: -kv[1][1])[1:args.top + 1]:
+        print(f"  {cum_us / 1000:>8.1f} ms  (self {self_us / 1000:>6.1f})  {name}")
+
+    failures: list[str] = []
+    eager = [m for m in DEFERRED if m in best]
+    if eager:
+        failures.append(f"deferred dependencies imported at startup: {', '.join(eager)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"cold import {total_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+    for f in failures:
+        print(f"FAIL {f}")
+    if not failures:
+        print("OK")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,81 @@
+"""
+Encode/decode benchmark for the JSON backends behind json_service.
+
+Decodes and re-encodes the published FeatureCollection (data/out/hawker_opportunities_ver2.geojson,
+~2.3 MB) with each installed backend, plus the typed msgspec decode used on the ingest path.
+
+    python -m backend.bench.json_bench                     # 20 runs per case, median reported
+    python -m backend.bench.json_bench --runs 50 --file other.geojson
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_FILE = REPO_ROOT / "data" / "out" / "hawker_opportunities_ver2.geojson"
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def cases(raw: bytes) -> dict[str, tuple[Callable[[], Any], Callable[[], Any]]]:
+    """{backend: (decode, encode)} for every installed backend."""
+    doc = json.loads(raw)
+    out = {"stdlib": (lambda: json.loads(raw), lambda: _stdlib_dumps(doc))}
+    try:
+        import orjson
+
+        opts = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        out["orjson"] = (lambda: orjson.loads(raw), lambda: orjson.dumps(doc, option=opts))
+    except ImportError:
+        pass
+    try:
+        import msgspec
+
+        from backend.src.schemas.geojson_schemas import FeatureCollection
+
+        dec, enc = msgspec.json.Decoder(), msgspec.json.Encoder()
+        typed = msgspec.json.Decoder(FeatureCollection)
+        fc = typed.decode(raw)
+        out["msgspec"] = (lambda: dec.decode(raw), lambda: enc.encode(doc))
+        out["msgspec (structs)"] = (lambda: typed.decode(raw), lambda: enc.encode(fc))
+    except ImportError:
+        pass
+    return out
+
+
+def timeit(fn: Callable[[], Any], runs: int) -> float:
+    fn()  # warm-up
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--file", type=Path, default=DEFAULT_FILE, help="GeoJSON FeatureCollection to use")
+    ap.add_argument("--runs", type=int, default=20, help="runs per case; the median is reported")
+    args = ap.parse_args(argv)
+
+    raw = args.file.read_bytes()
+    print(f"{args.file.name}: {len(raw) / 1e6:.2f} MB, {len(json.loads(raw)['features'])} features")
+    print(f"{'backend':<20}{'decode':>10}{'encode':>10}")
+    base: Optional[tuple[float, float]] = None
+    for name, (decode, encode) in cases(raw).items():
+        d, e = timeit(decode, args.runs), timeit(encode, args.runs)
+        base = base or (d, e)
+        print(f"{name:<20}{d * 1000:>8.1f}ms{e * 1000:>8.1f}ms   x{base[0] / d:.1f} / x{base[1] / e:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,202 @@
+"""
+Scaling benchmark for the ScoreComputing pipeline stages.
+
+Each input (bus stops, subzones, hawker centres, MRT exits) is scaled synthetically on
+its own by the given factors while the other inputs stay at their original size. The
+per-stage wall times show which stages grow with which input.
+
+    python -m backend.bench.pipeline_bench                         # bus,subzones x 1,2,5,10
+    python -m backend.bench.pipeline_bench --inputs bus --factors 1,10,50 --repeat 3
+
+Synthetic copies:
+  bus / hawkers  copies of every point, jittered by up to ~150 m
+  mrt            jittered copies of every exit under a new station name (so stations scale too)
+  subzones       polygon copies translated east of the island, with matching population rows
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import csv
+import json
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# Degrees between subzone tiles; the island is ~0.5 degrees wide
+_TILE_DX = 0.6
+_JITTER_M = 150.0
+_JITTER_DEG = _JITTER_M / 111_320.0
+
+
+def _load(path: Path) -> dict[str, Any]:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _dump(fc: dict[str, Any], path: Path) -> None:
+    path.write_text(json.dumps(fc, separators=(",", ":")), encoding="utf-8")
+
+
+def _rename_in_desc(desc: Optional[str], key: str, suffix: str) -> Optional[str]:
+    # Descriptions are KML attribute tables: <th>KEY</th> <td>VALUE</td>
+    if not desc:
+        return desc
+    return re.sub(rf"(<th>{key}</th>\s*<td>)(.*?)(</td>)", lambda m: m.group(1) + m.group(2) + suffix + m.group(3), desc)
+
+
+def _shift(coords: Any, dx: float, dy: float) -> Any:
+    if coords and isinstance(coords[0], (int, float)):
+        return [coords[0] + dx, coords[1] + dy, *coords[2:]]
+    return [_shift(c, dx, dy) for c in coords]
+
+
+def scale_points(fc: dict[str, Any], factor: int, jitter: float, rng: np.random.Generator,
+                 rename_key: Optional[str] = None) -> dict[str, Any]:
+    out = dict(fc)
+    feats = list(fc["features"])
+    for i in range(1, factor):
+        offsets = rng.uniform(-jitter, jitter, size=(len(fc["features"]), 2))
+        for f, (dx, dy) in zip(fc["features"], offsets):
+            g = copy.deepcopy(f)
+            g["geometry"]["coordinates"] = _shift(g["geometry"]["coordinates"], float(dx), float(dy))
+            if rename_key:
+                g["properties"]["Description"] = _rename_in_desc(g["properties"].get("Description"), rename_key, f" #{i}")
+            feats.append(g)
+    out["features"] = feats
+    return out
+
+
+def scale_subzones(fc: dict[str, Any], pop_rows: list[list[str]], factor: int) -> tuple[dict[str, Any], list[list[str]]]:
+    out = dict(fc)
+    feats = list(fc["features"])
+    header, rows = pop_rows[0], pop_rows[1:]
+    pop_out = [header, *rows]
+    # Subzone rows are the ones without " - Total" / "Total" in the Number column
+    subzone_rows = [r for r in rows if r and r[0] != "Total" and " - Total" not in r[0]]
+    for i in range(1, factor):
+        for f in fc["features"]:
+            g = copy.deepcopy(f)
+            g["geometry"]["coordinates"] = _shift(g["geometry"]["coordinates"], i * _TILE_DX, 0.0)
+            g["properties"]["Description"] = _rename_in_desc(g["properties"].get("Description"), "SUBZONE_N", f" #{i}")
+            feats.append(g)
+        pop_out.extend([[r[0] + f" #{i}", *r[1:]] for r in subzone_rows])
+    out["features"] = feats
+    return out, pop_out
+
+
+def build_inputs(workdir: Path, scaled: str, factor: int, seed: int = 0) -> dict[str, Path]:
+    """Write a full input set into workdir with one input scaled by `factor`."""
+    sc = _score_computing()
+    rng = np.random.default_rng(seed)
+    src = {
+        "mp": REPO_ROOT / sc.MP,
+        "pop_csv": REPO_ROOT / sc.POP,
+        "hawk": REPO_ROOT / sc.HAWK,
+        "mrt": REPO_ROOT / sc.MRT,
+        "bus": REPO_ROOT / sc.BUS,
+    }
+    paths = dict(src)
+    if factor <= 1:
+        return paths
+    if scaled == "bus":
+        paths["bus"] = workdir / "bus_stops.geojson"
+        _dump(scale_points(_load(src["bus"]), factor, _JITTER_M, rng), paths["bus"])
+    elif scaled == "hawkers":
+        paths["hawk"] = workdir / "hawkers.geojson"
+        _dump(scale_points(_load(src["hawk"]), factor, _JITTER_DEG, rng), paths["hawk"])
+    elif scaled == "mrt":
+        paths["mrt"] = workdir / "mrt_exits.geojson"
+        _dump(scale_points(_load(src["mrt"]), factor, _JITTER_DEG, rng, rename_key="STATION_NA"), paths["mrt"])
+    elif scaled == "subzones":
+        with src["pop_csv"].open(newline="", encoding="utf-8") as fh:
+            pop_rows = list(csv.reader(fh))
+        fc, pop_out = scale_subzones(_load(src["mp"]), pop_rows, factor)
+        paths["mp"] = workdir / "subzones.geojson"
+        paths["pop_csv"] = workdir / "population.csv"
+        _dump(fc, paths["mp"])
+        with paths["pop_csv"].open("w", newline="", encoding="utf-8") as fh:
+            csv.writer(fh).writerows(pop_out)
+    else:
+        raise ValueError(f"unknown input {scaled!r}")
+    return paths
+
+
+def _score_computing():
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    import ScoreComputing
+
+    return ScoreComputing
+
+
+def run_once(paths: dict[str, Path], out: Path) -> dict[str, float]:
+    sc = _score_computing()
+    timer = sc.StageTimer()
+    # No 2SFCA cache: every run should pay for the stages it measures
+    sc.run_pipeline(**{k: str(v) for k, v in paths.items()}, out=str(out), cache_dir=None, timer=timer)
+    stages: dict[str, float] = {}
+    for r in timer.stages:
+        stages[r["stage"]] = stages.get(r["stage"], 0.0) + r["seconds"]
+    stages["total"] = timer.total()
+    return stages
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--inputs", default="bus,subzones", help="comma-separated: bus,subzones,hawkers,mrt")
+    ap.add_argument("--factors", default="1,2,5,10", help="comma-separated scale factors")
+    ap.add_argument("--repeat", type=int, default=1, help="runs per point; the median is reported")
+    ap.add_argument("--output", type=Path, help="result file (default: backend/bench/results/pipeline-<commit>.json)")
+    args = ap.parse_args(argv)
+
+    inputs = [s.strip() for s in args.inputs.split(",") if s.strip()]
+    factors = sorted({int(f) for f in args.factors.split(",") if f.strip()})
+    results: dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="hawker-pipeline-bench-") as tmp:
+        workdir = Path(tmp)
+        # Untimed run so imports and file caches do not inflate the first data point
+        run_once(build_inputs(workdir, inputs[0], 1), workdir / "out.geojson")
+        for name in inputs:
+            results[name] = {}
+            for factor in factors:
+                paths = build_inputs(workdir, name, factor)
+                runs = [run_once(paths, workdir / "out.geojson") for _ in range(max(1, args.repeat))]
+                stages = {k: round(statistics.median(r[k] for r in runs), 4) for k in runs[0]}
+                results[name][str(factor)] = stages
+                print(f"{name:<9} x{factor:<3} total={stages['total']:.3f}s", flush=True)
+
+    # Growth of each stage relative to factor 1 (or the smallest factor run)
+    print()
+    for name, by_factor in results.items():
+        base = by_factor[str(factors[0])]
+        print(f"[{name}] stage growth vs x{factors[0]}")
+        for stage in base:
+            row = "  ".join(
+                f"x{f}:{by_factor[str(f)][stage] / base[stage]:.1f}" if base[stage] > 0 else f"x{f}:-"
+                for f in factors
+            )
+            print(f"  {stage:<22}{base[stage]:>8.3f}s  {row}")
+
+    commit = None
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=str(REPO_ROOT), text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    out = args.output or RESULTS_DIR / f"pipeline-{commit or 'unknown'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({"commit": commit, "factors": factors, "results": results}, indent=2), encoding="utf-8")
+    print(f"wrote {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,61 @@
+"""
+Timing for the Monte Carlo rank intervals computed at ingest (rank_stability_service).
+
+Samples the published FeatureCollection (data/out/hawker_opportunities_ver2.geojson) at
+several sample counts and checks that the unperturbed ranks reproduce its H_rank.
+
+    python -m backend.bench.rank_stability_bench                 # 1k, 10k and 50k samples
+    python -m backend.bench.rank_stability_bench --samples 10000 --noise 0.2 --concentration 50
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Optional
+
+from backend.src.services import rank_stability_service as rs
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_FILE = REPO_ROOT / "data" / "out" / "hawker_opportunities_ver2.geojson"
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    import numpy as np
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--file", type=Path, default=DEFAULT_FILE, help="GeoJSON FeatureCollection to use")
+    ap.add_argument("--samples", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    ap.add_argument("--noise", type=float, default=rs.StabilitySettings.input_noise, help="input noise in SDs")
+    ap.add_argument("--concentration", type=float, default=rs.StabilitySettings.concentration,
+                    help="Dirichlet concentration of the weights")
+    args = ap.parse_args(argv)
+
+    props = [f.get("properties") or {} for f in json.loads(args.file.read_bytes())["features"]]
+    # Subzone exports name the id SUBZONE_N; ScoreComputing's own output calls it subzone
+    rows = [{"subzone": p.get("SUBZONE_N") or p.get("subzone"), **{k: p.get(k) for k in (*rs.INPUTS, "H_rank")}}
+            for p in props]
+    ids, values = rs._inputs(rows)
+    if len(ids) < 2:
+        print(f"{args.file.name}: fewer than two features with an id and {', '.join(rs.INPUTS)}")
+        return 1
+    base = rs.simulate_ranks(np.asarray(values, dtype=float), rs.sample_weights(None, 1, float("inf")),
+                             input_noise=0.0, rng=None)[0]
+    published = {r["subzone"]: r["H_rank"] for r in rows}
+    mismatched = sum(int(b) != published[z] for z, b in zip(ids, base))
+    print(f"{args.file.name}: {len(ids)} subzones, unperturbed ranks differing from H_rank: {mismatched}")
+
+    print(f"{'samples':>8}{'seconds':>10}{'median width':>14}{'max width':>11}")
+    for n in args.samples:
+        settings = rs.StabilitySettings(samples=n, input_noise=args.noise, concentration=args.concentration)
+        t0 = time.perf_counter()
+        result = rs.rank_intervals(rows, settings)
+        dt = time.perf_counter() - t0
+        widths = sorted(i["hi"] - i["lo"] for i in result["intervals"].values())
+        print(f"{n:>8}{dt:>10.2f}{widths[len(widths) // 2]:>14}{widths[-1]:>11}")
+    return 0 if mismatched == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,29 @@
+"""
+Serve the API for a benchmark run (one uvicorn worker, no reload, no access log).
+
+    python -m backend.bench.server --port 8765
+"""
+from __future__ import annotations
+
+import argparse
+import os
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+
+    if os.environ.get("DATABASE_URL", "").startswith("sqlite"):
+        from .sqlite_compat import install
+        install()
+
+    import uvicorn
+    from backend.src.main import app
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
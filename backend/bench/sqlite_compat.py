@@ -0,0 +1,64 @@
+"""
+SQLite stand-in for the Postgres schema, used when no benchmark database is available.
+
+Only what the benchmarked endpoints need is emulated: the `gen_random_uuid()` SQL
+function, and timezone-aware timestamps on load (SQLite drops tzinfo).
+PostGIS paths are disabled; the app falls back to its JSON geometry code.
+"""
+from __future__ import annotations
+
+import os
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, create_engine, event
+from sqlalchemy.engine import Engine
+
+_installed = False
+
+
+def _on_connect(dbapi_conn, _record) -> None:  # noqa: ANN001
+    if type(dbapi_conn).__module__.split(".")[0] != "sqlite3":
+        return
+    dbapi_conn.create_function("gen_random_uuid", 0, lambda: uuid.uuid4().hex)
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.close()
+
+
+def _aware_datetimes(target, *_args) -> None:  # noqa: ANN001
+    for col in target.__table__.columns:
+        if isinstance(col.type, DateTime) and col.type.timezone:
+            key = target.__mapper__.get_property_by_column(col).key
+            value = target.__dict__.get(key)
+            if isinstance(value, datetime) and value.tzinfo is None:
+                target.__dict__[key] = value.replace(tzinfo=timezone.utc)
+
+
+def install() -> None:
+    """Register the SQLite shims for every engine created in this process."""
+    global _installed
+    if _installed:
+        return
+    from backend.src.models.base import Base
+
+    event.listen(Engine, "connect", _on_connect)
+    event.listen(Base, "load", _aware_datetimes, propagate=True)
+    event.listen(Base, "refresh", _aware_datetimes, propagate=True)
+    os.environ["POSTGIS_ENABLED"] = "0"
+    _installed = True
+
+
+def create_schema(url: str) -> None:
+    """Create all ORM tables in a fresh SQLite database."""
+    install()
+    from backend.src.models import (  # noqa: F401
+        email_outbox, geometry, job, refresh_token, snapshot, snapshot_rank_stability, snapshot_rollup, subzone, user,
+        user_token,
+    )
+    from backend.src.models.base import Base
+
+    engine = create_engine(url, future=True)
+    Base.metadata.create_all(engine)
+    engine.dispose()
@@ -0,0 +1,108 @@
+"""
+Minimal Ollama stand-in for benchmarks: answers POST /api/chat (JSON or NDJSON stream)
+and GET /api/tags with a fixed reply after a configurable delay.
+
+Run standalone:
+    python -m backend.bench.stub_ollama --port 11500 --delay-ms 50
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+REPLY = "The subzone with the highest H-Score is Tampines East with 2.41 (Rank #1)."
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    delay_s = 0.05
+    token_delay_s = 0.005
+
+    def log_message(self, format, *args):  # noqa: A002 - silence per-request logging
+        pass
+
+    def _send_json(self, obj: dict) -> None:
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):  # noqa: N802
+        if self.path.startswith("/api/tags"):
+            self._send_json({"models": [{"name": "bench-stub"}]})
+            return
+        self.send_error(404)
+
+    def do_POST(self):  # noqa: N802
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.startswith("/api/chat"):
+            self.send_error(404)
+            return
+        model = payload.get("model", "bench-stub")
+        words = REPLY.split(" ")
+        time.sleep(self.delay_s)
+        if not payload.get("stream"):
+            self._send_json({
+                "model": model,
+                "message": {"role": "assistant", "content": REPLY},
+                "done": True,
+                "eval_count": len(words),
+                "eval_duration": int(len(words) * self.token_delay_s * 1e9),
+            })
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, w in enumerate(words):
+            chunk = {"model": model, "message": {"role": "assistant", "content": w + " "}, "done": False}
+            self._write_chunk(json.dumps(chunk) + "\n")
+            time.sleep(self.token_delay_s)
+        final = {
+            "model": model, "message": {"role": "assistant", "content": ""}, "done": True,
+            "eval_count": len(words), "eval_duration": int(len(words) * self.token_delay_s * 1e9),
+        }
+        self._write_chunk(json.dumps(final) + "\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+def start(port: int = 0, *, delay_ms: float = 50.0, token_delay_ms: float = 5.0) -> tuple[ThreadingHTTPServer, str]:
+    """Start the stub in a daemon thread. Returns (server, base_url)."""
+    handler = type("StubHandler", (_Handler,), {
+        "delay_s": delay_ms / 1000.0,
+        "token_delay_s": token_delay_ms / 1000.0,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-ollama", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--port", type=int, default=11500)
+    ap.add_argument("--delay-ms", type=float, default=50.0, help="delay before the first token")
+    ap.add_argument("--token-delay-ms", type=float, default=5.0, help="delay between streamed tokens")
+    args = ap.parse_args(argv)
+    server, url = start(args.port, delay_ms=args.delay_ms, token_delay_ms=args.token_delay_ms)
+    print(f"stub ollama listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -40,8 +40,11 @@ CREATE TABLE IF NOT EXISTS subzones (
 );
 
 CREATE INDEX IF NOT EXISTS subzones_snapshot_idx ON subzones(snapshot_id);
-CREATE INDEX IF NOT EXISTS subzones_planning_area_idx ON subzones(planning_area);
-CREATE INDEX IF NOT EXISTS subzones_rank_idx ON subzones(h_rank);
+-- Every subzone query filters by snapshot first, so secondary indexes are scoped to it
+CREATE INDEX IF NOT EXISTS subzones_snapshot_planning_area_idx ON subzones(snapshot_id, planning_area);
+CREATE INDEX IF NOT EXISTS subzones_snapshot_rank_idx ON subzones(snapshot_id, h_rank);
+-- ...except per-subzone history across snapshots (/subzones/{id}/history)
+CREATE INDEX IF NOT EXISTS subzones_subzone_snapshot_idx ON subzones(subzone_id, snapshot_id);
 
 -- Optional component columns used by the app (match ORM names exactly)
 ALTER TABLE IF EXISTS subzones ADD COLUMN IF NOT EXISTS "Dem" DOUBLE PRECISION;
@@ -62,11 +65,7 @@ CREATE TABLE IF NOT EXISTS users (
     picture_url TEXT,
     industry TEXT,
     phone TEXT,
-    email_verified BOOLEAN NOT NULL DEFAULT false,
-    email_verification_token TEXT,
-    email_verification_sent_at TIMESTAMPTZ,
-    password_reset_token TEXT,
-    password_reset_sent_at TIMESTAMPTZ
+    email_verified BOOLEAN NOT NULL DEFAULT false
 );
 
 -- Optional check constraint for industry values as requested
@@ -88,3 +87,151 @@ CREATE TABLE IF NOT EXISTS refresh_tokens (
     created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
     revoked_at TIMESTAMPTZ
 );
+
+-- Content-addressed geometry store: each distinct polygon is stored once,
+-- keyed by the sha256 of its canonical GeoJSON, and shared by all snapshots.
+CREATE TABLE IF NOT EXISTS geometries (
+    hash TEXT PRIMARY KEY,
+    geom_geojson JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- subzones reference geometries by hash; geom_geojson only keeps legacy inline
+-- copies until they are migrated (bootstrap.py runs the migration).
+ALTER TABLE IF EXISTS subzones ADD COLUMN IF NOT EXISTS geom_hash TEXT REFERENCES geometries(hash);
+CREATE INDEX IF NOT EXISTS subzones_geom_hash_idx ON subzones(geom_hash);
+
+-- Optional PostGIS geometry for spatial filtering (bbox / point-in-polygon).
+-- Skipped silently when the postgis extension is not available; the app then
+-- falls back to filtering GeoJSON in Python.
+DO $$
+BEGIN
+  BEGIN
+    CREATE EXTENSION IF NOT EXISTS postgis;
+  EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE 'PostGIS not available, skipping geometries.geom';
+  END;
+  IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'postgis') THEN
+    ALTER TABLE geometries ADD COLUMN IF NOT EXISTS geom geometry(Geometry, 4326);
+    CREATE INDEX IF NOT EXISTS geometries_geom_gist_idx ON geometries USING GIST (geom);
+    UPDATE geometries
+       SET geom = ST_MakeValid(ST_SetSRID(ST_Force2D(ST_GeomFromGeoJSON(geom_geojson::text)), 4326))
+     WHERE geom IS NULL;
+    -- Superseded by geometries.geom
+    DROP INDEX IF EXISTS subzones_geom_gist_idx;
+    ALTER TABLE subzones DROP COLUMN IF EXISTS geom;
+  END IF;
+END $$;
+
+-- Snapshot retention: tagged snapshots are kept, older ones are archived to
+-- compressed files on disk and their subzone rows deleted.
+ALTER TABLE IF EXISTS snapshots ADD COLUMN IF NOT EXISTS tag TEXT;
+ALTER TABLE IF EXISTS snapshots ADD COLUMN IF NOT EXISTS archived_at TIMESTAMPTZ;
+ALTER TABLE IF EXISTS snapshots ADD COLUMN IF NOT EXISTS archive_path TEXT;
+CREATE INDEX IF NOT EXISTS snapshots_created_at_idx ON snapshots(created_at DESC);
+
+-- Outgoing email queue: request handlers only insert rows, a background worker
+-- delivers them over a reused SMTP connection with retry/backoff.
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    kind VARCHAR(32) NOT NULL,
+    to_addr TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body_text TEXT NOT NULL,
+    body_html TEXT,
+    status VARCHAR(16) NOT NULL DEFAULT 'pending' CHECK (status IN ('pending','sending','sent','failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    sent_at TIMESTAMPTZ
+);
+-- Rows being sent are `sending` (committed before the SMTP call) until their lease ends
+ALTER TABLE email_outbox DROP CONSTRAINT IF EXISTS email_outbox_status_check;
+ALTER TABLE email_outbox ADD CONSTRAINT email_outbox_status_check
+    CHECK (status IN ('pending','sending','sent','failed'));
+-- The worker only ever scans due pending rows and expired `sending` leases
+DROP INDEX IF EXISTS email_outbox_pending_idx;
+CREATE INDEX IF NOT EXISTS email_outbox_due_idx ON email_outbox(next_attempt_at) WHERE status IN ('pending','sending');
+
+-- Email verification / password reset tokens. Only the sha256 of the token is
+-- stored; lookups go through the unique token_hash index and rows are deleted
+-- when used. Expired rows are purged in batches by the retention worker.
+CREATE TABLE IF NOT EXISTS user_tokens (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    purpose VARCHAR(16) NOT NULL CHECK (purpose IN ('verify_email','password_reset')),
+    token_hash TEXT NOT NULL UNIQUE,
+    expires_at TIMESTAMPTZ NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS user_tokens_user_purpose_idx ON user_tokens(user_id, purpose);
+CREATE INDEX IF NOT EXISTS user_tokens_expires_at_idx ON user_tokens(expires_at);
+
+-- Move outstanding plaintext tokens off users (links already emailed keep working)
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM information_schema.columns
+     WHERE table_name = 'users' AND column_name = 'email_verification_token'
+  ) THEN
+    INSERT INTO user_tokens (user_id, purpose, token_hash, expires_at)
+    SELECT id, 'verify_email', encode(sha256(convert_to(email_verification_token, 'UTF8')), 'hex'),
+           COALESCE(email_verification_sent_at, now()) + interval '24 hours'
+      FROM users WHERE email_verification_token IS NOT NULL
+    ON CONFLICT (token_hash) DO NOTHING;
+    INSERT INTO user_tokens (user_id, purpose, token_hash, expires_at)
+    SELECT id, 'password_reset', encode(sha256(convert_to(password_reset_token, 'UTF8')), 'hex'),
+           COALESCE(password_reset_sent_at, now()) + interval '1 hour'
+      FROM users WHERE password_reset_token IS NOT NULL
+    ON CONFLICT (token_hash) DO NOTHING;
+    ALTER TABLE users DROP COLUMN IF EXISTS email_verification_token;
+    ALTER TABLE users DROP COLUMN IF EXISTS email_verification_sent_at;
+    ALTER TABLE users DROP COLUMN IF EXISTS password_reset_token;
+    ALTER TABLE users DROP COLUMN IF EXISTS password_reset_sent_at;
+  END IF;
+END $$;
+
+-- Background jobs (snapshot refresh, pipeline recompute). Queued rows are
+-- claimed with SKIP LOCKED by job runners; progress/heartbeat are updated
+-- while a job runs so stale ones can be failed after a crash.
+CREATE TABLE IF NOT EXISTS jobs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    kind VARCHAR(32) NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'queued' CHECK (status IN ('queued','running','succeeded','failed')),
+    params JSONB,
+    progress DOUBLE PRECISION NOT NULL DEFAULT 0,
+    stage TEXT,
+    result JSONB,
+    error TEXT,
+    created_by TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ,
+    heartbeat_at TIMESTAMPTZ
+);
+CREATE INDEX IF NOT EXISTS jobs_queued_idx ON jobs(created_at) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS jobs_created_at_idx ON jobs(created_at DESC);
+
+-- Per-snapshot aggregates computed at ingest (rollup_service): one row for the whole
+-- snapshot (planning_area '') and one per planning area
+CREATE TABLE IF NOT EXISTS snapshot_rollups (
+    snapshot_id UUID NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+    planning_area TEXT NOT NULL,
+    subzones INTEGER NOT NULL,
+    stats JSONB NOT NULL,
+    rank_bands JSONB NOT NULL,
+    PRIMARY KEY (snapshot_id, planning_area)
+);
+
+-- Monte Carlo H_rank intervals per subzone, computed at ingest (rank_stability_service)
+CREATE TABLE IF NOT EXISTS snapshot_rank_stability (
+    snapshot_id UUID PRIMARY KEY REFERENCES snapshots(id) ON DELETE CASCADE,
+    samples INTEGER NOT NULL,
+    params JSONB NOT NULL,
+    intervals JSONB NOT NULL
+);
+
+-- Superseded by the snapshot-scoped indexes above
+DROP INDEX IF EXISTS subzones_planning_area_idx;
+DROP INDEX IF EXISTS subzones_rank_idx;
@@ -1,35 +1,211 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Any, Optional
 
 from sqlalchemy.orm import Session
 
-from ..repositories import snapshot_repo, user_repo
-from ..services import snapshot_service, auth_service, data_service
+from ..db import get_session
+from ..repositories import job_repo, snapshot_repo, user_repo
+from ..services import snapshot_service, auth_service, data_service, snapshot_diff_service, retention_service, job_service, json_service
+from . import data_controller
 
 
-def refresh_snapshot(
+def publish_snapshot(session: Session, snapshot_id: str) -> dict[str, Any]:
+    """Make an ingested snapshot current, swap the export pointer to its artifact on commit
+    and diff it against the previous one."""
+    previous = snapshot_repo.get_current_snapshot_id(session)
+    snapshot_repo.set_current_snapshot(session, snapshot_id)
+    export_dir = data_service.DATA_DIR / "out"
+    out = snapshot_service.export_current_geojson(session, snapshot_id, export_dir)
+    changes = None
+    if previous and previous != snapshot_id:
+        diff = data_controller.diff_snapshots(session, previous, snapshot_id)
+        changes = snapshot_diff_service.summarize(diff)
+    return {
+        "snapshot_id": snapshot_id,
+        "export_path": str(out),
+        "previous_snapshot_id": previous,
+        "changes": changes,
+    }
+
+
+# ---- Background jobs (run by job_service in a worker process) ----
+
+_RECOMPUTE_CHOICES = {
+    "mode": ("subzone", "grid"),
+    "access_model": ("count", "decay"),
+    "supply_model": ("count", "2sfca"),
+    "grid": ("square", "h3"),
+}
+# Modules the scoring pipeline (ScoreComputing, accessibility, grid_scoring) imports. They
+# are not in backend/requirements.txt: only servers that run recompute jobs need them.
+_PIPELINE_MODULES = ("geopandas", "pandas", "numpy", "shapely", "bs4")
+# Approximate StageTimer stages per pipeline run; only used to scale progress
+_PIPELINE_STAGES = {"subzone": 22, "grid": 20}
+
+
+def enqueue_refresh(
     session: Session,
     *,
     geojson: dict[str, Any],
     note: Optional[str] = None,
     created_by: Optional[str] = None,
 ) -> dict[str, Any]:
-    """Create a new snapshot from an uploaded/provided GeoJSON and make it current.
+    """Queue ingest + publish of an uploaded FeatureCollection. Returns { job_id, status }."""
+    if not isinstance(geojson.get("features"), list):
+        raise ValueError("geojson must be a FeatureCollection")
+    job_id = job_service.enqueue(
+        session,
+        kind="refresh",
+        params={"note": note, "features": len(geojson["features"])},
+        created_by=created_by,
+        payload=json_service.dumps(geojson),
+    )
+    return {"job_id": job_id, "status": "queued"}
+
+
+def enqueue_recompute(session: Session, *, params: dict[str, Any], created_by: Optional[str] = None) -> dict[str, Any]:
+    """Queue a scoring pipeline run over data/ followed by ingest + publish. Returns { job_id, status }."""
+    clean: dict[str, Any] = {}
+    for key, choices in _RECOMPUTE_CHOICES.items():
+        value = params.get(key) or choices[0]
+        if value not in choices:
+            raise ValueError(f"{key} must be one of: {', '.join(choices)}")
+        clean[key] = value
+    cell_size = float(params.get("cell_size") or 250.0)
+    if not 50.0 <= cell_size <= 2000.0:
+        raise ValueError("cell_size must be between 50 and 2000 metres")
+    clean["cell_size"] = cell_size
+    clean["note"] = params.get("note")
+    _require_pipeline_modules(clean)
+    job_id = job_service.enqueue(session, kind="recompute", params=clean, created_by=created_by)
+    return {"job_id": job_id, "status": "queued"}
+
+
+def _require_pipeline_modules(params: dict[str, Any]) -> None:
+    """Raise ValueError up front when the worker could not import the scoring pipeline."""
+    import importlib.util
+
+    needed = list(_PIPELINE_MODULES)
+    if params.get("access_model") == "decay" or params.get("supply_model") == "2sfca":
+        needed.append("scipy")  # KD-tree in accessibility.SupplyIndex
+    if params.get("mode") == "grid" and params.get("grid") == "h3":
+        needed.append("h3")
+    missing = [m for m in needed if importlib.util.find_spec(m) is None]
+    if missing:
+        raise ValueError(f"Recompute needs the scoring pipeline dependencies; not installed: {', '.join(missing)}")
+
+
+def list_jobs(session: Session, *, limit: int = 50, offset: int = 0) -> list[dict[str, Any]]:
+    return [job_service.to_dict(j) for j in job_repo.list_jobs(session, limit=limit, offset=offset)]
+
+
+def get_job(session: Session, job_id: str) -> dict[str, Any]:
+    job = job_repo.get_job(session, job_id)
+    if job is None:
+        raise ValueError("Job not found")
+    return job_service.to_dict(job)
 
-    Returns: { snapshot_id, inserted, export_path }
-    """
-    sid = snapshot_repo.create_snapshot(session, note=note, created_by=created_by)
-    inserted = snapshot_service.bulk_ingest_geojson(session, geojson, sid)
-    snapshot_repo.set_current_snapshot(session, sid)
-    export_dir = data_service.DATA_DIR / "out"
-    out = snapshot_service.export_current_geojson(session, sid, export_dir)
-    return {"snapshot_id": sid, "inserted": inserted, "export_path": str(out)}
 
+def _ingest_and_publish(ctx: "job_service.JobContext", geojson: dict[str, Any], *, note: Optional[str],
+                        created_by: Optional[str], config: Optional[dict[str, Any]], start: float) -> dict[str, Any]:
+    # Ingest in one transaction without touching the current snapshot, so readers keep
+    # the old one until the short publish transaction flips the flag.
+    ctx.progress(start, "ingest")
+    with get_session() as s:
+        sid = snapshot_repo.create_snapshot(s, note=note, created_by=created_by)
+        inserted = snapshot_service.bulk_ingest_geojson(s, geojson, sid)
+        if config is not None:
+            snapshot_repo.get_snapshot(s, sid).config_json = config
+        # Write the versioned artifact now; publishing then only swaps the pointer
+        snapshot_service.write_artifacts(s, sid, data_service.DATA_DIR / "out")
+    # Monte Carlo rank intervals (seconds) run here in the worker, never in a request
+    ctx.progress(start + (1.0 - start) * 0.5, "rank_stability")
+    with get_session() as s:
+        snapshot_service.write_rank_stability(s, sid)
+    ctx.progress(start + (1.0 - start) * 0.66, "publish")
+    with get_session() as s:
+        published = publish_snapshot(s, sid)
+    return {**published, "inserted": inserted}
 
-def list_snapshots(session: Session) -> list[dict[str, Any]]:
-    snaps = snapshot_repo.list_snapshots(session)
+
+def run_refresh_job(ctx: "job_service.JobContext") -> dict[str, Any]:
+    path = job_service.upload_path(ctx.job_id)
+    try:
+        ctx.progress(0.05, "read_upload")
+        geojson = json_service.decode_feature_collection(path.read_bytes())
+        with get_session() as s:
+            created_by = job_repo.get_job(s, ctx.job_id).created_by
+        return _ingest_and_publish(ctx, geojson, note=ctx.params.get("note"), created_by=created_by,
+                                   config=None, start=0.1)
+    finally:
+        path.unlink(missing_ok=True)
+
+
+def run_recompute_job(ctx: "job_service.JobContext") -> dict[str, Any]:
+    """Run ScoreComputing over the raw inputs in data/, then ingest and publish the output."""
+    import sys
+    import tempfile
+
+    root = data_service.BASE_DIR
+    if str(root) not in sys.path:
+        sys.path.insert(0, str(root))
+    import ScoreComputing as sc
+
+    p = ctx.params
+    mode = p.get("mode", "subzone")
+    expected = _PIPELINE_STAGES.get(mode, 20)
+
+    class ProgressTimer(sc.StageTimer):
+        # Pipeline stages cover 0..0.7 of the job; ingest and publish the rest
+        @contextmanager
+        def stage(self, name: str):
+            done = sum(1 for r in self.stages if "worker" not in r)
+            ctx.progress(0.7 * min(done / expected, 0.99), name)
+            with super().stage(name):
+                yield
+
+    timer = ProgressTimer()
+    paths = {k: str(root / getattr(sc, k.upper())) for k in ("mp", "hawk", "mrt", "bus")}
+    paths["pop_csv"] = str(root / sc.POP)
+    with tempfile.TemporaryDirectory(prefix="recompute-") as tmp:
+        out = Path(tmp) / "out.geojson"
+        common = dict(out=str(out), access_model=p.get("access_model", "count"),
+                      supply_model=p.get("supply_model", "count"), cache_dir=root / sc.CACHE_DIR,
+                      workers=1, timer=timer, **paths)
+        if mode == "grid":
+            import grid_scoring
+
+            grid_scoring.run_grid_pipeline(grid=p.get("grid", "square"), cell_size=float(p.get("cell_size", 250.0)),
+                                           **common)
+        else:
+            sc.run_pipeline(**common)
+        geojson = json_service.decode_feature_collection(out.read_bytes())
+
+    config = {k: p.get(k) for k in ("mode", "access_model", "supply_model", "grid", "cell_size") if k in p}
+    # Record the model actually used; scores from different models are not comparable
+    config["access_model"] = common["access_model"]
+    config["supply_model"] = common["supply_model"]
+    config["stages"] = [{"stage": r["stage"], "seconds": round(r["seconds"], 3)} for r in timer.stages]
+    with get_session() as s:
+        created_by = job_repo.get_job(s, ctx.job_id).created_by
+    result = _ingest_and_publish(ctx, geojson, note=p.get("note") or f"Recompute ({mode})",
+                                 created_by=created_by, config=config, start=0.7)
+    result["pipeline_seconds"] = round(timer.total(), 3)
+    return result
+
+
+def run_rank_stability_job(ctx: "job_service.JobContext") -> dict[str, Any]:
+    """Sample rank intervals for a snapshot that has none (see snapshot_service.enqueue_rank_stability)."""
+    sid = ctx.params["snapshot_id"]
+    ctx.progress(0.1, "rank_stability")
+    return {"snapshot_id": sid, "subzones": snapshot_service.ensure_rank_stability(sid)}
+
+
+def list_snapshots(session: Session, *, limit: Optional[int] = None, offset: int = 0) -> list[dict[str, Any]]:
+    snaps = snapshot_repo.list_snapshots(session, limit=limit, offset=offset)
     return [
         {
             "id": s.id,
@@ -37,16 +213,38 @@ def list_snapshots(session: Session) -> list[dict[str, Any]]:
             "created_by": s.created_by,
             "note": s.note,
             "is_current": bool(s.is_current),
+            "tag": s.tag,
+            "archived": s.archived_at is not None,
         }
         for s in snaps
     ]
 
 
 def restore_snapshot(session: Session, snapshot_id: str) -> dict[str, Any]:
+    """Make a snapshot current, re-ingesting it from its archive file first if it was archived.
+
+    The export is the snapshot's versioned artifact, so this is a pointer swap unless the
+    snapshot predates artifacts (then it is written once).
+    """
+    restored_rows = retention_service.restore_archived(session, snapshot_id)
     snapshot_repo.set_current_snapshot(session, snapshot_id)
     export_dir = data_service.DATA_DIR / "out"
     out = snapshot_service.export_current_geojson(session, snapshot_id, export_dir)
-    return {"snapshot_id": snapshot_id, "export_path": str(out)}
+    # Snapshots from before rank intervals get them from a background job, not this request
+    job_id = snapshot_service.enqueue_rank_stability(session, snapshot_id)
+    return {"snapshot_id": snapshot_id, "export_path": str(out), "unarchived_rows": restored_rows,
+            "rank_stability_job": job_id}
+
+
+def tag_snapshot(session: Session, snapshot_id: str, tag: Optional[str]) -> dict[str, Any]:
+    """Set or clear a snapshot tag. Tagged snapshots are exempt from archival."""
+    if snapshot_repo.set_tag(session, snapshot_id, tag) == 0:
+        raise ValueError("Snapshot not found")
+    return {"snapshot_id": snapshot_id, "tag": tag or None}
+
+
+def run_retention() -> dict[str, Any]:
+    return retention_service.run_retention()
 
 
 # ---- User management (admin-only) ----
@@ -4,17 +4,15 @@ from datetime import datetime, timezone
 from typing import Any, Optional
 import os
 
-from google.oauth2 import id_token as google_id_token
-from google.auth.transport import requests as google_requests
-
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from ..models.refresh_token import RefreshToken
 from ..models.user import User
-from ..repositories import user_repo
+from ..repositories import user_repo, user_token_repo
 from ..services import auth_service
 from ..services import email_service
+from ..services import google_auth_service
 
 
 def register(
@@ -45,16 +43,10 @@ def register(
     # send verification email
     user = user_repo.get_user_by_id(session, uid)
     if user:
-        import secrets
-        token = secrets.token_urlsafe(48)
-        user.email_verification_token = token
-        user.email_verification_sent_at = datetime.now(timezone.utc)
+        token = auth_service.issue_user_token(session, user_id=user.id, purpose="verify_email")
         base_url = os.getenv("APP_BASE_URL", "http://127.0.0.1:5173")
         verify_url = f"{base_url}/#/verify-email?token={token}"
-        try:
-            email_service.send_email_verification(email, verify_url)
-        except Exception:
-            pass
+        email_service.send_email_verification(session, email, verify_url)
     return {"user_id": uid, "message": "Registration successful. Please verify your email to sign in."}
 
 
@@ -179,11 +171,8 @@ def login_with_google(session: Session, *, id_token_str: str) -> dict[str, Any]:
     if not client_id:
         raise ValueError("Server missing GOOGLE_CLIENT_ID")
 
-    payload = google_id_token.verify_oauth2_token(
-        id_token_str,
-        google_requests.Request(),
-        audience=client_id,
-    )
+    # Verified locally against the cached Google signing keys; no outbound call per login
+    payload = google_auth_service.verify_id_token(id_token_str, audience=client_id)
 
     email = payload.get("email")
     email_verified = payload.get("email_verified")
@@ -230,44 +219,38 @@ def request_password_reset(session: Session, *, email: str, ip_address: str | No
     try:
         u = user_repo.get_user_by_email(session, email)
         if u and u.email_verified:
-            import secrets
-            token = secrets.token_urlsafe(48)
-            u.password_reset_token = token
-            u.password_reset_sent_at = datetime.now(timezone.utc)
+            token = auth_service.issue_user_token(session, user_id=u.id, purpose="password_reset")
             base_url = os.getenv("APP_BASE_URL", "http://127.0.0.1:5173")
             reset_url = f"{base_url}/#/reset-password?token={token}"
-            email_service.send_password_reset(email, reset_url)
+            email_service.send_password_reset(session, email, reset_url)
     except Exception:
         pass
     return {"ok": True}
 
 
+def _redeem_user_token(session: Session, *, token: str, purpose: str, kind: str) -> User:
+    row = user_token_repo.get_for_update(session, token=token, purpose=purpose)
+    u = user_repo.get_user_by_id(session, row.user_id) if row else None
+    if not row or not u:
+        raise ValueError(f"Invalid or expired {kind} token")
+    if row.expires_at < datetime.now(timezone.utc):
+        raise ValueError(f"{kind.capitalize()} token expired")
+    user_token_repo.consume(session, row)
+    return u
+
+
 def reset_password(session: Session, *, token: str, new_password: str) -> dict[str, Any]:
     valid, msg = auth_service.validate_password_policy(new_password)
     if not valid:
         raise ValueError(msg)
-    u = session.execute(select(User).where(User.password_reset_token == token)).scalars().first()
-    if not u:
-        raise ValueError("Invalid or expired reset token")
-    ttl_h = int(os.getenv("TOKEN_TTL_PW_RESET_HOURS", "1"))
-    if u.password_reset_sent_at and (datetime.now(timezone.utc) - u.password_reset_sent_at).total_seconds() > ttl_h * 3600:
-        raise ValueError("Reset token expired")
-    u.password_reset_token = None
-    u.password_reset_sent_at = None
+    u = _redeem_user_token(session, token=token, purpose="password_reset", kind="reset")
     u.password_hash = auth_service.hash_password(new_password)
     return {"ok": True}
 
 
 def verify_email(session: Session, *, token: str) -> dict[str, Any]:
-    u = session.execute(select(User).where(User.email_verification_token == token)).scalars().first()
-    if not u:
-        raise ValueError("Invalid or expired verification token")
-    ttl_h = int(os.getenv("TOKEN_TTL_EMAIL_VERIFY_HOURS", "24"))
-    if u.email_verification_sent_at and (datetime.now(timezone.utc) - u.email_verification_sent_at).total_seconds() > ttl_h * 3600:
-        raise ValueError("Verification token expired")
+    u = _redeem_user_token(session, token=token, purpose="verify_email", kind="verification")
     u.email_verified = True
-    u.email_verification_token = None
-    u.email_verification_sent_at = None
     return {"ok": True}
 
 
@@ -275,14 +258,8 @@ def resend_verification_email(session: Session, *, email: str) -> dict[str, Any]
     u = user_repo.get_user_by_email(session, email)
     if not u or u.email_verified:
         return {"ok": True}
-    import secrets
-    token = secrets.token_urlsafe(48)
-    u.email_verification_token = token
-    u.email_verification_sent_at = datetime.now(timezone.utc)
+    token = auth_service.issue_user_token(session, user_id=u.id, purpose="verify_email")
     base_url = os.getenv("APP_BASE_URL", "http://127.0.0.1:5173")
     verify_url = f"{base_url}/#/verify-email?token={token}"
-    try:
-        email_service.send_email_verification(u.email, verify_url)
-    except Exception:
-        pass
+    email_service.send_email_verification(session, u.email, verify_url)
     return {"ok": True}
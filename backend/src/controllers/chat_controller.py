@@ -3,10 +3,13 @@ Chat controller - handles business logic for chat operations
 """
 from typing import AsyncGenerator, Optional
 from sqlalchemy.orm import Session
-from ..services.chat_service import chat_service
+from ..services.chat_service import get_chat_service
+from ..services.log_service import get_logger
 from ..schemas.chat_schemas import ChatRequest, ChatResponse, SubzoneInsightRequest
 from . import data_controller
 
+log = get_logger("chat.controller")
+
 
 class ChatController:
     def __init__(self):
@@ -35,13 +38,14 @@ class ChatController:
         # Detect if user is asking for specific data
         if messages and session:
             user_message = messages[-1].get("content", "")
-            data_request = chat_service._detect_data_request(user_message)
-            print(f"[Chat Controller] User message: '{user_message}'")
-            print(f"[Chat Controller] Data request detected: {data_request}")
+            data_request = get_chat_service()._detect_data_request(user_message)
+            log.debug("chat.message", extra={"chars": len(user_message), "data_request": data_request})
             
             if data_request:
                 # Fetch relevant subzone data
                 try:
+                    # Snapshot-wide maxima come from the rollup computed at ingest
+                    stats = data_controller.subzone_stats(session, snapshot="current")
                     if data_request['type'] == 'specific_rank':
                         # Fetch specific rank with context (neighbors)
                         n = data_request['n']
@@ -65,17 +69,18 @@ class ChatController:
                             rank_top=n,
                             snapshot="current"
                         )
-                        print(f"[Chat Controller] Fetching {len(subzones)} subzones for top {data_request.get('top_n')} by {data_request.get('attribute')}")
+                        log.debug("chat.fetch", extra={"count": len(subzones), "top_n": data_request.get('top_n'), "attribute": data_request.get('attribute')})
                     elif data_request['type'] == 'find_max_attribute':
-                        # Fetch ALL subzones to find true max/min population/MRT/bus/hawker
-                        # Must fetch all 332 because attribute max doesn't correlate with H-Score rank
-                        n = data_request.get('n', 332)
+                        # The true max population/MRT/bus/hawker comes from the rollup, so only
+                        # the rows shown in the reference table are needed; without a rollup,
+                        # fetch ALL subzones since attribute max doesn't correlate with H-Score rank
+                        n = 50 if stats else data_request.get('n', 332)
                         subzones = data_controller.list_subzones(
                             session,
                             rank_top=n,
                             snapshot="current"
                         )
-                        print(f"[Chat Controller] Fetching ALL {len(subzones)} subzones to find extreme attribute values")
+                        log.debug("chat.fetch", extra={"count": len(subzones), "purpose": "extreme_attribute"})
                     elif data_request['type'] == 'top_n':
                         # Fetch top N subzones
                         n = min(data_request['n'], 100)  # Cap at 100 for performance
@@ -89,29 +94,24 @@ class ChatController:
                     
                     # Inject data into context if we have results
                     if subzones:
-                        print(f"[Chat Controller] ✅ Successfully fetched {len(subzones)} subzones")
-                        print(f"[Chat Controller] Sample subzone: {subzones[0] if subzones else 'None'}")
-                        messages = chat_service._inject_subzone_context(messages, subzones, data_request)
-                        print(f"[Chat Controller] Injected {len(subzones)} subzones into context (request type: {data_request['type']}, n={data_request.get('n', 'N/A')})")
+                        messages = get_chat_service()._inject_subzone_context(messages, subzones, data_request, stats=stats)
+                        log.info("chat.context_injected", extra={"count": len(subzones), "request_type": data_request['type'], "n": data_request.get('n')})
                     else:
-                        print(f"[Chat Controller] ❌ WARNING: No subzones returned from database!")
-                        print(f"[Chat Controller] This likely means:")
-                        print(f"[Chat Controller] - No snapshot data in database")
-                        print(f"[Chat Controller] - Database not initialized")
-                        print(f"[Chat Controller] - Need to run data import/bootstrap script")
-                except Exception as e:
-                    print(f"[Chat Controller] Error fetching subzone data: {e}")
+                        # Usually means no current snapshot: run the bootstrap/import first
+                        log.warning("chat.no_subzones", extra={"request_type": data_request['type']})
+                except Exception:
+                    log.exception("chat.fetch_failed")
                     # Continue without data injection - AI will handle gracefully
         
         if request.stream:
             # Return the async generator directly
-            result = chat_service.chat_completion(messages, stream=True)
+            result = get_chat_service().chat_completion(messages, stream=True)
             if hasattr(result, '__aiter__'):
                 return result
             else:
                 return await result
         else:
-            result = await chat_service.chat_completion(messages, stream=False)
+            result = await get_chat_service().chat_completion(messages, stream=False)
             return ChatResponse(
                 content=result["content"],
                 model=result.get("model")
@@ -130,7 +130,7 @@ class ChatController:
         Returns:
             ChatResponse with generated insight
         """
-        insight = await chat_service.generate_subzone_insight(request.subzone_data)
+        insight = await get_chat_service().generate_subzone_insight(request.subzone_data)
         return ChatResponse(content=insight)
 
 
@@ -1,24 +1,171 @@
 from __future__ import annotations
 
+import uuid
 from typing import Any, Optional
 
 from sqlalchemy.orm import Session
 
-from ..repositories import snapshot_repo, subzone_repo
+from ..db import get_session
+from ..repositories import rank_stability_repo, rollup_repo, snapshot_repo, subzone_repo
+from ..services import (
+    data_service, geometry_service, layer_index_service, rollup_service, snapshot_diff_service, snapshot_service,
+    snapshot_store_service,
+)
+
+
+def _resolve_snapshot(session: Session, snapshot: Optional[str]) -> Optional[str]:
+    if not snapshot or snapshot == "current":
+        return snapshot_repo.get_current_snapshot_id(session)
+    return snapshot
 
 
 def get_opportunity_geojson(session: Session, *, snapshot: Optional[str] = None) -> dict[str, Any]:
     """Return a FeatureCollection for the given snapshot id or the current snapshot.
     Pass snapshot=None or 'current' to use the current snapshot.
     """
-    sid = snapshot
-    if not sid or sid == "current":
-        sid = snapshot_repo.get_current_snapshot_id(session)
+    sid = _resolve_snapshot(session, snapshot)
     if not sid:
         return {"type": "FeatureCollection", "features": []}
     return subzone_repo.select_features_fc(session, sid)
 
 
+def get_opportunity_geojson_bytes(session: Session, *, snapshot: Optional[str] = None) -> bytes:
+    """Serialized FeatureCollection of a snapshot, assembled from the mapped store when available."""
+    sid = _resolve_snapshot(session, snapshot)
+    if not sid:
+        return layer_index_service.EMPTY_FC
+    store = _snapshot_store(session, sid)
+    if store is not None:
+        return layer_index_service.cached_response(("store", sid, None), store.to_bytes)
+    return layer_index_service.encode_fc(subzone_repo.select_features_fc(session, sid))
+
+
+def get_opportunity_geojson_bbox(
+    session: Session,
+    *,
+    bbox: geometry_service.BBox,
+    snapshot: Optional[str] = None,
+) -> bytes:
+    """Return the serialized features of a snapshot intersecting bbox.
+
+    Filters the memory-mapped snapshot store when available, then the PostGIS GiST
+    index, otherwise an in-memory grid index built once per snapshot. Responses are
+    cached per snapshot and (snapped) bbox.
+    """
+    sid = _resolve_snapshot(session, snapshot)
+    if not sid:
+        return layer_index_service.EMPTY_FC
+    store = _snapshot_store(session, sid)
+    if store is not None:
+        box = layer_index_service.snap_bbox(bbox)
+        return layer_index_service.cached_response(("store", sid, box), lambda: store.to_bytes(store.query(box)))
+    if subzone_repo.has_postgis(session):
+        box = layer_index_service.snap_bbox(bbox)
+        return layer_index_service.cached_response(
+            ("postgis", sid, box),
+            lambda: layer_index_service.encode_fc(subzone_repo.select_features_in_bbox(session, sid, box)),
+        )
+    version, layer = _snapshot_layer(session, sid)
+    return layer_index_service.filtered_layer_bytes(version, layer, bbox)
+
+
+def find_subzone_at(
+    session: Session,
+    *,
+    lon: float,
+    lat: float,
+    snapshot: Optional[str] = None,
+) -> Optional[dict[str, Any]]:
+    """Return the subzone feature containing (lon, lat), or None."""
+    sid = _resolve_snapshot(session, snapshot)
+    if not sid:
+        return None
+    store = _snapshot_store(session, sid)
+    if store is not None:
+        return store.find_at(lon, lat)
+    if subzone_repo.has_postgis(session):
+        return subzone_repo.select_feature_at_point(session, sid, lon, lat)
+    _, layer = _snapshot_layer(session, sid)
+    for i in layer.query((lon, lat, lon, lat)):
+        feat = layer.features[i]
+        if geometry_service.point_in_geometry(feat.get("geometry"), lon, lat):
+            return feat
+    return None
+
+
+def _snapshot_layer(session: Session, sid: str):
+    return layer_index_service.snapshot_layer(sid, lambda: subzone_repo.select_features_fc(session, sid))
+
+
+def _snapshot_store(session: Session, sid: str):
+    def load() -> Optional[dict[str, Any]]:
+        # Only materialize snapshots that exist; ids can come from query strings. Archived
+        # snapshots have no rows: their store would be empty and outlive a restore.
+        if not _is_uuid(sid):
+            return None
+        snap = snapshot_repo.get_snapshot(session, sid)
+        if snap is None or snap.archived_at is not None:
+            return None
+        return subzone_repo.select_features_fc(session, sid)
+
+    return snapshot_store_service.open_store(data_service.DATA_DIR / "out", sid, load)
+
+
+def _attribute_rows(session: Session, snapshot_id: str) -> list[dict[str, Any]]:
+    # Legacy rows not yet moved to the geometries table are hashed here, the same way
+    # ingest hashes new ones, so their geometry compares equal across snapshots.
+    rows = subzone_repo.select_attribute_rows(session, snapshot_id)
+    for r in rows:
+        legacy = r.pop("legacy_geometry")
+        if r["geom_hash"] is None:
+            r["geom_hash"] = geometry_service.geometry_hash(legacy)
+    return rows
+
+
+def diff_snapshots(session: Session, from_snapshot: str, to_snapshot: str) -> dict[str, Any]:
+    """Attribute/rank/geometry-hash diff between two snapshots (no geometry payload)."""
+    return snapshot_diff_service.diff_rows(
+        _attribute_rows(session, from_snapshot),
+        _attribute_rows(session, to_snapshot),
+    )
+
+
+def get_opportunity_delta(
+    session: Session,
+    *,
+    from_snapshot: str,
+    to_snapshot: Optional[str] = None,
+) -> bytes:
+    """Return the serialized delta needed to patch `from_snapshot` into `to_snapshot` (default: current).
+
+    Snapshots are immutable once ingested, so deltas are cached per (from, to) pair.
+    Raises ValueError if either snapshot does not exist.
+    """
+    to_sid = _resolve_snapshot(session, to_snapshot)
+    for sid in (from_snapshot, to_sid):
+        if not sid or not _is_uuid(sid) or snapshot_repo.get_snapshot(session, sid) is None:
+            raise ValueError(f"Snapshot not found: {sid}")
+    if from_snapshot == to_sid:
+        return layer_index_service.encode_fc(snapshot_diff_service.empty_delta(from_snapshot, to_sid))
+
+    def build() -> bytes:
+        diff = diff_snapshots(session, from_snapshot, to_sid)
+        ids = list(diff["added"]) + [c["subzone"] for c in diff["changed"]]
+        feats = subzone_repo.select_features_by_ids(session, to_sid, ids)
+        delta = snapshot_diff_service.build_delta(diff, feats, from_snapshot=from_snapshot, to_snapshot=to_sid)
+        return layer_index_service.encode_fc(delta)
+
+    return layer_index_service.cached_response(("delta", from_snapshot, to_sid), build)
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(str(value))
+        return True
+    except ValueError:
+        return False
+
+
 def list_subzones(
     session: Session,
     *,
@@ -26,28 +173,181 @@ def list_subzones(
     rank_top: Optional[int] = None,
     snapshot: Optional[str] = None,
 ) -> list[dict[str, Any]]:
-    sid = snapshot
-    if not sid or sid == "current":
-        sid = snapshot_repo.get_current_snapshot_id(session)
+    sid = _resolve_snapshot(session, snapshot)
     if not sid:
         return []
+    store = _snapshot_store(session, sid)
+    if store is not None:
+        return store.rows(planning_area=planning_area, rank_top=rank_top)
     return subzone_repo.select_subzones(session, sid, planning_area=planning_area, rank_top=rank_top)
 
 
+# Cap on subzones per /subzones/history request
+MAX_HISTORY_IDS = 50
 
 
+def subzone_history(session: Session, subzone_ids: list[str], *, last: Optional[int] = None) -> dict[str, list[dict[str, Any]]]:
+    """{subzone_id: attribute rows per snapshot, oldest first} in one query.
 
+    Subzones with no rows map to []. Raises ValueError for an empty or oversized id list.
+    """
+    ids = list(dict.fromkeys(i.strip() for i in subzone_ids if i and i.strip()))
+    if not ids:
+        raise ValueError("Provide at least one subzone id")
+    if len(ids) > MAX_HISTORY_IDS:
+        raise ValueError(f"At most {MAX_HISTORY_IDS} subzones per request")
+    history: dict[str, list[dict[str, Any]]] = {i: [] for i in ids}
+    for row in subzone_repo.select_history(session, ids, last=last):
+        history[row.pop("subzone")].append(row)
+    return history
 
 
+def subzone_stats(
+    session: Session,
+    *,
+    planning_area: Optional[str] = None,
+    snapshot: Optional[str] = None,
+    areas: bool = False,
+) -> Optional[dict[str, Any]]:
+    """Precomputed rollup of a snapshot (or one planning area); with `areas`, every area's too.
 
+    Returns None when there is no such snapshot or planning area. Raises ValueError for
+    a malformed snapshot id.
+    """
+    if snapshot and snapshot != "current" and not _is_uuid(snapshot):
+        raise ValueError("Invalid snapshot id")
+    sid = _resolve_snapshot(session, snapshot)
+    if not sid:
+        return None
+    key = planning_area or rollup_service.ALL_AREAS
+    if areas:
+        rollups = rollup_repo.list_rollups(session, sid)
+    else:
+        one = rollup_repo.get_rollup(session, sid, key)
+        rollups = [one] if one else []
+    if not rollups:
+        # Snapshots ingested before rollups existed: compute from the rows, not stored
+        # here since this may be a read-only replica session
+        rows = list_subzones(session, snapshot=sid)
+        if not rows:
+            return None
+        rollups = rollup_service.compute_rollups(rows)
+    by_area = {r["planning_area"]: r for r in rollups}
+    selected = by_area.get(key)
+    if selected is None:
+        return None
+    result = {"snapshot_id": sid, **selected, "planning_area": planning_area or None}
+    if areas:
+        result["planning_areas"] = [r for r in rollups if r["planning_area"] != rollup_service.ALL_AREAS]
+    return result
 
 
+def rank_stability(
+    session: Session, *, snapshot: Optional[str] = None, subzone_ids: Optional[list[str]] = None,
+) -> Optional[dict[str, Any]]:
+    """Monte Carlo H_rank intervals of a snapshot's subzones, optionally only `subzone_ids`.
 
+    `samples` is the number of samples actually drawn (large snapshots are capped). When
+    none are stored yet, a background job computes them and {"snapshot_id", "status":
+    "pending", "job_id"} is returned instead. Returns None when there is no such snapshot
+    (or it cannot be sampled). Raises ValueError for a malformed snapshot id.
+    """
+    if snapshot and snapshot != "current" and not _is_uuid(snapshot):
+        raise ValueError("Invalid snapshot id")
+    sid = _resolve_snapshot(session, snapshot)
+    if not sid:
+        return None
+    result = rank_stability_repo.get_stability(session, sid)
+    if result is None:
+        # Not sampled yet (older or restored snapshots): queue it on the primary, never
+        # sample in the request
+        if snapshot_repo.get_snapshot(session, sid) is None:
+            return None
+        with get_session() as s:
+            job_id = snapshot_service.enqueue_rank_stability(s, sid)
+            if job_id is None:
+                result = rank_stability_repo.get_stability(s, sid)  # stored meanwhile?
+        if job_id is not None:
+            return {"snapshot_id": sid, "status": "pending", "job_id": job_id}
+        if result is None:
+            return None
+    intervals = result["intervals"]
+    if subzone_ids:
+        ids = dict.fromkeys(i.strip() for i in subzone_ids if i and i.strip())
+        intervals = {z: intervals[z] for z in ids if z in intervals}
+    params = result["params"]
+    return {"snapshot_id": sid, "samples": params["samples"], "params": params, "intervals": intervals}
 
 
+# Cap on subzones per /subzones/compare request
+MAX_COMPARE_IDS = 10
 
 
+def compare_subzones(
+    session: Session,
+    subzone_ids: list[str],
+    *,
+    geometry: bool = False,
+    tolerance: float = 0.0,
+    history: int = 0,
+) -> Optional[dict[str, Any]]:
+    """Attributes of a few subzones in the current snapshot, side by side.
 
+    Each entry has the subzone's attribute row, its percentile rank within the snapshot
+    per attribute and, on request, its (simplified) geometry and last `history`
+    snapshots, plus its Monte Carlo rank interval when one was stored at ingest.
+    Reads the memory-mapped snapshot store when available. Returns None
+    without a current snapshot; raises ValueError for an empty or oversized id list.
+    """
+    ids = list(dict.fromkeys(i.strip() for i in subzone_ids if i and i.strip()))
+    if not ids:
+        raise ValueError("Provide at least one subzone id")
+    if len(ids) > MAX_COMPARE_IDS:
+        raise ValueError(f"At most {MAX_COMPARE_IDS} subzones per request")
+    sid = _resolve_snapshot(session, None)
+    if not sid:
+        return None
 
+    found: dict[str, dict[str, Any]] = {}
+    geoms: dict[str, Any] = {}
+    store = _snapshot_store(session, sid)
+    if store is not None:
+        for zid in ids:
+            i = store.find(zid)
+            if i is not None:
+                found[zid] = store.row(i)
+                if geometry:
+                    geoms[zid] = store.feature(i).get("geometry")
+        distribution = store.distribution
+    else:
+        rows = subzone_repo.select_subzones(session, sid)
+        found = {r["subzone"]: r for r in rows if r["subzone"] in ids}
+        if geometry:
+            feats = subzone_repo.select_features_by_ids(session, sid, list(found))
+            geoms = {zid: f.get("geometry") for zid, f in feats.items()}
+        columns = {
+            m: sorted(r[m] for r in rows if r.get(m) is not None and r[m] == r[m]) for m in rollup_service.METRICS
+        }
+        distribution = columns.__getitem__
 
+    stability = rank_stability_repo.get_stability(session, sid) or {"intervals": {}}
+    entries = []
+    for zid in ids:
+        row = found.get(zid)
+        if row is None:
+            continue
+        entry: dict[str, Any] = {
+            "subzone": zid,
+            "attributes": row,
+            "percentiles": {m: rollup_service.percentile_rank(distribution(m), row.get(m)) for m in rollup_service.METRICS},
+            "rank_interval": stability["intervals"].get(zid),
+        }
+        if geometry:
+            entry["geometry"] = geometry_service.simplify_geometry(geoms.get(zid), tolerance)
+        entries.append(entry)
+    if history and entries:
+        trend = subzone_history(session, [e["subzone"] for e in entries], last=history)
+        for e in entries:
+            e["history"] = [{k: r[k] for k in ("snapshot_id", "created_at", "H_score", "H_rank")} for r in trend[e["subzone"]]]
+    return {"snapshot_id": sid, "subzones": entries, "missing": [z for z in ids if z not in found]}
 
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import os
+import threading
+import time
 from contextlib import contextmanager
 from typing import Iterator, TYPE_CHECKING, Any
 
@@ -8,7 +10,7 @@ from dotenv import load_dotenv
 
 # SQLAlchemy is added in requirements during DB phases.
 try:
-    from sqlalchemy import create_engine
+    from sqlalchemy import create_engine, text
     from sqlalchemy.orm import sessionmaker
 except Exception:  # pragma: no cover - during early phases before deps are installed
     create_engine = None  # type: ignore
@@ -23,6 +25,25 @@ else:
 _engine = None
 _SessionLocal = None
 
+# Optional read replica (DATABASE_READ_URL). Read-only routes use it while it serves the
+# same current snapshot as the primary; the comparison is cached for
+# READ_REPLICA_CHECK_SECONDS and redone right after this process publishes a snapshot.
+_read_engine = None
+_ReadSessionLocal = None
+_replica_lock = threading.Lock()
+_replica_in_sync = False
+_replica_checked_at = float("-inf")
+
+
+def _make_engine(url: str):
+    engine = create_engine(url, pool_pre_ping=True, future=True)
+    try:
+        from ..services.metrics_service import instrument_engine
+        instrument_engine(engine)
+    except ImportError:  # pragma: no cover - metrics are optional for scripts
+        pass
+    return engine
+
 
 def _ensure_engine():
     global _engine, _SessionLocal
@@ -34,10 +55,70 @@ def _ensure_engine():
         raise RuntimeError("DATABASE_URL not set in environment (.env)")
     if create_engine is None or sessionmaker is None:
         raise RuntimeError("SQLAlchemy is not installed. Add it to requirements and install.")
-    _engine = create_engine(database_url, pool_pre_ping=True, future=True)
+    _engine = _make_engine(database_url)
     _SessionLocal = sessionmaker(bind=_engine, autoflush=False, autocommit=False, future=True)
 
 
+def _ensure_read_engine() -> bool:
+    """Create the replica engine on first use. False when DATABASE_READ_URL is not set."""
+    global _read_engine, _ReadSessionLocal
+    _ensure_engine()
+    if _read_engine is not None:
+        return True
+    read_url = os.getenv("DATABASE_READ_URL")
+    if not read_url:
+        return False
+    with _replica_lock:
+        if _read_engine is None:
+            engine = _make_engine(read_url)
+            _ReadSessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+            _read_engine = engine
+    return True
+
+
+def _current_snapshot_id(engine) -> Any:
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT id FROM snapshots WHERE is_current")).scalar()
+
+
+def replica_in_sync() -> bool:
+    """True when the replica's current snapshot matches the primary's.
+
+    A replica that cannot be reached counts as lagging. Transitions are logged.
+    """
+    global _replica_in_sync, _replica_checked_at
+    ttl = float(os.getenv("READ_REPLICA_CHECK_SECONDS", "5"))
+    if time.monotonic() - _replica_checked_at < ttl:
+        return _replica_in_sync
+    with _replica_lock:
+        if time.monotonic() - _replica_checked_at < ttl:
+            return _replica_in_sync
+        error = None
+        try:
+            replica, primary = _current_snapshot_id(_read_engine), _current_snapshot_id(_engine)
+            in_sync = replica == primary
+        except Exception as e:  # noqa: BLE001 - any replica failure falls back to the primary
+            replica = primary = None
+            in_sync, error = False, f"{type(e).__name__}: {e}"
+        if in_sync != _replica_in_sync:
+            from ..services.log_service import get_logger
+
+            log = get_logger("db")
+            extra = {"replica_snapshot": replica, "primary_snapshot": primary, "error": error}
+            if in_sync:
+                log.info("replica.in_sync", extra=extra)
+            else:
+                log.warning("replica.lagging", extra=extra)
+        _replica_in_sync, _replica_checked_at = in_sync, time.monotonic()
+    return _replica_in_sync
+
+
+def invalidate_replica_check() -> None:
+    """Re-check the replica on the next read (call after changing the current snapshot)."""
+    global _replica_checked_at
+    _replica_checked_at = float("-inf")
+
+
 @contextmanager
 def get_session() -> Iterator["Session"]:
     """Provide a transactional session scope.
@@ -59,3 +140,29 @@ def get_session() -> Iterator["Session"]:
         session.close()
 
 
+@contextmanager
+def get_read_session() -> Iterator["Session"]:
+    """Provide a read-only session scope.
+
+    Uses the DATABASE_READ_URL replica when it is configured and in sync with the
+    primary, the primary otherwise. Nothing is committed: the transaction is rolled
+    back when the scope exits.
+    """
+    if _ensure_read_engine() and replica_in_sync():
+        factory = _ReadSessionLocal
+    else:
+        factory = _SessionLocal
+    assert factory is not None
+    session = factory()  # type: ignore[call-arg]
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@contextmanager
+def autocommit_connection() -> Iterator[Any]:
+    """A primary connection in autocommit mode, for session-level locks held across transactions."""
+    _ensure_engine()
+    with _engine.connect() as conn:
+        yield conn.execution_options(isolation_level="AUTOCOMMIT")
@@ -1,6 +1,6 @@
 from pathlib import Path
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse, RedirectResponse
+from fastapi.responses import FileResponse, RedirectResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
@@ -10,7 +10,11 @@ DATA_DIR = BASE_DIR / "data"
 OUT_PATH = DATA_DIR / "out" / "hawker_opportunities_ver2.geojson"
 
 load_dotenv()
-app = FastAPI(title="Hawker Opportunity API")
+from .services import json_service  # noqa: E402
+app = FastAPI(title="Hawker Opportunity API", default_response_class=json_service.FastJSONResponse)
+
+from .services import metrics_service  # noqa: E402
+app.add_middleware(metrics_service.MetricsMiddleware)
 
 # CORS (dev): allow Vite default ports explicitly
 app.add_middleware(
@@ -41,6 +45,39 @@ def root():
 def healthz():
     return {"ok": True}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = metrics_service.render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@app.on_event("startup")
+def start_background_jobs():
+    # Token purge, plus snapshot archival when SNAPSHOT_RETENTION_ENABLED=1 (SNAPSHOT_RETENTION_INTERVAL=0 disables)
+    from .services import retention_service
+    retention_service.start_retention_worker()
+    # Email outbox delivery (EMAIL_OUTBOX_WORKER=0 disables)
+    from .services import email_outbox_service
+    email_outbox_service.start_outbox_worker()
+    # Google signing keys for /auth/google (only when GOOGLE_CLIENT_ID is set)
+    from .services import google_auth_service
+    google_auth_service.start_key_refresher()
+    # Snapshot refresh / pipeline recompute jobs (JOB_RUNNER=0 disables)
+    from .services import job_service
+    job_service.start_job_runner()
+
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    from .services import retention_service
+    retention_service.stop_retention_worker()
+    from .services import email_outbox_service
+    email_outbox_service.stop_outbox_worker()
+    from .services import google_auth_service
+    google_auth_service.stop_key_refresher()
+    from .services import job_service
+    job_service.stop_job_runner()
+
 # Routers
 from .routers.api_router import api_router  # noqa: E402
 app.include_router(api_router)
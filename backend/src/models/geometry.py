@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, JSON, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class Geometry(Base):
+    """Content-addressed subzone geometry, stored once and shared by all snapshots."""
+
+    __tablename__ = "geometries"
+
+    # sha256 of the canonical GeoJSON (see geometry_service.geometry_hash)
+    hash: Mapped[str] = mapped_column(Text, primary_key=True)
+    geom_geojson: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
@@ -21,6 +21,11 @@ class Snapshot(Base):
     note: Mapped[Optional[str]] = mapped_column(Text)
     is_current: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
 
+    # Retention: tagged snapshots are never archived; archived ones have no subzone rows
+    tag: Mapped[Optional[str]] = mapped_column(Text)
+    archived_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    archive_path: Mapped[Optional[str]] = mapped_column(Text)
+
     # Optional metadata blobs
     config_json: Mapped[Optional[dict]] = mapped_column("config_json", JSON)
     source_meta_json: Mapped[Optional[dict]] = mapped_column("source_meta_json", JSON)
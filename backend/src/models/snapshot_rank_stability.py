@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from sqlalchemy import Integer, JSON
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class SnapshotRankStability(Base):
+    """Monte Carlo H_rank intervals of one snapshot's subzones.
+
+    Computed once at ingest by rank_stability_service; `intervals` maps each subzone id
+    to {"lo", "median", "hi"} and `params` records how they were sampled.
+    """
+
+    __tablename__ = "snapshot_rank_stability"
+
+    snapshot_id: Mapped[str] = mapped_column(UUID(as_uuid=False), primary_key=True)
+    samples: Mapped[int] = mapped_column(Integer, nullable=False)
+    params: Mapped[dict] = mapped_column(JSON, nullable=False)
+    intervals: Mapped[dict] = mapped_column(JSON, nullable=False)
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from sqlalchemy import Integer, JSON, PrimaryKeyConstraint, Text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class SnapshotRollup(Base):
+    """Aggregates of one snapshot, overall (planning_area '') and per planning area.
+
+    Computed once at ingest by rollup_service; see there for the layout of `stats`.
+    """
+
+    __tablename__ = "snapshot_rollups"
+
+    snapshot_id: Mapped[str] = mapped_column(UUID(as_uuid=False), nullable=False)
+    planning_area: Mapped[str] = mapped_column(Text, nullable=False)
+    subzones: Mapped[int] = mapped_column(Integer, nullable=False)
+    stats: Mapped[dict] = mapped_column(JSON, nullable=False)
+    rank_bands: Mapped[dict] = mapped_column(JSON, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("snapshot_id", "planning_area"),
+    )
@@ -31,7 +31,9 @@ class Subzone(Base):
     Sup: Mapped[Optional[float]] = mapped_column("Sup")
     Acc: Mapped[Optional[float]] = mapped_column("Acc")
 
-    geom_geojson: Mapped[Optional[dict]] = mapped_column(JSON)
+    # Content hash into `geometries`; geom_geojson only holds legacy inline copies
+    geom_hash: Mapped[Optional[str]] = mapped_column(String)
+    geom_geojson: Mapped[Optional[dict]] = mapped_column(JSON(none_as_null=True))
 
     __table_args__ = (
         PrimaryKeyConstraint("snapshot_id", "subzone_id"),
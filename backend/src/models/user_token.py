@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import CheckConstraint, DateTime, Index, String, Text, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class UserToken(Base):
+    """Single-use email verification / password reset token; only its sha256 is stored."""
+
+    __tablename__ = "user_tokens"
+
+    id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False), primary_key=True, server_default=text("gen_random_uuid()")  # type: ignore[name-defined]
+    )
+    user_id: Mapped[str] = mapped_column(UUID(as_uuid=False), nullable=False)
+    purpose: Mapped[str] = mapped_column(String(16), nullable=False)
+    token_hash: Mapped[str] = mapped_column(Text, unique=True, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        CheckConstraint("purpose IN ('verify_email','password_reset')", name="user_tokens_purpose_check"),
+        Index("user_tokens_user_purpose_idx", "user_id", "purpose"),
+        Index("user_tokens_expires_at_idx", "expires_at"),
+    )
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from ..models.email_outbox import EmailOutbox
+
+
+def enqueue(
+    session: Session,
+    *,
+    kind: str,
+    to_addr: str,
+    subject: str,
+    body_text: str,
+    body_html: Optional[str] = None,
+) -> str:
+    row = EmailOutbox(
+        kind=kind,
+        to_addr=to_addr,
+        subject=subject,
+        body_text=body_text,
+        body_html=body_html,
+        status="pending",
+        attempts=0,
+    )
+    session.add(row)
+    session.flush()
+    return row.id
+
+
+def claim_due(session: Session, *, now: datetime, limit: int, lease_until: datetime) -> list[dict[str, Any]]:
+    """Mark up to `limit` due rows as `sending` until `lease_until` and return their contents.
+
+    Due rows are pending ones whose retry time has come and `sending` ones whose lease
+    ran out (their worker died mid-send). Rows locked by another worker are skipped; the
+    caller commits before sending so no lock is held while talking to SMTP.
+    """
+    q = (
+        select(EmailOutbox)
+        .where(EmailOutbox.status.in_(("pending", "sending")))
+        .where(EmailOutbox.next_attempt_at <= now)
+        .order_by(EmailOutbox.next_attempt_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    claimed = []
+    for row in session.execute(q).scalars():
+        row.status = "sending"
+        row.attempts += 1
+        row.next_attempt_at = lease_until
+        claimed.append({
+            "id": row.id,
+            "kind": row.kind,
+            "to_addr": row.to_addr,
+            "subject": row.subject,
+            "body_text": row.body_text,
+            "body_html": row.body_html,
+            "attempts": row.attempts,
+        })
+    session.flush()
+    return claimed
+
+
+def _sending(row_id: str):
+    return update(EmailOutbox).where(EmailOutbox.id == row_id).where(EmailOutbox.status == "sending")
+
+
+def mark_sent(session: Session, row_id: str, *, now: datetime) -> None:
+    session.execute(_sending(row_id).values(status="sent", sent_at=now, last_error=None))
+
+
+def mark_retry(session: Session, row_id: str, *, error: str, next_attempt_at: datetime) -> None:
+    session.execute(_sending(row_id).values(status="pending", last_error=error, next_attempt_at=next_attempt_at))
+
+
+def mark_failed(session: Session, row_id: str, *, error: str) -> None:
+    session.execute(_sending(row_id).values(status="failed", last_error=error))
+
+
+def release(session: Session, row_ids: list[str], *, now: datetime) -> None:
+    """Return claimed rows that were never attempted to `pending`, without counting an attempt."""
+    if not row_ids:
+        return
+    session.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(row_ids))
+        .where(EmailOutbox.status == "sending")
+        .values(status="pending", attempts=EmailOutbox.attempts - 1, next_attempt_at=now)
+    )
+
+
+def purge_sent(session: Session, *, before: datetime) -> int:
+    res = session.execute(
+        delete(EmailOutbox).where(EmailOutbox.status == "sent").where(EmailOutbox.sent_at < before)
+    )
+    return int(res.rowcount or 0)
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from ..models.geometry import Geometry
+
+
+def existing_hashes(session: Session, hashes: list[str]) -> set[str]:
+    if not hashes:
+        return set()
+    rows = session.execute(select(Geometry.hash).where(Geometry.hash.in_(hashes)))
+    return {r[0] for r in rows}
+
+
+def insert_missing(session: Session, geoms: dict[str, dict[str, Any]]) -> int:
+    """Insert geometries whose hash is not stored yet. Returns the number of new rows.
+
+    Known hashes are filtered out first so unchanged polygons never travel to the DB;
+    ON CONFLICT DO NOTHING covers concurrent ingests racing on the same geometry.
+    """
+    known = existing_hashes(session, list(geoms))
+    rows = [{"hash": h, "geom_geojson": g} for h, g in geoms.items() if h not in known]
+    if not rows:
+        return 0
+    session.execute(pg_insert(Geometry).values(rows).on_conflict_do_nothing(index_elements=["hash"]))
+    session.flush()
+    return len(rows)
+
+
+def populate_postgis(session: Session) -> int:
+    """Fill the PostGIS `geom` column for geometries that do not have it yet."""
+    res = session.execute(text(
+        "UPDATE geometries"
+        " SET geom = ST_MakeValid(ST_SetSRID(ST_Force2D(ST_GeomFromGeoJSON(geom_geojson::text)), 4326))"
+        " WHERE geom IS NULL"
+    ))
+    return int(res.rowcount or 0)
+
+
+def delete_orphans(session: Session, batch_size: int) -> int:
+    """Delete up to batch_size geometries no subzone row references any more."""
+    res = session.execute(
+        text(
+            "DELETE FROM geometries WHERE hash IN ("
+            " SELECT g.hash FROM geometries g"
+            " WHERE NOT EXISTS (SELECT 1 FROM subzones s WHERE s.geom_hash = g.hash)"
+            " LIMIT :n)"
+        ),
+        {"n": batch_size},
+    )
+    return int(res.rowcount or 0)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from ..models.job import Job
+
+
+def create_job(session: Session, *, kind: str, params: Optional[dict[str, Any]] = None,
+               created_by: Optional[str] = None) -> Job:
+    job = Job(kind=kind, status="queued", params=params or {}, progress=0.0, created_by=created_by)
+    session.add(job)
+    session.flush()
+    return job
+
+
+def get_job(session: Session, job_id: str) -> Optional[Job]:
+    return session.get(Job, job_id)
+
+
+def list_jobs(session: Session, *, limit: int = 50, offset: int = 0) -> list[Job]:
+    q = select(Job).order_by(Job.created_at.desc()).limit(limit).offset(offset)
+    return list(session.execute(q).scalars())
+
+
+def find_active(session: Session, *, kind: str, params: dict[str, Any]) -> Optional[Job]:
+    """The oldest queued or running job of `kind` whose params include all of `params`."""
+    q = select(Job).where(Job.kind == kind).where(Job.status.in_(("queued", "running"))).order_by(Job.created_at)
+    for job in session.execute(q).scalars():
+        if all((job.params or {}).get(k) == v for k, v in params.items()):
+            return job
+    return None
+
+
+def claim_next(session: Session, *, now: datetime) -> Optional[Job]:
+    """Mark the oldest queued job running; jobs locked by another runner are skipped."""
+    q = (
+        select(Job)
+        .where(Job.status == "queued")
+        .order_by(Job.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    job = session.execute(q).scalars().first()
+    if job:
+        job.status = "running"
+        job.started_at = now
+        job.heartbeat_at = now
+        job.stage = "starting"
+        session.flush()
+    return job
+
+
+def update_progress(session: Session, job_id: str, *, progress: float, stage: str, now: datetime) -> None:
+    session.execute(
+        update(Job)
+        .where(Job.id == job_id)
+        .where(Job.status == "running")
+        .values(progress=progress, stage=stage, heartbeat_at=now)
+    )
+
+
+def heartbeat(session: Session, job_ids: list[str], *, now: datetime) -> None:
+    if job_ids:
+        session.execute(update(Job).where(Job.id.in_(job_ids)).where(Job.status == "running").values(heartbeat_at=now))
+
+
+def finish(session: Session, job_id: str, *, result: Optional[dict[str, Any]], now: datetime) -> None:
+    session.execute(
+        update(Job).where(Job.id == job_id)
+        .values(status="succeeded", progress=1.0, stage="done", result=result, finished_at=now, heartbeat_at=now)
+    )
+
+
+def fail(session: Session, job_id: str, *, error: str, now: datetime) -> None:
+    session.execute(
+        update(Job).where(Job.id == job_id)
+        .values(status="failed", error=error, finished_at=now, heartbeat_at=now)
+    )
+
+
+def fail_stale(session: Session, *, before: datetime, now: datetime) -> int:
+    """Fail running jobs whose runner stopped heartbeating (process crash or restart)."""
+    res = session.execute(
+        update(Job)
+        .where(Job.status == "running")
+        .where(Job.heartbeat_at < before)
+        .values(status="failed", error="Job runner stopped before the job finished", finished_at=now)
+    )
+    return int(res.rowcount or 0)
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from ..models.snapshot_rank_stability import SnapshotRankStability
+
+
+def replace_stability(session: Session, snapshot_id: str, result: Optional[dict[str, Any]]) -> int:
+    """Store a snapshot's rank intervals, replacing any earlier ones. Returns subzones stored."""
+    session.execute(delete(SnapshotRankStability).where(SnapshotRankStability.snapshot_id == snapshot_id))
+    if not result:
+        return 0
+    session.execute(insert(SnapshotRankStability), [{
+        "snapshot_id": snapshot_id,
+        "samples": result["params"]["samples"],
+        "params": result["params"],
+        "intervals": result["intervals"],
+    }])
+    session.flush()
+    return len(result["intervals"])
+
+
+def get_stability(session: Session, snapshot_id: str) -> Optional[dict[str, Any]]:
+    row = session.get(SnapshotRankStability, snapshot_id)
+    if row is None:
+        return None
+    return {"params": row.params, "intervals": row.intervals}
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from ..models.snapshot_rollup import SnapshotRollup
+
+
+def replace_rollups(session: Session, snapshot_id: str, rollups: list[dict[str, Any]]) -> int:
+    """Store a snapshot's rollups, replacing any earlier ones (e.g. on restore from archive)."""
+    session.execute(delete(SnapshotRollup).where(SnapshotRollup.snapshot_id == snapshot_id))
+    if not rollups:
+        return 0
+    session.execute(insert(SnapshotRollup), [{"snapshot_id": snapshot_id, **r} for r in rollups])
+    session.flush()
+    return len(rollups)
+
+
+def get_rollup(session: Session, snapshot_id: str, planning_area: str) -> Optional[dict[str, Any]]:
+    row = session.get(SnapshotRollup, (snapshot_id, planning_area))
+    return _to_dict(row) if row is not None else None
+
+
+def list_rollups(session: Session, snapshot_id: str) -> list[dict[str, Any]]:
+    q = select(SnapshotRollup).where(SnapshotRollup.snapshot_id == snapshot_id).order_by(SnapshotRollup.planning_area)
+    return [_to_dict(r) for r in session.execute(q).scalars()]
+
+
+def _to_dict(r: SnapshotRollup) -> dict[str, Any]:
+    return {"planning_area": r.planning_area, "subzones": r.subzones, "stats": r.stats, "rank_bands": r.rank_bands}
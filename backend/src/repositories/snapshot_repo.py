@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+from datetime import datetime, timezone
 from typing import Iterable, Optional
 
 from sqlalchemy import update, select
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, defer
 
 from ..models.snapshot import Snapshot
 
@@ -28,8 +29,54 @@ def get_current_snapshot_id(session: Session) -> Optional[str]:
     return row[0] if row else None
 
 
-def list_snapshots(session: Session) -> list[Snapshot]:
-    return list(session.execute(select(Snapshot).order_by(Snapshot.created_at.desc())).scalars())
+def get_snapshot(session: Session, snapshot_id: str) -> Optional[Snapshot]:
+    return session.get(Snapshot, snapshot_id)
+
+
+def lock_snapshot(session: Session, snapshot_id: str) -> Optional[Snapshot]:
+    """The snapshot row, re-read and locked FOR UPDATE until the transaction ends."""
+    q = select(Snapshot).where(Snapshot.id == snapshot_id).with_for_update().execution_options(populate_existing=True)
+    return session.execute(q).scalars().first()
+
+
+def list_snapshots(session: Session, *, limit: Optional[int] = None, offset: int = 0) -> list[Snapshot]:
+    # Metadata blobs are not needed for listings
+    q = (
+        select(Snapshot)
+        .options(defer(Snapshot.config_json), defer(Snapshot.source_meta_json))
+        .order_by(Snapshot.created_at.desc())
+        .offset(offset)
+    )
+    if limit is not None:
+        q = q.limit(limit)
+    return list(session.execute(q).scalars())
+
+
+def list_live_snapshots(session: Session) -> list[tuple[str, bool, Optional[str]]]:
+    """(id, is_current, tag) of non-archived snapshots, newest first."""
+    q = (
+        select(Snapshot.id, Snapshot.is_current, Snapshot.tag)
+        .where(Snapshot.archived_at.is_(None))
+        .order_by(Snapshot.created_at.desc())
+    )
+    return [(r[0], bool(r[1]), r[2]) for r in session.execute(q)]
+
+
+def set_tag(session: Session, snapshot_id: str, tag: Optional[str]) -> int:
+    res = session.execute(update(Snapshot).values(tag=tag or None).where(Snapshot.id == snapshot_id))
+    return int(res.rowcount or 0)
+
+
+def mark_archived(session: Session, snapshot_id: str, archive_path: str) -> None:
+    session.execute(
+        update(Snapshot)
+        .values(archived_at=datetime.now(timezone.utc), archive_path=archive_path)
+        .where(Snapshot.id == snapshot_id)
+    )
+
+
+def clear_archived(session: Session, snapshot_id: str) -> None:
+    session.execute(update(Snapshot).values(archived_at=None).where(Snapshot.id == snapshot_id))
 
 
 def restore_snapshot(session: Session, snapshot_id: str) -> None:
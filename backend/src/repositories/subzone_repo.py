@@ -1,20 +1,55 @@
 from __future__ import annotations
 
+import os
 from typing import Any, Iterable, Optional
 
-from sqlalchemy import insert, select
+from sqlalchemy import insert, select, text, update
 from sqlalchemy.orm import Session
 
+from ..models.geometry import Geometry
+from ..models.snapshot import Snapshot
 from ..models.subzone import Subzone
 
+# Cached result of the PostGIS probe (None = not probed yet)
+_postgis_available: Optional[bool] = None
 
-def insert_many(session: Session, snapshot_id: str, features: Iterable[dict[str, Any]]) -> int:
+
+def has_postgis(session: Session) -> bool:
+    """Return True when PostGIS is installed and `geometries.geom` exists.
+
+    The probe runs once per process. Set POSTGIS_ENABLED=0 to force the JSONB fallback.
+    """
+    global _postgis_available
+    if os.getenv("POSTGIS_ENABLED", "1").lower() in ("0", "false", "no"):
+        return False
+    if _postgis_available is None:
+        try:
+            row = session.execute(text(
+                "SELECT to_regproc('st_geomfromgeojson') IS NOT NULL AND EXISTS ("
+                " SELECT 1 FROM information_schema.columns"
+                " WHERE table_name = 'geometries' AND column_name = 'geom')"
+            )).first()
+            _postgis_available = bool(row and row[0])
+        except Exception:
+            _postgis_available = False
+    return _postgis_available
+
+
+def insert_many(
+    session: Session,
+    snapshot_id: str,
+    features: Iterable[dict[str, Any]],
+    *,
+    geom_hashes: Optional[list[Optional[str]]] = None,
+) -> int:
     """Insert many subzone features for a snapshot.
 
     Each feature is expected to look like a GeoJSON Feature with `properties` and `geometry`.
+    When `geom_hashes` (aligned with `features`) is given, rows reference the shared
+    `geometries` table by hash instead of storing an inline copy of the polygon.
     """
     rows: list[dict[str, Any]] = []
-    for feat in features:
+    for i, feat in enumerate(features):
         props = (feat.get("properties") or {})
         geom = feat.get("geometry")
         row = {
@@ -34,7 +69,11 @@ def insert_many(session: Session, snapshot_id: str, features: Iterable[dict[str,
             "Sup": _float_or_none(props.get("Sup")),
             "Acc": _float_or_none(props.get("Acc")),
             "geom_geojson": geom,
+            "geom_hash": None,
         }
+        if geom_hashes is not None and geom_hashes[i]:
+            row["geom_hash"] = geom_hashes[i]
+            row["geom_geojson"] = None
         if not row["subzone_id"]:
             continue  # skip rows without identifier
         rows.append(row)
@@ -45,35 +84,163 @@ def insert_many(session: Session, snapshot_id: str, features: Iterable[dict[str,
     return len(rows)
 
 
+def _with_geometry(q):
+    # Shared geometry by hash; legacy rows still carry an inline copy in geom_geojson
+    return q.add_columns(Geometry.geom_geojson).outerjoin(Geometry, Geometry.hash == Subzone.geom_hash)
+
+
+def _feature(sz: Subzone, geom: Optional[dict[str, Any]] = None) -> dict[str, Any]:
+    props = {
+        "SUBZONE_N": sz.subzone_id,
+        "PLN_AREA_N": sz.planning_area,
+        "population": sz.population,
+        "pop_0_25": sz.pop_0_25,
+        "pop_25_65": sz.pop_25_65,
+        "pop_65plus": sz.pop_65plus,
+        "hawker": sz.hawker,
+        "mrt": sz.mrt,
+        "bus": sz.bus,
+        "H_score": sz.h_score,
+        "H_rank": sz.h_rank,
+        "Dem": sz.Dem,
+        "Sup": sz.Sup,
+        "Acc": sz.Acc,
+    }
+    return {
+        "type": "Feature",
+        "properties": props,
+        "geometry": geom if geom is not None else sz.geom_geojson,
+    }
+
+
 def select_features_fc(session: Session, snapshot_id: str) -> dict[str, Any]:
     """Return a GeoJSON FeatureCollection for the snapshot."""
-    q = select(Subzone).where(Subzone.snapshot_id == snapshot_id)
-    feats = []
-    for sz in session.execute(q).scalars():
-        props = {
-            "SUBZONE_N": sz.subzone_id,
-            "PLN_AREA_N": sz.planning_area,
-            "population": sz.population,
-            "pop_0_25": sz.pop_0_25,
-            "pop_25_65": sz.pop_25_65,
-            "pop_65plus": sz.pop_65plus,
-            "hawker": sz.hawker,
-            "mrt": sz.mrt,
-            "bus": sz.bus,
-            "H_score": sz.h_score,
-            "H_rank": sz.h_rank,
-            "Dem": sz.Dem,
-            "Sup": sz.Sup,
-            "Acc": sz.Acc,
-        }
-        feats.append({
-            "type": "Feature",
-            "properties": props,
-            "geometry": sz.geom_geojson,
-        })
+    q = _with_geometry(select(Subzone)).where(Subzone.snapshot_id == snapshot_id)
+    feats = [_feature(sz, geom) for sz, geom in session.execute(q)]
     return {"type": "FeatureCollection", "features": feats}
 
 
+def select_features_in_bbox(
+    session: Session,
+    snapshot_id: str,
+    bbox: tuple[float, float, float, float],
+) -> dict[str, Any]:
+    """Return features intersecting a WGS84 bbox using the GiST index. Requires PostGIS."""
+    q = (
+        _with_geometry(select(Subzone))
+        .where(Subzone.snapshot_id == snapshot_id)
+        .where(text("ST_Intersects(geometries.geom, ST_MakeEnvelope(:minx, :miny, :maxx, :maxy, 4326))"))
+        .params(minx=bbox[0], miny=bbox[1], maxx=bbox[2], maxy=bbox[3])
+    )
+    feats = [_feature(sz, geom) for sz, geom in session.execute(q)]
+    return {"type": "FeatureCollection", "features": feats}
+
+
+def select_feature_at_point(session: Session, snapshot_id: str, lon: float, lat: float) -> Optional[dict[str, Any]]:
+    """Return the subzone feature covering a WGS84 point. Requires PostGIS."""
+    q = (
+        _with_geometry(select(Subzone))
+        .where(Subzone.snapshot_id == snapshot_id)
+        .where(text("ST_Covers(geometries.geom, ST_SetSRID(ST_MakePoint(:lon, :lat), 4326))"))
+        .params(lon=lon, lat=lat)
+        .limit(1)
+    )
+    row = session.execute(q).first()
+    return _feature(row[0], row[1]) if row else None
+
+
+def select_features_by_ids(session: Session, snapshot_id: str, subzone_ids: Iterable[str]) -> dict[str, dict[str, Any]]:
+    """Return {subzone_id: Feature} for the given ids within a snapshot."""
+    ids = list(subzone_ids)
+    if not ids:
+        return {}
+    q = _with_geometry(select(Subzone)).where(Subzone.snapshot_id == snapshot_id).where(Subzone.subzone_id.in_(ids))
+    return {sz.subzone_id: _feature(sz, geom) for sz, geom in session.execute(q)}
+
+
+def select_attribute_rows(session: Session, snapshot_id: str) -> list[dict[str, Any]]:
+    """Attribute-only rows for a snapshot plus the geometry content hash.
+
+    Legacy rows without `geom_hash` have `geom_hash` None and carry their inline geometry
+    as `legacy_geometry` so the caller can hash it like ingest does; other rows carry no
+    geometry payload.
+    """
+    q = select(
+        Subzone.subzone_id,
+        Subzone.planning_area,
+        Subzone.population,
+        Subzone.pop_0_25,
+        Subzone.pop_25_65,
+        Subzone.pop_65plus,
+        Subzone.hawker,
+        Subzone.mrt,
+        Subzone.bus,
+        Subzone.h_score,
+        Subzone.h_rank,
+        Subzone.Dem,
+        Subzone.Sup,
+        Subzone.Acc,
+        Subzone.geom_hash,
+        Subzone.geom_geojson,
+    ).where(Subzone.snapshot_id == snapshot_id)
+    return [
+        {
+            "subzone": r.subzone_id,
+            "planning_area": r.planning_area,
+            "population": r.population,
+            "pop_0_25": r.pop_0_25,
+            "pop_25_65": r.pop_25_65,
+            "pop_65plus": r.pop_65plus,
+            "hawker": r.hawker,
+            "mrt": r.mrt,
+            "bus": r.bus,
+            "H_score": r.h_score,
+            "H_rank": r.h_rank,
+            "Dem": r.Dem,
+            "Sup": r.Sup,
+            "Acc": r.Acc,
+            "geom_hash": r.geom_hash,
+            "legacy_geometry": None if r.geom_hash else r.geom_geojson,
+        }
+        for r in session.execute(q)
+    ]
+
+
+def select_legacy_geometries(session: Session, limit: int) -> list[tuple[str, str, dict[str, Any]]]:
+    """Rows still holding an inline geometry copy: (snapshot_id, subzone_id, geometry)."""
+    q = (
+        select(Subzone.snapshot_id, Subzone.subzone_id, Subzone.geom_geojson)
+        .where(Subzone.geom_hash.is_(None))
+        .where(Subzone.geom_geojson.is_not(None))
+        .limit(limit)
+    )
+    return [(r[0], r[1], r[2]) for r in session.execute(q)]
+
+
+def set_geom_hashes(session: Session, rows: list[tuple[str, str, str]]) -> int:
+    """Point rows at shared geometries and drop their inline copy. rows: (snapshot_id, subzone_id, hash)."""
+    if not rows:
+        return 0
+    # ORM bulk UPDATE by primary key
+    session.execute(
+        update(Subzone),
+        [{"snapshot_id": s, "subzone_id": z, "geom_hash": h, "geom_geojson": None} for s, z, h in rows],
+    )
+    return len(rows)
+
+
+def delete_batch(session: Session, snapshot_id: str, batch_size: int) -> int:
+    """Delete up to batch_size subzone rows of a snapshot. Returns rows deleted."""
+    res = session.execute(
+        text(
+            "DELETE FROM subzones WHERE snapshot_id = :sid AND subzone_id IN ("
+            " SELECT subzone_id FROM subzones WHERE snapshot_id = :sid LIMIT :n)"
+        ),
+        {"sid": snapshot_id, "n": batch_size},
+    )
+    return int(res.rowcount or 0)
+
+
 def select_subzones(
     session: Session,
     snapshot_id: str,
@@ -107,6 +274,67 @@ def select_subzones(
     return result
 
 
+def select_history(
+    session: Session,
+    subzone_ids: Iterable[str],
+    *,
+    last: Optional[int] = None,
+) -> list[dict[str, Any]]:
+    """Attribute rows of the given subzones in every live snapshot, oldest first (no geometry).
+
+    Uses the (subzone_id, snapshot_id) index. `last` keeps only the newest N snapshots;
+    archived snapshots have no rows and are skipped.
+    """
+    ids = list(subzone_ids)
+    if not ids:
+        return []
+    q = (
+        select(
+            Subzone.subzone_id,
+            Subzone.snapshot_id,
+            Snapshot.created_at,
+            Snapshot.is_current,
+            Snapshot.tag,
+            Subzone.planning_area,
+            Subzone.population,
+            Subzone.hawker,
+            Subzone.mrt,
+            Subzone.bus,
+            Subzone.h_score,
+            Subzone.h_rank,
+            Subzone.Dem,
+            Subzone.Sup,
+            Subzone.Acc,
+        )
+        .join(Snapshot, Snapshot.id == Subzone.snapshot_id)
+        .where(Subzone.subzone_id.in_(ids))
+        .order_by(Subzone.subzone_id, Snapshot.created_at)
+    )
+    if last:
+        newest = select(Snapshot.id).where(Snapshot.archived_at.is_(None)).order_by(Snapshot.created_at.desc()).limit(last)
+        q = q.where(Subzone.snapshot_id.in_(newest.scalar_subquery()))
+    return [
+        {
+            "subzone": r.subzone_id,
+            "snapshot_id": r.snapshot_id,
+            "created_at": r.created_at.isoformat() if r.created_at else None,
+            "is_current": bool(r.is_current),
+            "tag": r.tag,
+            "planning_area": r.planning_area,
+            "population": r.population,
+            "hawker": r.hawker,
+            "mrt": r.mrt,
+            "bus": r.bus,
+            "H_score": r.h_score,
+            "H_rank": r.h_rank,
+            "Dem": r.Dem,
+            "Sup": r.Sup,
+            "Acc": r.Acc,
+        }
+        for r in session.execute(q)
+    ]
+
+
 def _int_or_none(v: Any) -> Optional[int]:
     try:
         n = int(v)
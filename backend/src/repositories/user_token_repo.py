@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import secrets
+from datetime import datetime, timedelta
+from hashlib import sha256
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from ..models.user_token import UserToken
+
+
+def hash_token(token: str) -> str:
+    return sha256(token.encode("utf-8")).hexdigest()
+
+
+def issue(session: Session, *, user_id: str, purpose: str, now: datetime, ttl: timedelta) -> str:
+    """Create a token for the user, replacing any outstanding one for the same purpose.
+
+    Returns the raw token; only its hash is stored.
+    """
+    session.execute(delete(UserToken).where(UserToken.user_id == user_id).where(UserToken.purpose == purpose))
+    token = secrets.token_urlsafe(48)
+    session.add(UserToken(user_id=user_id, purpose=purpose, token_hash=hash_token(token), expires_at=now + ttl))
+    session.flush()
+    return token
+
+
+def get_for_update(session: Session, *, token: str, purpose: str) -> Optional[UserToken]:
+    """Look up a token through the unique token_hash index, locking the row until commit."""
+    q = (
+        select(UserToken)
+        .where(UserToken.token_hash == hash_token(token))
+        .where(UserToken.purpose == purpose)
+        .with_for_update()
+    )
+    return session.execute(q).scalars().first()
+
+
+def consume(session: Session, row: UserToken) -> None:
+    """Tokens are single use: drop this one and any sibling issued for the same purpose."""
+    session.execute(delete(UserToken).where(UserToken.user_id == row.user_id).where(UserToken.purpose == row.purpose))
+
+
+def delete_expired(session: Session, *, now: datetime, batch_size: int) -> int:
+    """Delete up to batch_size expired tokens (walks user_tokens_expires_at_idx)."""
+    ids = select(UserToken.id).where(UserToken.expires_at < now).limit(batch_size).scalar_subquery()
+    res = session.execute(
+        delete(UserToken).where(UserToken.id.in_(ids)).execution_options(synchronize_session=False)
+    )
+    return int(res.rowcount or 0)
@@ -1,40 +1,116 @@
 from __future__ import annotations
 
-from typing import Any, Optional
+from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from ..controllers import admin_controller
+from ..schemas.geojson_schemas import RefreshRequest
+from ..services import json_service
 from .deps import db_session, require_admin
 
 router = APIRouter()
 
-class RefreshBody(BaseModel):
-    note: Optional[str] = None
-    created_by: Optional[str] = None
-    geojson: Optional[dict[str, Any]] = None
 
+async def _raw_body(request: Request) -> bytes:
+    return await request.body()
+
+
+@router.post("/refresh", status_code=202)
+def refresh(raw: bytes = Depends(_raw_body), session: Session = Depends(db_session), admin=Depends(require_admin)):
+    """Queue ingest + publish of the uploaded GeoJSON; poll GET /admin/jobs/{job_id} for the outcome.
 
-@router.post("/refresh")
-def refresh(body: RefreshBody | None = None, session: Session = Depends(db_session), _admin=Depends(require_admin)):
+    Body: { geojson, note?, created_by? }. It is decoded straight into RefreshRequest
+    (msgspec) instead of through a generic JSON parse and a pydantic model.
+    """
+    try:
+        body = json_service.decode_struct(raw, RefreshRequest) if raw.strip() not in (b"", b"null") else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not body or not body.geojson:
         raise HTTPException(status_code=400, detail="Provide geojson in body.geojson")
-    return admin_controller.refresh_snapshot(
-        session,
-        geojson=body.geojson,
-        note=body.note,
-        created_by=body.created_by,
-    )
+    try:
+        return admin_controller.enqueue_refresh(
+            session,
+            geojson=json_service.feature_collection_dict(body.geojson),
+            note=body.note,
+            created_by=body.created_by or admin.get("email"),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+class RecomputeBody(BaseModel):
+    mode: Optional[str] = None
+    access_model: Optional[str] = None
+    supply_model: Optional[str] = None
+    grid: Optional[str] = None
+    cell_size: Optional[float] = None
+    note: Optional[str] = None
+
+
+@router.post("/jobs/recompute", status_code=202)
+def recompute(body: RecomputeBody | None = None, session: Session = Depends(db_session), admin=Depends(require_admin)):
+    """Queue a scoring pipeline run over the raw inputs in data/, then ingest + publish its output."""
+    try:
+        return admin_controller.enqueue_recompute(
+            session, params=(body.model_dump() if body else {}), created_by=admin.get("email")
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/jobs")
+def list_jobs(
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+    session: Session = Depends(db_session),
+    _admin=Depends(require_admin),
+):
+    return {"jobs": admin_controller.list_jobs(session, limit=limit, offset=offset)}
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str, session: Session = Depends(db_session), _admin=Depends(require_admin)):
+    try:
+        return admin_controller.get_job(session, job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
 @router.get("/snapshots")
-def list_snapshots(session: Session = Depends(db_session), _admin=Depends(require_admin)):
-    return {"snapshots": admin_controller.list_snapshots(session)}
+def list_snapshots(
+    limit: int = Query(default=100, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+    session: Session = Depends(db_session),
+    _admin=Depends(require_admin),
+):
+    return {"snapshots": admin_controller.list_snapshots(session, limit=limit, offset=offset)}
 
 @router.post("/snapshots/{snapshot_id}/restore")
 def restore_snapshot(snapshot_id: str, session: Session = Depends(db_session), _admin=Depends(require_admin)):
-    return admin_controller.restore_snapshot(session, snapshot_id)
+    try:
+        return admin_controller.restore_snapshot(session, snapshot_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+class TagBody(BaseModel):
+    tag: Optional[str] = None
+
+
+@router.put("/snapshots/{snapshot_id}/tag")
+def tag_snapshot(snapshot_id: str, body: TagBody, session: Session = Depends(db_session), _admin=Depends(require_admin)):
+    try:
+        return admin_controller.tag_snapshot(session, snapshot_id, body.tag)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("/retention/run")
+def run_retention(_admin=Depends(require_admin)):
+    return admin_controller.run_retention()
 
 
 # ---- User management ----
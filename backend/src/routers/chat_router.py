@@ -7,7 +7,7 @@ from typing import AsyncGenerator
 from sqlalchemy.orm import Session
 from ..controllers.chat_controller import chat_controller
 from ..schemas.chat_schemas import ChatRequest, ChatResponse, SubzoneInsightRequest
-from .deps import get_current_user, db_session
+from .deps import get_current_user, read_session
 from ..models.user import User
 
 
@@ -18,7 +18,7 @@ router = APIRouter()
 async def chat(
     request: ChatRequest,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(db_session)
+    session: Session = Depends(read_session)
 ):
     """
     Chat with AI assistant
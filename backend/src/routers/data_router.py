@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 from pathlib import Path
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import FileResponse, JSONResponse
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import FileResponse, Response
 from sqlalchemy.orm import Session
 
 from ..controllers import data_controller
-from .deps import db_session, get_current_user
+from ..services import geometry_service, layer_index_service
+from .deps import get_current_user, read_session
 
 router = APIRouter(dependencies=[Depends(get_current_user)])
 
@@ -24,35 +27,66 @@ NO_CACHE_HEADERS = {
     "Vary": "Authorization",
 }
 
+BBOX_QUERY = Query(default=None, description="minx,miny,maxx,maxy (WGS84); only intersecting features are returned")
+
+
+def _parse_bbox(bbox: Optional[str]):
+    try:
+        return geometry_service.parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _layer_response(path: Path, bbox: Optional[str], missing: str):
+    # Resolve the current-export pointer once so a concurrent publish cannot swap the
+    # file between the size check and the read; artifacts themselves never change.
+    path = path.resolve()
+    if not path.exists():
+        raise HTTPException(status_code=404, detail=missing)
+    box = _parse_bbox(bbox)
+    if box is None:
+        return FileResponse(str(path), media_type="application/geo+json", headers=NO_CACHE_HEADERS)
+    body = layer_index_service.filtered_file_bytes(path, box)
+    return Response(content=body, media_type="application/geo+json", headers=NO_CACHE_HEADERS)
+
+
 @router.get("/opportunity.geojson")
-def opportunity_geojson():
-    if not OUT_PATH.exists():
-        raise HTTPException(status_code=404, detail="GeoJSON not found in data/out/")
-    return FileResponse(str(OUT_PATH), media_type="application/geo+json", headers=NO_CACHE_HEADERS)
+def opportunity_geojson(bbox: Optional[str] = BBOX_QUERY):
+    return _layer_response(OUT_PATH, bbox, "GeoJSON not found in data/out/")
 
 
 @router.get("/hawker-centres.geojson")
-def hawker_centres_geojson():
-    if not HAWKERS_PATH.exists():
-        raise HTTPException(status_code=404, detail="Hawker centres GeoJSON not found in data/")
-    return FileResponse(str(HAWKERS_PATH), media_type="application/geo+json", headers=NO_CACHE_HEADERS)
+def hawker_centres_geojson(bbox: Optional[str] = BBOX_QUERY):
+    return _layer_response(HAWKERS_PATH, bbox, "Hawker centres GeoJSON not found in data/")
 
 
 @router.get("/mrt-exits.geojson")
-def mrt_exits_geojson():
-    if not MRT_EXITS_PATH.exists():
-        raise HTTPException(status_code=404, detail="MRT exits GeoJSON not found in data/")
-    return FileResponse(str(MRT_EXITS_PATH), media_type="application/geo+json", headers=NO_CACHE_HEADERS)
+def mrt_exits_geojson(bbox: Optional[str] = BBOX_QUERY):
+    return _layer_response(MRT_EXITS_PATH, bbox, "MRT exits GeoJSON not found in data/")
 
 
 @router.get("/bus-stops.geojson")
-def bus_stops_geojson():
-    if not BUS_STOPS_PATH.exists():
-        raise HTTPException(status_code=404, detail="Bus stops GeoJSON not found in data/")
-    return FileResponse(str(BUS_STOPS_PATH), media_type="application/geo+json", headers=NO_CACHE_HEADERS)
+def bus_stops_geojson(bbox: Optional[str] = BBOX_QUERY):
+    return _layer_response(BUS_STOPS_PATH, bbox, "Bus stops GeoJSON not found in data/")
 
 @router.get("/opportunity-db.geojson")
-def opportunity_db_geojson(session: Session = Depends(db_session)):
-    fc = data_controller.get_opportunity_geojson(session)
-    return JSONResponse(fc, media_type="application/geo+json", headers=NO_CACHE_HEADERS)
+def opportunity_db_geojson(bbox: Optional[str] = BBOX_QUERY, session: Session = Depends(read_session)):
+    box = _parse_bbox(bbox)
+    if box is not None:
+        body = data_controller.get_opportunity_geojson_bbox(session, bbox=box)
+        return Response(content=body, media_type="application/geo+json", headers=NO_CACHE_HEADERS)
+    body = data_controller.get_opportunity_geojson_bytes(session)
+    return Response(content=body, media_type="application/geo+json", headers=NO_CACHE_HEADERS)
+
 
+@router.get("/opportunity.delta")
+def opportunity_delta(
+    from_snapshot: str = Query(..., alias="from", description="Snapshot id the client currently holds"),
+    to_snapshot: Optional[str] = Query(default=None, alias="to", description="Target snapshot id (default: current)"),
+    session: Session = Depends(read_session),
+):
+    try:
+        body = data_controller.get_opportunity_delta(session, from_snapshot=from_snapshot, to_snapshot=to_snapshot)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return Response(content=body, media_type="application/json", headers=NO_CACHE_HEADERS)
@@ -5,7 +5,7 @@ from typing import Any, Dict
 from fastapi import Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
-from ..db import get_session
+from ..db import get_read_session, get_session
 from ..repositories import user_repo
 from ..services import auth_service
 
@@ -16,6 +16,12 @@ def db_session() -> Session:
         yield s
 
 
+def read_session() -> Session:
+    # Read-only routes: the DATABASE_READ_URL replica when it is in sync, else the primary
+    with get_read_session() as s:
+        yield s
+
+
 def get_current_user(request: Request, session: Session = Depends(db_session)) -> Dict[str, Any]:
     auth = request.headers.get("authorization") or request.headers.get("Authorization")
     if not auth or not auth.lower().startswith("bearer "):
@@ -1,6 +1,13 @@
 from pathlib import Path
-from fastapi import APIRouter
-import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from ..controllers import data_controller
+from ..services import json_service
+from .deps import get_current_user, read_session
 
 router = APIRouter()
 
@@ -10,7 +17,7 @@ OUT_PATH = BASE_DIR / "data" / "out" / "hawker_opportunities_ver2.geojson"
 @router.get("/")
 def list_subzones():
     try:
-        data = json.loads(OUT_PATH.read_text(encoding="utf-8"))
+        data = json_service.loads(OUT_PATH.read_bytes())
         names = []
         for f in data.get("features", []):
             p = f.get("properties", {})
@@ -22,3 +29,108 @@ def list_subzones():
         return {"count": 0, "subzones": []}
 
 
+@router.get("/at")
+def subzone_at(
+    lon: float = Query(..., ge=-180, le=180),
+    lat: float = Query(..., ge=-90, le=90),
+    session: Session = Depends(read_session),
+    _user=Depends(get_current_user),
+):
+    feat = data_controller.find_subzone_at(session, lon=lon, lat=lat)
+    if not feat:
+        raise HTTPException(status_code=404, detail="No subzone at this location")
+    return feat
+
+
+@router.get("/stats")
+def subzone_stats(
+    planning_area: Optional[str] = Query(default=None, description="Limit to one planning area"),
+    snapshot: Optional[str] = Query(default=None, description="Snapshot id (default: current)"),
+    areas: bool = Query(default=False, description="Also return every planning area's rollup"),
+    session: Session = Depends(read_session),
+    _user=Depends(get_current_user),
+):
+    """Counts, sums, min/max (with subzone), percentiles and rank bands, precomputed at ingest."""
+    try:
+        stats = data_controller.subzone_stats(session, planning_area=planning_area, snapshot=snapshot, areas=areas)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if stats is None:
+        raise HTTPException(status_code=404, detail="No such snapshot or planning area")
+    return stats
+
+
+@router.get("/rank-intervals")
+def rank_intervals(
+    snapshot: Optional[str] = Query(default=None, description="Snapshot id (default: current)"),
+    ids: Optional[str] = Query(default=None, description="Comma-separated subzone ids (default: all)"),
+    session: Session = Depends(read_session),
+    _user=Depends(get_current_user),
+):
+    """Monte Carlo H_rank intervals (lo/median/hi) per subzone.
+
+    202 with the job id while a background job computes them for a snapshot that has none.
+    """
+    try:
+        result = data_controller.rank_stability(
+            session, snapshot=snapshot, subzone_ids=ids.split(",") if ids else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found or rank intervals unavailable")
+    if result.get("status") == "pending":
+        return JSONResponse(result, status_code=202)
+    return result
+
+
+@router.get("/compare")
+def compare_subzones(
+    ids: str = Query(..., description="Comma-separated subzone ids"),
+    geometry: bool = Query(default=False, description="Include each subzone's geometry"),
+    tolerance: float = Query(default=0.0002, ge=0, le=0.01, description="Simplification tolerance in degrees (0 keeps every vertex)"),
+    history: int = Query(default=0, ge=0, le=100, description="Also return the newest N snapshots' H_score/H_rank"),
+    session: Session = Depends(read_session),
+    _user=Depends(get_current_user),
+):
+    """Attributes and in-snapshot percentiles of a few subzones of the current snapshot."""
+    try:
+        result = data_controller.compare_subzones(
+            session, ids.split(","), geometry=geometry, tolerance=tolerance, history=history
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="No current snapshot")
+    return result
+
+
+@router.get("/history")
+def subzones_history(
+    ids: str = Query(..., description="Comma-separated subzone ids"),
+    last: Optional[int] = Query(default=None, ge=1, le=1000, description="Only the newest N snapshots"),
+    session: Session = Depends(read_session),
+    _user=Depends(get_current_user),
+):
+    """H_score/H_rank and attributes of several subzones across snapshots (no geometry)."""
+    try:
+        return {"subzones": data_controller.subzone_history(session, ids.split(","), last=last)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{subzone_id}/history")
+def subzone_history(
+    subzone_id: str,
+    last: Optional[int] = Query(default=None, ge=1, le=1000, description="Only the newest N snapshots"),
+    session: Session = Depends(read_session),
+    _user=Depends(get_current_user),
+):
+    try:
+        history = data_controller.subzone_history(session, [subzone_id], last=last)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    rows = next(iter(history.values()))
+    if not rows:
+        raise HTTPException(status_code=404, detail="Subzone not found")
+    return {"subzone": subzone_id.strip(), "history": rows}
@@ -0,0 +1,29 @@
+"""
+msgspec structs for GeoJSON payloads decoded on the ingest path
+"""
+from typing import Any, Optional, Union
+
+import msgspec
+
+
+class Feature(msgspec.Struct, omit_defaults=True):
+    """GeoJSON Feature; properties and geometry stay plain dicts"""
+    type: str = "Feature"
+    properties: Optional[dict[str, Any]] = None
+    geometry: Optional[dict[str, Any]] = None
+    id: Optional[Union[str, int]] = None
+
+
+class FeatureCollection(msgspec.Struct, omit_defaults=True):
+    """GeoJSON FeatureCollection (name/crs are kept for exports that mirror the source)"""
+    features: list[Feature]
+    type: str = "FeatureCollection"
+    name: Optional[str] = None
+    crs: Optional[dict[str, Any]] = None
+
+
+class RefreshRequest(msgspec.Struct):
+    """Body of POST /admin/refresh"""
+    geojson: Optional[FeatureCollection] = None
+    note: Optional[str] = None
+    created_by: Optional[str] = None
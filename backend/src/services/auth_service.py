@@ -9,15 +9,24 @@ from hashlib import sha256
 from typing import Optional, Tuple
 
 import jwt
-from passlib.context import CryptContext
 from sqlalchemy import delete
 from sqlalchemy.orm import Session
 
 from ..models.refresh_token import RefreshToken
 from ..models.user import User
+from ..repositories import user_token_repo
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_pwd_context = None
+
+
+def _get_pwd_context():
+    # passlib/bcrypt are loaded on first password hash or check, not at import
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
 
 
 def validate_password_policy(password: str) -> tuple[bool, str]:
@@ -41,12 +50,12 @@ def validate_password_policy(password: str) -> tuple[bool, str]:
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return _get_pwd_context().hash(password)
 
 
 def verify_password(password: str, password_hash: str) -> bool:
     try:
-        return pwd_context.verify(password, password_hash)
+        return _get_pwd_context().verify(password, password_hash)
     except Exception:
         return False
 
@@ -137,6 +146,40 @@ def rotate_refresh_token(session: Session, *, old_refresh_token: str, user_id: s
     create_refresh_token(session, user_id=user_id, refresh_token=pair.refresh_token, expires_at_ts=pair.refresh_expires_at)
     return pair.refresh_token, pair.refresh_expires_at
 
+# Email link tokens (user_tokens table): purpose -> (TTL env var, default hours)
+_USER_TOKEN_TTLS = {
+    "verify_email": ("TOKEN_TTL_EMAIL_VERIFY_HOURS", "24"),
+    "password_reset": ("TOKEN_TTL_PW_RESET_HOURS", "1"),
+}
+
+
+def user_token_ttl(purpose: str) -> timedelta:
+    env, default = _USER_TOKEN_TTLS[purpose]
+    return timedelta(hours=float(os.getenv(env, default)))
+
+
+def issue_user_token(session: Session, *, user_id: str, purpose: str) -> str:
+    return user_token_repo.issue(
+        session, user_id=user_id, purpose=purpose, now=datetime.now(timezone.utc), ttl=user_token_ttl(purpose)
+    )
+
+
+def purge_expired_user_tokens(batch_size: Optional[int] = None) -> int:
+    """Delete expired email link tokens in batches of AUTH_TOKEN_PURGE_BATCH, one transaction each."""
+    from ..db import get_session
+
+    batch_size = batch_size or max(1, int(os.getenv("AUTH_TOKEN_PURGE_BATCH", "1000")))
+    now = datetime.now(timezone.utc)
+    purged = 0
+    while True:
+        with get_session() as s:
+            n = user_token_repo.delete_expired(s, now=now, batch_size=batch_size)
+        purged += n
+        if n < batch_size:
+            break
+    return purged
+
+
 def verify_credentials(email: str, password: str) -> bool:
     return False
 
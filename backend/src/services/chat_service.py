@@ -1,11 +1,16 @@
 """
 Chat service for interacting with Ollama local LLM
 """
-import httpx
 from typing import AsyncGenerator, Optional, List, Dict
 import os
 import json
 import re
+import time
+
+from .log_service import get_logger
+from . import metrics_service
+
+log = get_logger("chat.service")
 
 
 class ChatService:
@@ -247,9 +252,13 @@ Be concise, accurate, data-driven, and WELL-FORMATTED. Always cite the actual nu
         
         return None
     
-    def _inject_subzone_context(self, messages: List[Dict[str, str]], subzone_data: List[Dict], request_info: Optional[Dict] = None) -> List[Dict[str, str]]:
+    def _inject_subzone_context(self, messages: List[Dict[str, str]], subzone_data: List[Dict], request_info: Optional[Dict] = None,
+                                stats: Optional[Dict] = None) -> List[Dict[str, str]]:
         """
         Inject comprehensive subzone data into the conversation context
+
+        `stats` is the snapshot's precomputed rollup (data_controller.subzone_stats); its
+        maxima cover every subzone, not just the rows passed in.
         """
         if not subzone_data:
             return messages
@@ -257,11 +266,11 @@ Be concise, accurate, data-driven, and WELL-FORMATTED. Always cite the actual nu
         # Sort by rank to ensure proper ordering
         sorted_data = sorted(subzone_data, key=lambda x: x.get('H_rank', 999))
         
-        # Pre-compute maximum values to highlight them clearly
-        max_pop = max(sorted_data, key=lambda x: x.get('population', 0))
-        max_mrt = max(sorted_data, key=lambda x: x.get('mrt', 0))
-        max_bus = max(sorted_data, key=lambda x: x.get('bus', 0))
-        max_hawker = max(sorted_data, key=lambda x: x.get('hawker', 0))
+        # Maximum values to highlight them clearly
+        max_pop = self._max_entry(sorted_data, 'population', stats)
+        max_mrt = self._max_entry(sorted_data, 'mrt', stats)
+        max_bus = self._max_entry(sorted_data, 'bus', stats)
+        max_hawker = self._max_entry(sorted_data, 'hawker', stats)
         
         # Create a summary section first
         context = "\n\n[SUBZONE DATA - Use this data to answer the user's question]\n"
@@ -411,12 +420,20 @@ Be concise, accurate, data-driven, and WELL-FORMATTED. Always cite the actual nu
         # Log context size for debugging
         context_chars = len(context)
         context_tokens_estimate = context_chars // 4  # Rough estimate: 1 token ≈ 4 chars
-        print(f"[Chat Service] Context size: {context_chars:,} characters (~{context_tokens_estimate:,} tokens)")
+        log.debug("chat.context_size", extra={"chars": context_chars, "tokens_estimate": context_tokens_estimate})
         if context_tokens_estimate > 4000:
-            print(f"[Chat Service] ⚠️ WARNING: Context is large! May exceed model limits.")
+            log.warning("chat.context_large", extra={"tokens_estimate": context_tokens_estimate})
         
         return enhanced_messages
 
+    @staticmethod
+    def _max_entry(rows: List[Dict], attribute: str, stats: Optional[Dict]) -> Dict:
+        """Subzone with the largest `attribute`: from the rollup when given, else from rows."""
+        s = ((stats or {}).get('stats') or {}).get(attribute) or {}
+        if s.get('count'):
+            return {'subzone': s['max_subzone'], attribute: s['max'], 'H_rank': s.get('max_rank') or 'N/A'}
+        return max(rows, key=lambda x: x.get(attribute) or 0)
+
     async def chat_completion(
         self, 
         messages: List[Dict[str, str]], 
@@ -454,15 +471,22 @@ Be concise, accurate, data-driven, and WELL-FORMATTED. Always cite the actual nu
             return self._stream_response(url, payload)
         else:
             # For non-streaming, use context manager
+            import httpx  # deferred: only chat requests need the HTTP client
+
             async with httpx.AsyncClient(timeout=self.timeout) as client:
                 try:
-                    print(f"[Chat Service] Sending request to Ollama: {url}")
-                    print(f"[Chat Service] Model: {self.model}")
+                    log.debug("llm.request", extra={"url": url, "model": self.model, "stream": False})
+                    started = time.perf_counter()
                     response = await client.post(url, json=payload)
-                    print(f"[Chat Service] Response status: {response.status_code}")
                     response.raise_for_status()
                     result = response.json()
-                    print(f"[Chat Service] Got response from Ollama")
+                    metrics_service.observe_llm(
+                        self.model,
+                        stream=False,
+                        duration=time.perf_counter() - started,
+                        eval_count=result.get("eval_count"),
+                        eval_duration_ns=result.get("eval_duration"),
+                    )
                     content = result.get("message", {}).get("content", "")
                     # Format the response for better readability
                     formatted_content = self._format_response(content)
@@ -472,13 +496,16 @@ Be concise, accurate, data-driven, and WELL-FORMATTED. Always cite the actual nu
                         "done": result.get("done", True)
                     }
                 except httpx.TimeoutException as e:
-                    print(f"[Chat Service] Timeout error: {e}")
+                    metrics_service.LLM_ERRORS.labels(model=self.model, kind="timeout").inc()
+                    log.error("llm.timeout", extra={"model": self.model, "error": str(e)})
                     raise Exception(f"Ollama timeout after {self.timeout}s. Model might be loading.")
                 except httpx.ConnectError as e:
-                    print(f"[Chat Service] Connection error: {e}")
+                    metrics_service.LLM_ERRORS.labels(model=self.model, kind="connect").inc()
+                    log.error("llm.connect_failed", extra={"base_url": self.base_url, "error": str(e)})
                     raise Exception(f"Cannot connect to Ollama at {self.base_url}")
-                except Exception as e:
-                    print(f"[Chat Service] Error: {e}")
+                except Exception:
+                    metrics_service.LLM_ERRORS.labels(model=self.model, kind="other").inc()
+                    log.exception("llm.failed", extra={"model": self.model})
                     raise
     
     async def _stream_response(
@@ -488,13 +515,16 @@ Be concise, accurate, data-driven, and WELL-FORMATTED. Always cite the actual nu
     ) -> AsyncGenerator[str, None]:
         """Stream Ollama response chunk by chunk"""
         # Create a new client for streaming that stays alive
-        print(f"[Chat Service] Starting stream to Ollama: {url}")
-        print(f"[Chat Service] Model: {self.model}")
+        log.debug("llm.request", extra={"url": url, "model": self.model, "stream": True})
+        started = time.perf_counter()
+        ttft: Optional[float] = None
+        eval_count: Optional[int] = None
+        eval_duration: Optional[int] = None
+        import httpx
         
         async with httpx.AsyncClient(timeout=self.timeout) as client:
             try:
                 async with client.stream("POST", url, json=payload) as response:
-                    print(f"[Chat Service] Stream response status: {response.status_code}")
                     response.raise_for_status()
                     async for line in response.aiter_lines():
                         if line:
@@ -503,15 +533,30 @@ Be concise, accurate, data-driven, and WELL-FORMATTED. Always cite the actual nu
                                 if "message" in chunk:
                                     content = chunk["message"].get("content", "")
                                     if content:
+                                        if ttft is None:
+                                            ttft = time.perf_counter() - started
                                         yield content
+                                if chunk.get("done"):
+                                    # Final chunk carries Ollama's generation counters
+                                    eval_count = chunk.get("eval_count")
+                                    eval_duration = chunk.get("eval_duration")
                             except json.JSONDecodeError:
                                 continue
-                print(f"[Chat Service] Stream completed")
+                metrics_service.observe_llm(
+                    self.model,
+                    stream=True,
+                    duration=time.perf_counter() - started,
+                    ttft=ttft,
+                    eval_count=eval_count,
+                    eval_duration_ns=eval_duration,
+                )
             except httpx.TimeoutException as e:
-                print(f"[Chat Service] Stream timeout error: {e}")
+                metrics_service.LLM_ERRORS.labels(model=self.model, kind="timeout").inc()
+                log.error("llm.timeout", extra={"model": self.model, "stream": True, "error": str(e)})
                 yield f"[ERROR: Ollama timeout after {self.timeout}s]"
             except Exception as e:
-                print(f"[Chat Service] Stream error: {e}")
+                metrics_service.LLM_ERRORS.labels(model=self.model, kind="other").inc()
+                log.exception("llm.failed", extra={"model": self.model, "stream": True})
                 yield f"[ERROR: {str(e)}]"
     
     async def generate_subzone_insight(self, subzone_data: dict) -> str:
@@ -543,6 +588,20 @@ Provide a concise business insight."""
         return response["content"]
 
 
-# Singleton instance
-chat_service = ChatService()
+_chat_service: Optional[ChatService] = None
+
+
+def get_chat_service() -> ChatService:
+    """Shared ChatService, created on first use rather than at import."""
+    global _chat_service
+    if _chat_service is None:
+        _chat_service = ChatService()
+    return _chat_service
+
+
+def __getattr__(name: str):
+    # Backwards compatible `from .chat_service import chat_service`
+    if name == "chat_service":
+        return get_chat_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
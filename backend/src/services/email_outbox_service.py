@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Optional
+
+from ..db import get_session
+from ..repositories import email_outbox_repo
+from .log_service import get_logger
+
+if TYPE_CHECKING:
+    import smtplib
+    from email.message import EmailMessage
+
+log = get_logger("email.outbox")
+
+
+@dataclass
+class OutboxSettings:
+    host: str = "smtp.gmail.com"
+    port: int = 587
+    username: Optional[str] = None
+    password: Optional[str] = None
+    starttls: bool = True
+    timeout: float = 30.0
+    batch_size: int = 20
+    poll_seconds: float = 5.0
+    max_attempts: int = 6
+    retry_base_seconds: float = 30.0
+    retry_max_seconds: float = 3600.0
+    idle_seconds: float = 60.0
+    keep_sent_days: int = 7
+    lease_seconds: float = 900.0  # a claimed batch is retried after this if its worker died
+
+    @classmethod
+    def from_env(cls) -> "OutboxSettings":
+        return cls(
+            host=os.getenv("SMTP_HOST", "smtp.gmail.com"),
+            port=int(os.getenv("SMTP_PORT", "587")),
+            username=os.getenv("SMTP_USERNAME") or None,
+            password=os.getenv("SMTP_PASSWORD") or None,
+            # Disable for local stand-ins such as `python -m aiosmtpd -n -l 127.0.0.1:1025`
+            starttls=os.getenv("SMTP_STARTTLS", "1").lower() not in ("0", "false", "no"),
+            timeout=float(os.getenv("SMTP_TIMEOUT", "30")),
+            batch_size=max(1, int(os.getenv("EMAIL_BATCH_SIZE", "20"))),
+            poll_seconds=float(os.getenv("EMAIL_POLL_SECONDS", "5")),
+            max_attempts=max(1, int(os.getenv("EMAIL_MAX_ATTEMPTS", "6"))),
+            retry_base_seconds=float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "30")),
+            retry_max_seconds=float(os.getenv("EMAIL_RETRY_MAX_SECONDS", "3600")),
+            idle_seconds=float(os.getenv("SMTP_IDLE_SECONDS", "60")),
+            keep_sent_days=int(os.getenv("EMAIL_OUTBOX_KEEP_DAYS", "7")),
+            lease_seconds=float(os.getenv("EMAIL_SENDING_LEASE_SECONDS", "900")),
+        )
+
+    def from_addr(self) -> str:
+        user = self.username or ""
+        fallback = f'"Hawker Opportunity" <{user}>' if user else "Hawker Opportunity <no-reply@example.com>"
+        return os.getenv("SMTP_FROM", fallback)
+
+
+class SmtpConnection:
+    """One SMTP session reused across messages (STARTTLS + login happen once per connect).
+
+    Idle sessions are probed with NOOP before reuse and reopened if the server dropped them.
+    """
+
+    def __init__(self, settings: OutboxSettings):
+        self.settings = settings
+        self._client: Optional["smtplib.SMTP"] = None
+        self._last_used = 0.0
+
+    def _connect(self) -> "smtplib.SMTP":
+        import smtplib
+
+        s = self.settings
+        client = smtplib.SMTP(s.host, s.port, timeout=s.timeout)
+        if s.starttls:
+            client.starttls()
+        if s.username and s.password:
+            client.login(s.username, s.password)
+        return client
+
+    def _alive(self) -> bool:
+        if self._client is None:
+            return False
+        if time.monotonic() - self._last_used < self.settings.idle_seconds:
+            return True
+        try:
+            return self._client.noop()[0] == 250
+        except Exception:
+            return False
+
+    def send(self, msg: "EmailMessage") -> None:
+        if not self._alive():
+            self.close()
+            self._client = self._connect()
+        assert self._client is not None
+        self._client.send_message(msg)
+        self._last_used = time.monotonic()
+
+    def close_if_idle(self) -> None:
+        if self._client is not None and time.monotonic() - self._last_used >= self.settings.idle_seconds:
+            self.close()
+
+    def close(self) -> None:
+        if self._client is None:
+            return
+        try:
+            self._client.quit()
+        except Exception:
+            pass
+        self._client = None
+
+
+def build_message(row: dict[str, Any], from_addr: str) -> "EmailMessage":
+    """Message for a claimed outbox row (see email_outbox_repo.claim_due)."""
+    from email.message import EmailMessage
+
+    msg = EmailMessage()
+    msg["Subject"] = row["subject"]
+    msg["From"] = from_addr
+    msg["To"] = row["to_addr"]
+    msg.set_content(row["body_text"])
+    if row["body_html"]:
+        msg.add_alternative(row["body_html"], subtype="html")
+    return msg
+
+
+def _is_permanent(exc: Exception) -> bool:
+    import smtplib
+
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return True
+    # 5xx replies to the message itself will not succeed on retry
+    return isinstance(exc, (smtplib.SMTPDataError, smtplib.SMTPSenderRefused)) and 500 <= exc.smtp_code < 600
+
+
+def _is_connection_error(exc: Exception) -> bool:
+    """True when the session itself is unusable, as opposed to one message being rejected.
+
+    SMTPException subclasses OSError, so the socket check has to exclude it: a refused
+    recipient or a 5xx DATA reply only fails that message.
+    """
+    import smtplib
+
+    if isinstance(exc, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, smtplib.SMTPAuthenticationError)):
+        return True
+    return isinstance(exc, OSError) and not isinstance(exc, smtplib.SMTPException)
+
+
+def backoff_seconds(attempts: int, settings: OutboxSettings) -> float:
+    """Exponential backoff with +-20% jitter after `attempts` failed tries."""
+    delay = min(settings.retry_max_seconds, settings.retry_base_seconds * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def deliver_due(conn: SmtpConnection, settings: Optional[OutboxSettings] = None) -> dict[str, int]:
+    """Send one batch of due emails over `conn`. Safe to run from several workers at once.
+
+    Rows are claimed (marked `sending`) and committed before any SMTP traffic, so no row
+    lock is held while the server responds; each outcome is then recorded in a short
+    transaction of its own.
+    """
+    settings = settings or conn.settings
+    stats = {"claimed": 0, "sent": 0, "retried": 0, "failed": 0}
+    now = datetime.now(timezone.utc)
+    with get_session() as s:
+        rows = email_outbox_repo.claim_due(s, now=now, limit=settings.batch_size,
+                                           lease_until=now + timedelta(seconds=settings.lease_seconds))
+    stats["claimed"] = len(rows)
+    from_addr = settings.from_addr()
+    for i, row in enumerate(rows):
+        try:
+            conn.send(build_message(row, from_addr))
+        except Exception as e:  # noqa: BLE001 - classified below
+            error = f"{type(e).__name__}: {e}"[:1000]
+            with get_session() as s:
+                if _is_permanent(e) or row["attempts"] >= settings.max_attempts:
+                    email_outbox_repo.mark_failed(s, row["id"], error=error)
+                    stats["failed"] += 1
+                    log.error("email.failed", extra={"id": row["id"], "kind": row["kind"], "attempts": row["attempts"],
+                                                     "error": error})
+                else:
+                    retry_at = datetime.now(timezone.utc) + timedelta(seconds=backoff_seconds(row["attempts"], settings))
+                    email_outbox_repo.mark_retry(s, row["id"], error=error, next_attempt_at=retry_at)
+                    stats["retried"] += 1
+                    log.warning("email.retry", extra={"id": row["id"], "kind": row["kind"], "attempts": row["attempts"],
+                                                      "retry_at": retry_at.isoformat(), "error": error})
+                if _is_connection_error(e):
+                    # Server unreachable: hand the rest of the batch back for the next pass
+                    email_outbox_repo.release(s, [r["id"] for r in rows[i + 1:]], now=datetime.now(timezone.utc))
+            if _is_connection_error(e):
+                conn.close()
+                break
+            continue
+        with get_session() as s:
+            email_outbox_repo.mark_sent(s, row["id"], now=datetime.now(timezone.utc))
+        stats["sent"] += 1
+    if stats["claimed"]:
+        log.info("email.batch", extra=stats)
+    return stats
+
+
+def purge_sent(settings: OutboxSettings) -> int:
+    if settings.keep_sent_days <= 0:
+        return 0
+    with get_session() as s:
+        return email_outbox_repo.purge_sent(s, before=datetime.now(timezone.utc) - timedelta(days=settings.keep_sent_days))
+
+
+_worker: Optional[threading.Thread] = None
+_stop = threading.Event()
+_wake = threading.Event()
+
+
+def wake() -> None:
+    """Nudge the worker to look at the outbox now instead of at the next poll."""
+    _wake.set()
+
+
+def start_outbox_worker(settings: Optional[OutboxSettings] = None) -> Optional[threading.Thread]:
+    """Start the delivery thread (EMAIL_OUTBOX_WORKER=0 disables it, e.g. when a separate process sends)."""
+    global _worker
+    if os.getenv("EMAIL_OUTBOX_WORKER", "1").lower() in ("0", "false", "no"):
+        return None
+    if _worker is not None and _worker.is_alive():
+        return _worker
+    settings = settings or OutboxSettings.from_env()
+
+    def loop() -> None:
+        conn = SmtpConnection(settings)
+        last_purge = 0.0
+        while not _stop.is_set():
+            stats: dict[str, Any] = {"claimed": 0}
+            try:
+                stats = deliver_due(conn, settings)
+                if time.monotonic() - last_purge > 3600:
+                    purge_sent(settings)
+                    last_purge = time.monotonic()
+            except Exception:
+                log.exception("email.worker_failed")
+            if stats["claimed"] >= settings.batch_size:
+                continue  # more mail is waiting
+            conn.close_if_idle()
+            _wake.wait(settings.poll_seconds)
+            _wake.clear()
+        conn.close()
+
+    _stop.clear()
+    _worker = threading.Thread(target=loop, name="email-outbox", daemon=True)
+    _worker.start()
+    return _worker
+
+
+def stop_outbox_worker() -> None:
+    _stop.set()
+    _wake.set()
@@ -1,45 +1,34 @@
 from __future__ import annotations
 
-import os
-import smtplib
-from email.message import EmailMessage
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 
+from ..repositories import email_outbox_repo
+from . import email_outbox_service
 
-def _smtp_client() -> smtplib.SMTP:
-    host = os.getenv("SMTP_HOST", "smtp.gmail.com")
-    port = int(os.getenv("SMTP_PORT", "587"))
-    user = os.getenv("SMTP_USERNAME")
-    pwd = os.getenv("SMTP_PASSWORD")
-    if not user or not pwd:
-        raise RuntimeError("SMTP credentials not configured")
-    client = smtplib.SMTP(host, port)
-    client.starttls()
-    client.login(user, pwd)
-    return client
+# Request handlers only enqueue: rows land in `email_outbox` in the caller's transaction
+# and the outbox worker (email_outbox_service) delivers them over a reused SMTP session.
 
 
-def _from_addr() -> str:
-    user = os.getenv("SMTP_USERNAME", "")
-    fallback = f'"Hawker Opportunity" <{user}>' if user else "Hawker Opportunity <no-reply@example.com>"
-    return os.getenv("SMTP_FROM", fallback)
+def _enqueue(session: Session, *, kind: str, to_email: str, subject: str, text: str, html: str) -> str:
+    outbox_id = email_outbox_repo.enqueue(
+        session, kind=kind, to_addr=to_email, subject=subject, body_text=text, body_html=html
+    )
+    # Wake the worker once the row is committed so delivery does not wait for the next poll
+    event.listen(session, "after_commit", lambda _s: email_outbox_service.wake(), once=True)
+    return outbox_id
 
 
-def send_email_verification(to_email: str, verify_url: str) -> None:
-    msg = EmailMessage()
-    msg["Subject"] = "Verify your email"
-    msg["From"] = _from_addr()
-    msg["To"] = to_email
-    msg.set_content(
-        f"""
+def send_email_verification(session: Session, to_email: str, verify_url: str) -> str:
+    """Queue the verification email. Returns the outbox id."""
+    text = f"""
 Please verify your email address.
 
 Verify link: {verify_url}
 
 If you did not create an account, you can ignore this message.
 """.strip()
-    )
-    msg.add_alternative(
-        f"""
+    html = f"""
 <html>
   <body>
     <p>Thanks for signing up!</p>
@@ -47,29 +36,20 @@ If you did not create an account, you can ignore this message.
     <p>If the button doesn't work, copy and paste this URL:<br/>{verify_url}</p>
   </body>
 </html>
-""",
-        subtype="html",
-    )
-    with _smtp_client() as s:
-        s.send_message(msg)
+"""
+    return _enqueue(session, kind="verify_email", to_email=to_email, subject="Verify your email", text=text, html=html)
 
 
-def send_password_reset(to_email: str, reset_url: str) -> None:
-    msg = EmailMessage()
-    msg["Subject"] = "Reset your password"
-    msg["From"] = _from_addr()
-    msg["To"] = to_email
-    msg.set_content(
-        f"""
+def send_password_reset(session: Session, to_email: str, reset_url: str) -> str:
+    """Queue the password reset email. Returns the outbox id."""
+    text = f"""
 We received a request to reset your password.
 
 Reset link: {reset_url}
 
 If you did not request this, you can ignore this email.
 """.strip()
-    )
-    msg.add_alternative(
-        f"""
+    html = f"""
 <html>
   <body>
     <p>We received a request to reset your password.</p>
@@ -77,8 +57,5 @@ If you did not request this, you can ignore this email.
     <p>If you did not request this, you can ignore this email.</p>
   </body>
 </html>
-""",
-        subtype="html",
-    )
-    with _smtp_client() as s:
-        s.send_message(msg)
+"""
+    return _enqueue(session, kind="password_reset", to_email=to_email, subject="Reset your password", text=text, html=html)
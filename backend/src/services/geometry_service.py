@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Iterable, Optional, Tuple
+
+BBox = Tuple[float, float, float, float]
+
+
+def parse_bbox(value: Optional[str]) -> Optional[BBox]:
+    """Parse a `minx,miny,maxx,maxy` query string (WGS84 lon/lat).
+
+    Returns None for an empty value; raises ValueError when malformed.
+    """
+    if value is None or not value.strip():
+        return None
+    parts = [p.strip() for p in value.split(",")]
+    if len(parts) != 4:
+        raise ValueError("bbox must be minx,miny,maxx,maxy")
+    try:
+        minx, miny, maxx, maxy = (float(p) for p in parts)
+    except ValueError:
+        raise ValueError("bbox values must be numbers")
+    if minx > maxx or miny > maxy:
+        raise ValueError("bbox min values must not exceed max values")
+    return (minx, miny, maxx, maxy)
+
+
+def _iter_positions(coords: Any) -> Iterable[Tuple[float, float]]:
+    # Walk nested coordinate arrays down to [x, y(, z)] positions
+    if not coords:
+        return
+    if isinstance(coords[0], (int, float)):
+        yield float(coords[0]), float(coords[1])
+        return
+    for c in coords:
+        yield from _iter_positions(c)
+
+
+def geometry_bbox(geom: Optional[dict[str, Any]]) -> Optional[BBox]:
+    """Return the (minx, miny, maxx, maxy) envelope of a GeoJSON geometry."""
+    if not geom:
+        return None
+    if geom.get("type") == "GeometryCollection":
+        boxes = [b for b in (geometry_bbox(g) for g in geom.get("geometries") or []) if b]
+        if not boxes:
+            return None
+        return (
+            min(b[0] for b in boxes),
+            min(b[1] for b in boxes),
+            max(b[2] for b in boxes),
+            max(b[3] for b in boxes),
+        )
+    xs: list[float] = []
+    ys: list[float] = []
+    for x, y in _iter_positions(geom.get("coordinates")):
+        xs.append(x)
+        ys.append(y)
+    if not xs:
+        return None
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def bbox_intersects(a: BBox, b: BBox) -> bool:
+    return a[0] <= b[2] and a[2] >= b[0] and a[1] <= b[3] and a[3] >= b[1]
+
+
+def _ring_contains(ring: list, x: float, y: float) -> bool:
+    # Even-odd ray casting; boundary points are treated as inside by the caller's bbox pre-check
+    inside = False
+    n = len(ring)
+    j = n - 1
+    for i in range(n):
+        xi, yi = ring[i][0], ring[i][1]
+        xj, yj = ring[j][0], ring[j][1]
+        if (yi > y) != (yj > y):
+            x_cross = (xj - xi) * (y - yi) / (yj - yi) + xi
+            if x < x_cross:
+                inside = not inside
+        j = i
+    return inside
+
+
+def _polygon_contains(rings: list, x: float, y: float) -> bool:
+    if not rings or not _ring_contains(rings[0], x, y):
+        return False
+    # Holes punch out the shell
+    return not any(_ring_contains(hole, x, y) for hole in rings[1:])
+
+
+def point_in_geometry(geom: Optional[dict[str, Any]], lon: float, lat: float) -> bool:
+    """Point-in-polygon test for GeoJSON Polygon / MultiPolygon geometries."""
+    if not geom:
+        return False
+    gtype = geom.get("type")
+    coords = geom.get("coordinates") or []
+    if gtype == "Polygon":
+        return _polygon_contains(coords, lon, lat)
+    if gtype == "MultiPolygon":
+        return any(_polygon_contains(poly, lon, lat) for poly in coords)
+    if gtype == "GeometryCollection":
+        return any(point_in_geometry(g, lon, lat) for g in geom.get("geometries") or [])
+    return False
+
+
+def _simplify_line(points: list, tolerance: float) -> list:
+    # Douglas-Peucker with an explicit stack; keeps the first and last position
+    if len(points) < 3:
+        return list(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    tol2 = tolerance * tolerance
+    while stack:
+        first, last = stack.pop()
+        ax, ay = points[first][0], points[first][1]
+        dx, dy = points[last][0] - ax, points[last][1] - ay
+        seg2 = dx * dx + dy * dy
+        worst, worst_d2 = -1, tol2
+        for i in range(first + 1, last):
+            px, py = points[i][0] - ax, points[i][1] - ay
+            if seg2 == 0.0:
+                d2 = px * px + py * py
+            else:
+                t = max(0.0, min(1.0, (px * dx + py * dy) / seg2))
+                ex, ey = px - t * dx, py - t * dy
+                d2 = ex * ex + ey * ey
+            if d2 > worst_d2:
+                worst, worst_d2 = i, d2
+        if worst >= 0:
+            keep[worst] = True
+            stack.append((first, worst))
+            stack.append((worst, last))
+    return [p for p, k in zip(points, keep) if k]
+
+
+def _simplify_ring(ring: list, tolerance: float) -> list:
+    out = _simplify_line(ring, tolerance)
+    # A ring needs 4 positions (3 distinct + closing); keep the original if simplification degenerates it
+    return out if len(out) >= 4 else list(ring)
+
+
+def simplify_geometry(geom: Optional[dict[str, Any]], tolerance: float) -> Optional[dict[str, Any]]:
+    """Douglas-Peucker simplification of Polygon / MultiPolygon rings (tolerance in coordinate units).
+
+    Other geometry types are returned unchanged. Not topology-preserving: neighbouring
+    subzones may no longer share edges exactly, which is fine for thumbnails.
+    """
+    if not geom or tolerance <= 0:
+        return geom
+    gtype = geom.get("type")
+    coords = geom.get("coordinates") or []
+    if gtype == "Polygon":
+        return {"type": gtype, "coordinates": [_simplify_ring(r, tolerance) for r in coords]}
+    if gtype == "MultiPolygon":
+        return {"type": gtype, "coordinates": [[_simplify_ring(r, tolerance) for r in poly] for poly in coords]}
+    return geom
+
+
+def geometry_hash(geom: Optional[dict[str, Any]]) -> Optional[str]:
+    """Content hash of a GeoJSON geometry (key order independent)."""
+    if geom is None:
+        return None
+    canon = json.dumps(geom, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canon.encode("utf-8")).hexdigest()
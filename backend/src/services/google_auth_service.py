@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import jwt
+
+from .log_service import get_logger
+
+log = get_logger("auth.google")
+
+GOOGLE_JWKS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+@dataclass
+class KeySet:
+    keys: dict[str, Any]  # kid -> public key usable by jwt.decode
+    max_age: float  # seconds the response may be cached for
+
+
+# A cert source returns the current Google signing keys. The default fetches the JWKS
+# over HTTPS; tests and local stand-ins can install their own with set_cert_source().
+CertSource = Callable[[], KeySet]
+
+
+def parse_jwks(doc: dict[str, Any], max_age: float) -> KeySet:
+    keys: dict[str, Any] = {}
+    for jwk in doc.get("keys") or []:
+        kid = jwk.get("kid")
+        if not kid or jwk.get("use", "sig") != "sig":
+            continue
+        keys[kid] = jwt.PyJWK(jwk).key
+    return KeySet(keys=keys, max_age=max_age)
+
+
+def max_age_from_headers(headers: Any, default: float) -> float:
+    """Cache lifetime from Cache-Control max-age minus Age, else `default`."""
+    m = _MAX_AGE.search(headers.get("Cache-Control") or "")
+    if not m:
+        return default
+    try:
+        age = float(headers.get("Age") or 0)
+    except ValueError:
+        age = 0.0
+    return max(0.0, float(m.group(1)) - age)
+
+
+def http_cert_source(url: Optional[str] = None, timeout: Optional[float] = None) -> CertSource:
+    url = url or os.getenv("GOOGLE_JWKS_URL", GOOGLE_JWKS_URL)
+    timeout = timeout if timeout is not None else float(os.getenv("GOOGLE_JWKS_TIMEOUT", "5"))
+    default_age = float(os.getenv("GOOGLE_JWKS_DEFAULT_MAX_AGE", "3600"))
+
+    def fetch() -> KeySet:
+        import urllib.request
+
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            doc = json.loads(resp.read().decode("utf-8"))
+            return parse_jwks(doc, max_age_from_headers(resp.headers, default_age))
+
+    return fetch
+
+
+class KeyCache:
+    """Google signing keys, kept until their Cache-Control max-age runs out.
+
+    Lookups never fetch while the cached set is fresh. A key id the cache has not seen
+    (Google rotated keys) triggers at most one synchronous refresh per
+    `min_refresh_interval`; the background refresher renews the set before it expires.
+
+    If refreshing an expired set fails, its keys keep being served for up to `max_stale`
+    seconds past expiry, and lookups retry the fetch with exponential backoff
+    (`retry_base` doubling up to `retry_max`), so a short outage of Google's certs
+    endpoint does not fail every login.
+    """
+
+    def __init__(self, source: CertSource, *, refresh_margin: float = 300.0, min_refresh_interval: float = 30.0,
+                 max_stale: float = 86400.0, retry_base: float = 5.0, retry_max: float = 300.0):
+        self.source = source
+        self.refresh_margin = refresh_margin
+        self.min_refresh_interval = min_refresh_interval
+        self.max_stale = max_stale
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._keys: dict[str, Any] = {}
+        self._expires_at = 0.0
+        self._last_fetch = 0.0
+        self._failures = 0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def expires_at(self) -> float:
+        return self._expires_at
+
+    def fresh(self) -> bool:
+        return bool(self._keys) and time.monotonic() < self._expires_at
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._refresh_locked()
+
+    def _refresh_locked(self) -> None:
+        self._last_fetch = time.monotonic()
+        ks = self.source()
+        self._keys = ks.keys
+        self._expires_at = time.monotonic() + ks.max_age
+        self._failures, self._retry_at = 0, 0.0
+        log.info("google.keys_refreshed", extra={"keys": len(ks.keys), "max_age": ks.max_age})
+
+    def _usable(self, kid: str, now: float) -> bool:
+        if kid not in self._keys:
+            return False
+        if now < self._expires_at:
+            return True
+        # Expired: still served while a failed refresh backs off, within max_stale
+        return now < self._retry_at and now - self._expires_at < self.max_stale
+
+    def get(self, kid: str) -> Any:
+        if self._usable(kid, time.monotonic()):
+            return self._keys[kid]
+        with self._lock:
+            now = time.monotonic()
+            # Another thread may have refreshed while we waited for the lock
+            if self._usable(kid, now):
+                return self._keys[kid]
+            stale = now >= self._expires_at
+            due = stale or now - self._last_fetch >= self.min_refresh_interval
+            if due and now >= self._retry_at:
+                try:
+                    self._refresh_locked()
+                except Exception as e:
+                    self._failures += 1
+                    retry_in = min(self.retry_max, self.retry_base * 2 ** (self._failures - 1))
+                    self._retry_at = now + retry_in
+                    error = f"{type(e).__name__}: {e}"
+                    if stale and self._usable(kid, now):
+                        log.warning("google.keys_stale", extra={
+                            "error": error, "retry_in": retry_in, "stale_seconds": round(now - self._expires_at, 1),
+                        })
+                        return self._keys[kid]
+                    log.warning("google.keys_fetch_failed", extra={"error": error, "retry_in": retry_in})
+                    raise ValueError("Google signing keys unavailable") from e
+            if kid not in self._keys:
+                raise ValueError("Invalid Google token")
+            if not self._usable(kid, now):  # expired beyond max_stale, refresh backing off
+                raise ValueError("Google signing keys unavailable")
+            return self._keys[kid]
+
+    def seconds_until_refresh(self) -> float:
+        if not self._keys:
+            return 0.0
+        return max(0.0, self._expires_at - self.refresh_margin - time.monotonic())
+
+
+_cache: Optional[KeyCache] = None
+_cache_lock = threading.Lock()
+
+
+def _new_cache(source: CertSource) -> KeyCache:
+    return KeyCache(
+        source,
+        refresh_margin=float(os.getenv("GOOGLE_JWKS_REFRESH_MARGIN", "300")),
+        max_stale=float(os.getenv("GOOGLE_JWKS_MAX_STALE", "86400")),
+    )
+
+
+def get_key_cache() -> KeyCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = _new_cache(http_cert_source())
+    return _cache
+
+
+def set_cert_source(source: CertSource) -> KeyCache:
+    """Replace the cert source (e.g. a local stand-in); cached keys are dropped."""
+    global _cache
+    with _cache_lock:
+        _cache = _new_cache(source)
+    return _cache
+
+
+def verify_id_token(token: str, *, audience: str, leeway: float = 10.0) -> dict[str, Any]:
+    """Verify a Google ID token against the cached signing keys. Raises ValueError."""
+    try:
+        header = jwt.get_unverified_header(token)
+    except jwt.PyJWTError as e:
+        raise ValueError("Invalid Google token") from e
+    if header.get("alg") != "RS256" or not header.get("kid"):
+        raise ValueError("Invalid Google token")
+    key = get_key_cache().get(header["kid"])
+    try:
+        payload = jwt.decode(
+            token,
+            key,
+            algorithms=["RS256"],
+            audience=audience,
+            leeway=leeway,
+            options={"require": ["exp", "iat", "iss", "aud", "sub"]},
+        )
+    except jwt.PyJWTError as e:
+        raise ValueError("Invalid Google token") from e
+    if payload.get("iss") not in GOOGLE_ISSUERS:
+        raise ValueError("Invalid Google token")
+    return payload
+
+
+_worker: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+def start_key_refresher() -> Optional[threading.Thread]:
+    """Fetch the keys now and renew them `GOOGLE_JWKS_REFRESH_MARGIN` seconds before expiry.
+
+    Runs only when GOOGLE_CLIENT_ID is set (GOOGLE_JWKS_REFRESH=0 disables it). Failed
+    fetches are retried with backoff while the previous keys stay in use.
+    """
+    global _worker
+    if not os.getenv("GOOGLE_CLIENT_ID") or os.getenv("GOOGLE_JWKS_REFRESH", "1").lower() in ("0", "false", "no"):
+        return None
+    if _worker is not None and _worker.is_alive():
+        return _worker
+
+    def loop() -> None:
+        backoff = 5.0
+        while not _stop.is_set():
+            cache = get_key_cache()
+            try:
+                cache.refresh()
+                backoff = 5.0
+                wait = max(cache.seconds_until_refresh(), 30.0)
+            except Exception as e:
+                log.warning("google.keys_refresh_failed", extra={"error": f"{type(e).__name__}: {e}", "retry_in": backoff})
+                wait, backoff = backoff, min(backoff * 2, 300.0)
+            _stop.wait(wait)
+
+    _stop.clear()
+    _worker = threading.Thread(target=loop, name="google-jwks", daemon=True)
+    _worker.start()
+    return _worker
+
+
+def stop_key_refresher() -> None:
+    _stop.set()
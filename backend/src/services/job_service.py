@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import importlib
+import os
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..db import get_session
+from ..repositories import job_repo
+from .data_service import DATA_DIR
+from .log_service import get_logger
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+log = get_logger("jobs")
+
+# Handlers are resolved by dotted path inside the worker process, so the API process
+# never imports the scoring pipeline. Each takes a JobContext and returns a JSON result.
+HANDLERS = {
+    "refresh": "backend.src.controllers.admin_controller:run_refresh_job",
+    "recompute": "backend.src.controllers.admin_controller:run_recompute_job",
+    "rank_stability": "backend.src.controllers.admin_controller:run_rank_stability_job",
+}
+
+UPLOAD_DIR = DATA_DIR / "jobs"
+
+
+@dataclass
+class JobSettings:
+    workers: int = 1
+    poll_seconds: float = 5.0
+    heartbeat_seconds: float = 15.0
+    stale_seconds: float = 300.0
+
+    @classmethod
+    def from_env(cls) -> "JobSettings":
+        return cls(
+            workers=max(0, int(os.getenv("JOB_WORKERS", "1"))),
+            poll_seconds=float(os.getenv("JOB_POLL_SECONDS", "5")),
+            heartbeat_seconds=float(os.getenv("JOB_HEARTBEAT_SECONDS", "15")),
+            stale_seconds=float(os.getenv("JOB_STALE_SECONDS", "300")),
+        )
+
+
+@dataclass
+class JobContext:
+    """What a handler sees: its job id, parameters and a progress reporter."""
+
+    job_id: str
+    params: dict[str, Any]
+
+    def progress(self, fraction: float, stage: str) -> None:
+        """Record progress (0..1) and the current stage name in a short transaction of its own."""
+        fraction = min(1.0, max(0.0, float(fraction)))
+        try:
+            with get_session() as s:
+                job_repo.update_progress(s, self.job_id, progress=fraction, stage=stage[:200],
+                                         now=datetime.now(timezone.utc))
+        except Exception:
+            log.warning("job.progress_failed", extra={"job_id": self.job_id, "stage": stage})
+
+
+def upload_path(job_id: str) -> Path:
+    return UPLOAD_DIR / f"{job_id}.geojson"
+
+
+def enqueue(
+    session: Session,
+    *,
+    kind: str,
+    params: Optional[dict[str, Any]] = None,
+    created_by: Optional[str] = None,
+    payload: Optional[bytes] = None,
+) -> str:
+    """Queue a job in the caller's transaction. Returns the job id.
+
+    `payload` (e.g. an uploaded GeoJSON) is written to `upload_path(job_id)` rather than
+    the jobs table; the handler reads it from there.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job = job_repo.create_job(session, kind=kind, params=params, created_by=created_by)
+    if payload is not None:
+        path = upload_path(job.id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(payload)
+        tmp.replace(path)
+        _discard_on_rollback(session, path)
+    # Start it as soon as the row is visible instead of at the next poll
+    event.listen(session, "after_commit", lambda _s: wake(), once=True)
+    return job.id
+
+
+def _discard_on_rollback(session: Session, path: Path) -> None:
+    """Delete `path` if the session rolls back instead of committing.
+
+    The upload is written before the job row commits so a worker never claims a job
+    whose payload is not on disk yet; a rollback would otherwise leave it orphaned.
+    """
+    committed = False
+
+    def keep(_s: Session) -> None:
+        nonlocal committed
+        committed = True
+
+    def discard(_s: Session) -> None:
+        if not committed:
+            path.unlink(missing_ok=True)
+
+    event.listen(session, "after_commit", keep, once=True)
+    event.listen(session, "after_rollback", discard, once=True)
+
+
+def to_dict(job: Any) -> dict[str, Any]:
+    def iso(dt: Optional[datetime]) -> Optional[str]:
+        return dt.isoformat() if dt else None
+
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "params": job.params or {},
+        "progress": job.progress,
+        "stage": job.stage,
+        "result": job.result,
+        "error": job.error,
+        "created_by": job.created_by,
+        "created_at": iso(job.created_at),
+        "started_at": iso(job.started_at),
+        "finished_at": iso(job.finished_at),
+    }
+
+
+def _resolve(kind: str) -> Callable[[JobContext], dict[str, Any]]:
+    module, _, name = HANDLERS[kind].partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def run_job(job_id: str, kind: str, params: dict[str, Any]) -> dict[str, Any]:
+    """Entry point in the worker process (or the dispatcher thread with JOB_WORKERS=0)."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return _resolve(kind)(JobContext(job_id=job_id, params=params or {})) or {}
+
+
+def _record_outcome(job_id: str, fut: Future) -> None:
+    now = datetime.now(timezone.utc)
+    try:
+        result = fut.result()
+    except Exception as e:  # noqa: BLE001 - any handler error fails the job
+        error = f"{type(e).__name__}: {e}"[:2000]
+        with get_session() as s:
+            job_repo.fail(s, job_id, error=error, now=now)
+        log.error("job.failed", extra={"job_id": job_id, "error": error})
+        return
+    with get_session() as s:
+        job_repo.finish(s, job_id, result=result, now=now)
+    log.info("job.succeeded", extra={"job_id": job_id})
+
+
+class _Dispatcher:
+    """Claims queued jobs and runs up to `workers` of them at once on a process pool."""
+
+    def __init__(self, settings: JobSettings):
+        self.settings = settings
+        self.running: dict[str, Future] = {}
+        self._pool: Optional["ProcessPoolExecutor"] = None
+
+    def _executor(self) -> "ProcessPoolExecutor":
+        if self._pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # spawn: workers must not inherit the server's threads, sockets or DB pool
+            self._pool = ProcessPoolExecutor(max_workers=self.settings.workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def _submit(self, job_id: str, kind: str, params: dict[str, Any]) -> Future:
+        if self.settings.workers > 0:
+            try:
+                return self._executor().submit(run_job, job_id, kind, params)
+            except Exception:
+                # A crashed worker breaks the pool; start a fresh one for this and later jobs
+                self._pool = None
+                return self._executor().submit(run_job, job_id, kind, params)
+        fut: Future = Future()
+        try:
+            fut.set_result(run_job(job_id, kind, params))
+        except Exception as e:  # noqa: BLE001
+            fut.set_exception(e)
+        return fut
+
+    def reap(self) -> None:
+        for job_id, fut in list(self.running.items()):
+            if fut.done():
+                del self.running[job_id]
+                _record_outcome(job_id, fut)
+
+    def claim(self) -> int:
+        started = 0
+        capacity = max(1, self.settings.workers)
+        while len(self.running) < capacity:
+            with get_session() as s:
+                job = job_repo.claim_next(s, now=datetime.now(timezone.utc))
+                if job is None:
+                    break
+                job_id, kind, params = job.id, job.kind, dict(job.params or {})
+            log.info("job.started", extra={"job_id": job_id, "kind": kind})
+            try:
+                self.running[job_id] = self._submit(job_id, kind, params)
+            except Exception as e:  # noqa: BLE001 - the pool could not start a worker
+                fut: Future = Future()
+                fut.set_exception(e)
+                _record_outcome(job_id, fut)
+                raise
+            started += 1
+            if self.settings.workers == 0:
+                self.reap()
+        return started
+
+    def heartbeat(self) -> None:
+        now = datetime.now(timezone.utc)
+        with get_session() as s:
+            job_repo.heartbeat(s, list(self.running), now=now)
+            stale = job_repo.fail_stale(s, before=now - timedelta(seconds=self.settings.stale_seconds), now=now)
+        if stale:
+            log.warning("job.stale_failed", extra={"jobs": stale})
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_worker: Optional[threading.Thread] = None
+_stop = threading.Event()
+_wake = threading.Event()
+
+
+def wake() -> None:
+    """Nudge the dispatcher to claim queued jobs now instead of at the next poll."""
+    _wake.set()
+
+
+def start_job_runner(settings: Optional[JobSettings] = None) -> Optional[threading.Thread]:
+    """Start the dispatcher thread (JOB_RUNNER=0 disables it, e.g. when a separate process runs jobs)."""
+    global _worker
+    if os.getenv("JOB_RUNNER", "1").lower() in ("0", "false", "no"):
+        return None
+    if _worker is not None and _worker.is_alive():
+        return _worker
+    settings = settings or JobSettings.from_env()
+
+    def loop() -> None:
+        dispatcher = _Dispatcher(settings)
+        last_beat = 0.0
+        while not _stop.is_set():
+            try:
+                dispatcher.reap()
+                if time.monotonic() - last_beat >= settings.heartbeat_seconds:
+                    dispatcher.heartbeat()
+                    last_beat = time.monotonic()
+                dispatcher.claim()
+            except Exception:
+                log.exception("job.dispatch_failed")
+            # Poll faster while jobs run so their outcome is recorded promptly
+            _wake.wait(1.0 if dispatcher.running else settings.poll_seconds)
+            _wake.clear()
+        dispatcher.shutdown()
+
+    _stop.clear()
+    _worker = threading.Thread(target=loop, name="job-runner", daemon=True)
+    _worker.start()
+    return _worker
+
+
+def stop_job_runner() -> None:
+    _stop.set()
+    _wake.set()
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+# One JSON codec for API responses, snapshot exports and ingest parsing.
+# JSON_BACKEND=auto (default) uses orjson, else msgspec, else the standard library;
+# all three produce compact UTF-8 (non-ASCII characters are not escaped) and write
+# NaN/Infinity as null.
+# geometry_service.geometry_hash keeps its own stdlib encoding: stored hashes
+# depend on its exact output.
+
+
+def _select_backend(name: str) -> str:
+    order = ["orjson", "msgspec", "stdlib"] if name == "auto" else [name]
+    for candidate in order:
+        if candidate == "stdlib":
+            return candidate
+        try:
+            __import__(candidate)
+            return candidate
+        except ImportError:
+            continue
+    raise RuntimeError(f"JSON_BACKEND={name} is not installed")
+
+
+BACKEND = _select_backend(os.getenv("JSON_BACKEND", "auto").lower())
+
+if BACKEND == "orjson":
+    import orjson
+
+    # Non-string dict keys and NumPy values are accepted; NaN/Infinity become null
+    _OPTS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=_OPTS)
+
+    def loads(data: bytes | str) -> Any:
+        return orjson.loads(data)
+
+elif BACKEND == "msgspec":
+    import msgspec
+
+    _encoder = msgspec.json.Encoder()
+    _decoder = msgspec.json.Decoder()
+
+    def dumps(obj: Any) -> bytes:
+        return _encoder.encode(obj)
+
+    def loads(data: bytes | str) -> Any:
+        return _decoder.decode(data)
+
+else:
+
+    def _finite(obj: Any) -> Any:
+        if isinstance(obj, float):
+            return obj if math.isfinite(obj) else None
+        if isinstance(obj, dict):
+            return {k: _finite(v) for k, v in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return [_finite(v) for v in obj]
+        return obj
+
+    def dumps(obj: Any) -> bytes:
+        # Bare NaN is not JSON; copy the payload with nulls only when it has non-finite floats
+        try:
+            text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+        except ValueError:
+            text = json.dumps(_finite(obj), ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+        return text.encode("utf-8")
+
+    def loads(data: bytes | str) -> Any:
+        return json.loads(data)
+
+
+_decoders: dict[type, Any] = {}
+
+
+def decode_struct(data: bytes | str, struct: type) -> Any:
+    """Decode straight into a msgspec Struct (see schemas/geojson_schemas.py). Raises ValueError.
+
+    Typed decoding validates while parsing and skips the intermediate dicts a generic
+    decode followed by validation would build.
+    """
+    import msgspec
+
+    decoder = _decoders.get(struct)
+    if decoder is None:
+        decoder = _decoders[struct] = msgspec.json.Decoder(struct)
+    try:
+        return decoder.decode(data)
+    except msgspec.ValidationError as e:
+        raise ValueError(f"Invalid {struct.__name__}: {e}") from e
+    except msgspec.DecodeError as e:
+        raise ValueError(f"Invalid JSON: {e}") from e
+
+
+def feature_collection_dict(fc: Any) -> dict[str, Any]:
+    """Plain-dict form of a FeatureCollection struct (properties/geometry are not copied)."""
+    out: dict[str, Any] = {"type": fc.type}
+    if fc.name is not None:
+        out["name"] = fc.name
+    if fc.crs is not None:
+        out["crs"] = fc.crs
+    features = []
+    for f in fc.features:
+        feat = {"type": f.type, "properties": f.properties, "geometry": f.geometry}
+        if f.id is not None:
+            feat["id"] = f.id
+        features.append(feat)
+    out["features"] = features
+    return out
+
+
+def decode_feature_collection(data: bytes | str) -> dict[str, Any]:
+    """Decode and validate a GeoJSON FeatureCollection. Raises ValueError."""
+    from ..schemas.geojson_schemas import FeatureCollection
+
+    return feature_collection_dict(decode_struct(data, FeatureCollection))
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the configured backend (the app's default response class)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
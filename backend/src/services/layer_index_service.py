@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import math
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Hashable, Optional
+
+from .geometry_service import BBox, bbox_intersects, geometry_bbox
+from .json_service import dumps as _dumps, loads
+
+EMPTY_FC = b'{"type":"FeatureCollection","features":[]}'
+
+# Grid cell size in degrees (~1.1 km at Singapore's latitude)
+CELL_DEG = float(os.getenv("LAYER_INDEX_CELL_DEG", "0.01"))
+# Viewports are snapped outward to this step so nearby pans share cache entries
+SNAP_DEG = float(os.getenv("BBOX_SNAP_DEG", "0.001"))
+RESPONSE_CACHE_SIZE = int(os.getenv("BBOX_CACHE_SIZE", "256"))
+
+_LON_KEYS = ("Longitude", "longitude", "lon", "LON", "lng")
+_LAT_KEYS = ("Latitude", "latitude", "lat", "LAT")
+
+
+def _is_projected(fc: dict[str, Any]) -> bool:
+    name = (((fc.get("crs") or {}).get("properties") or {}).get("name") or "").upper()
+    return bool(name) and "CRS84" not in name and "4326" not in name
+
+
+def _feature_bbox(feat: dict[str, Any], projected: bool) -> Optional[BBox]:
+    if projected:
+        # Projected layers (e.g. bus stops in EPSG:3414) carry WGS84 lon/lat in properties
+        props = feat.get("properties") or {}
+        lon = next((props[k] for k in _LON_KEYS if props.get(k) is not None), None)
+        lat = next((props[k] for k in _LAT_KEYS if props.get(k) is not None), None)
+        try:
+            x, y = float(lon), float(lat)
+        except (TypeError, ValueError):
+            return None
+        return (x, y, x, y)
+    return geometry_bbox(feat.get("geometry"))
+
+
+def snap_bbox(bbox: BBox, step: float = SNAP_DEG) -> BBox:
+    """Expand a bbox outward to a fixed grid so near-identical viewports hit the same cache key."""
+    if step <= 0:
+        return bbox
+    return (
+        round(math.floor(bbox[0] / step) * step, 6),
+        round(math.floor(bbox[1] / step) * step, 6),
+        round(math.ceil(bbox[2] / step) * step, 6),
+        round(math.ceil(bbox[3] / step) * step, 6),
+    )
+
+
+class GridIndex:
+    """Uniform grid over feature envelopes; candidates are refined by an exact bbox test."""
+
+    def __init__(self, bboxes: list[Optional[BBox]], cell: float = CELL_DEG):
+        self.cell = cell
+        self.bboxes = bboxes
+        self.cells: dict[tuple[int, int], list[int]] = {}
+        for i, b in enumerate(bboxes):
+            if b is None:
+                continue
+            for key in self._cells_for(b):
+                self.cells.setdefault(key, []).append(i)
+        # Extent of populated cells; queries are clamped to it so a whole-world bbox stays cheap
+        self.extent: Optional[BBox] = None
+        if self.cells:
+            xs = [k[0] for k in self.cells]
+            ys = [k[1] for k in self.cells]
+            self.extent = (min(xs) * cell, min(ys) * cell, (max(xs) + 1) * cell, (max(ys) + 1) * cell)
+
+    def _cells_for(self, b: BBox):
+        x0, y0 = int(math.floor(b[0] / self.cell)), int(math.floor(b[1] / self.cell))
+        x1, y1 = int(math.floor(b[2] / self.cell)), int(math.floor(b[3] / self.cell))
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                yield (cx, cy)
+
+    def query(self, bbox: BBox) -> list[int]:
+        if self.extent is None or not bbox_intersects(self.extent, bbox):
+            return []
+        walk = (
+            max(bbox[0], self.extent[0]),
+            max(bbox[1], self.extent[1]),
+            min(bbox[2], self.extent[2]),
+            min(bbox[3], self.extent[3]),
+        )
+        hits: set[int] = set()
+        for key in self._cells_for(walk):
+            for i in self.cells.get(key, ()):
+                b = self.bboxes[i]
+                if b is not None and bbox_intersects(b, bbox):
+                    hits.add(i)
+        return sorted(hits)
+
+
+class LayerIndex:
+    """Pre-encoded features of one GeoJSON layer plus a grid index over their envelopes."""
+
+    def __init__(self, fc: dict[str, Any]):
+        projected = _is_projected(fc)
+        self.features: list[dict[str, Any]] = list(fc.get("features") or [])
+        self.encoded: list[bytes] = [_dumps(f) for f in self.features]
+        self.index = GridIndex([_feature_bbox(f, projected) for f in self.features])
+        # Keep top-level members (e.g. name, crs) so filtered output mirrors the source
+        self.header = {k: v for k, v in fc.items() if k not in ("type", "features")}
+
+    def query(self, bbox: BBox) -> list[int]:
+        return self.index.query(bbox)
+
+    def to_bytes(self, ids: list[int]) -> bytes:
+        head = b'{"type":"FeatureCollection",'
+        for k, v in self.header.items():
+            head += _dumps(k) + b":" + _dumps(v) + b","
+        return head + b'"features":[' + b",".join(self.encoded[i] for i in ids) + b"]}"
+
+
+class _LRU:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        with self.lock:
+            if key not in self.data:
+                return None
+            self.data.move_to_end(key)
+            return self.data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.data.clear()
+
+
+_layers = _LRU(16)
+_responses = _LRU(RESPONSE_CACHE_SIZE)
+
+
+def file_layer(path: Path) -> tuple[Hashable, LayerIndex]:
+    """Return (version, index) for a GeoJSON file, rebuilding when the file changes."""
+    st = path.stat()
+    version = (str(path), st.st_mtime_ns, st.st_size)
+    layer = _layers.get(version)
+    if layer is None:
+        layer = LayerIndex(loads(path.read_bytes()))
+        _layers.put(version, layer)
+    return version, layer
+
+
+def snapshot_layer(snapshot_id: str, loader: Callable[[], dict[str, Any]]) -> tuple[Hashable, LayerIndex]:
+    """Return (version, index) for a DB snapshot; snapshots are immutable so the id is the version."""
+    version = ("snapshot", snapshot_id)
+    layer = _layers.get(version)
+    if layer is None:
+        layer = LayerIndex(loader())
+        _layers.put(version, layer)
+    return version, layer
+
+
+def cached_response(key: Hashable, build: Callable[[], bytes]) -> bytes:
+    body = _responses.get(key)
+    if body is None:
+        body = build()
+        _responses.put(key, body)
+    return body
+
+
+def filtered_layer_bytes(version: Hashable, layer: LayerIndex, bbox: BBox) -> bytes:
+    """Serialize only the features intersecting bbox; cached per layer version + snapped bbox."""
+    box = snap_bbox(bbox)
+    return cached_response((version, box), lambda: layer.to_bytes(layer.query(box)))
+
+
+def filtered_file_bytes(path: Path, bbox: BBox) -> bytes:
+    version, layer = file_layer(path)
+    return filtered_layer_bytes(version, layer, bbox)
+
+
+def encode_fc(fc: dict[str, Any]) -> bytes:
+    return _dumps(fc)
+
+
+def clear_caches() -> None:
+    _layers.clear()
+    _responses.clear()
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+
+from .log_service import get_logger
+
+log = get_logger("http")
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+_LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 40.0, 80.0, 120.0)
+
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by route template",
+    ["method", "route", "status"], buckets=_LATENCY_BUCKETS,
+)
+HTTP_RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Response body size by route template",
+    ["method", "route"], buckets=_SIZE_BUCKETS,
+)
+HTTP_IN_PROGRESS = Gauge("http_requests_in_progress", "Requests currently being served", ["method"])
+HTTP_DB_TIME = Histogram(
+    "http_request_db_seconds", "Total DB time spent inside one request",
+    ["route"], buckets=_LATENCY_BUCKETS,
+)
+DB_QUERY_TIME = Histogram("db_query_duration_seconds", "Single SQL statement latency", buckets=_LATENCY_BUCKETS)
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed")
+LLM_TTFT = Histogram(
+    "llm_time_to_first_token_seconds", "Time until the first streamed token from the LLM",
+    ["model"], buckets=_LLM_BUCKETS,
+)
+LLM_DURATION = Histogram(
+    "llm_request_duration_seconds", "Total LLM request time",
+    ["model", "stream"], buckets=_LLM_BUCKETS,
+)
+LLM_TOKENS_PER_SECOND = Histogram(
+    "llm_tokens_per_second", "LLM generation throughput",
+    ["model"], buckets=(1, 2, 5, 10, 20, 40, 80, 160, 320),
+)
+LLM_ERRORS = Counter("llm_errors_total", "LLM request failures", ["model", "kind"])
+
+# Per-request DB accumulator. A mutable dict is used so updates made in threadpool
+# workers (sync endpoints run with a copied context) are visible to the middleware.
+_request_db: ContextVar[Optional[dict[str, float]]] = ContextVar("_request_db", default=None)
+
+
+def instrument_engine(engine: Any) -> None:
+    """Attach SQLAlchemy cursor hooks that time every statement on `engine`."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):  # noqa: ANN001
+        conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):  # noqa: ANN001
+        starts = conn.info.get("_query_start")
+        if not starts:
+            return
+        dt = time.perf_counter() - starts.pop()
+        DB_QUERY_TIME.observe(dt)
+        DB_QUERIES.inc()
+        acc = _request_db.get()
+        if acc is not None:
+            acc["seconds"] += dt
+            acc["queries"] += 1
+
+
+def observe_llm(model: str, *, stream: bool, duration: float, ttft: Optional[float] = None,
+                eval_count: Optional[int] = None, eval_duration_ns: Optional[int] = None) -> None:
+    """Record one LLM call. Throughput uses Ollama's eval counters when present."""
+    LLM_DURATION.labels(model=model, stream=str(stream).lower()).observe(duration)
+    if ttft is not None:
+        LLM_TTFT.labels(model=model).observe(ttft)
+    tps = None
+    if eval_count and eval_duration_ns:
+        tps = eval_count / (eval_duration_ns / 1e9)
+    elif eval_count and duration > 0:
+        tps = eval_count / duration
+    if tps is not None:
+        LLM_TOKENS_PER_SECOND.labels(model=model).observe(tps)
+    get_logger("chat.llm").info(
+        "llm.completed",
+        extra={"model": model, "stream": stream, "duration_s": round(duration, 3),
+               "ttft_s": None if ttft is None else round(ttft, 3),
+               "tokens": eval_count, "tokens_per_s": None if tps is None else round(tps, 1)},
+    )
+
+
+def _route_template(scope: dict) -> str:
+    """Matched route template incl. router prefix, e.g. /admin/snapshots/{snapshot_id}/restore."""
+    route_path = getattr(scope.get("route"), "path", None)
+    if not route_path:
+        return "unmatched"
+    path = scope.get("path", "")
+    try:
+        rendered = route_path.format(**(scope.get("path_params") or {}))
+    except (KeyError, IndexError, ValueError):
+        return route_path
+    # Routers mounted under a prefix report the route path without it
+    if path.endswith(rendered):
+        return path[: len(path) - len(rendered)] + route_path
+    return route_path
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (safe for streaming responses) recording latency, size and DB time."""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope.get("path") == "/metrics":
+            await self.app(scope, receive, send)
+            return
+        method = scope.get("method", "GET")
+        start = time.perf_counter()
+        acc = {"seconds": 0.0, "queries": 0}
+        token = _request_db.set(acc)
+        state = {"status": 500, "size": 0}
+
+        async def send_wrapper(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                state["size"] += len(message.get("body") or b"")
+            await send(message)
+
+        HTTP_IN_PROGRESS.labels(method=method).inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_PROGRESS.labels(method=method).dec()
+            _request_db.reset(token)
+            duration = time.perf_counter() - start
+            # Route template (e.g. /admin/snapshots/{snapshot_id}/restore) keeps label cardinality bounded
+            route = _route_template(scope)
+            HTTP_LATENCY.labels(method=method, route=route, status=str(state["status"])).observe(duration)
+            HTTP_RESPONSE_SIZE.labels(method=method, route=route).observe(state["size"])
+            HTTP_DB_TIME.labels(route=route).observe(acc["seconds"])
+            log.debug(
+                "http.request",
+                extra={"method": method, "route": route, "status": state["status"],
+                       "duration_ms": round(duration * 1000, 2), "bytes": state["size"],
+                       "db_ms": round(acc["seconds"] * 1000, 2), "db_queries": acc["queries"]},
+            )
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Prometheus exposition. Aggregates across workers when PROMETHEUS_MULTIPROC_DIR is set."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
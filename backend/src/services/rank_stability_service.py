@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import math
+import os
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Iterable, Optional
+
+from .log_service import get_logger
+
+if TYPE_CHECKING:
+    import numpy as np
+
+log = get_logger("rank_stability")
+
+# Monte Carlo rank stability of H_score. Each sample draws a weight vector around the
+# published weights and adds Gaussian noise to the three inputs, then re-standardizes
+# the inputs, rescores and dense-ranks every subzone, as ScoreComputing.compute_scores
+# does once. A subzone's rank interval is the central `level`% of its ranks across
+# samples. All samples are computed as (samples, subzones) NumPy arrays; chunks of
+# samples only bound memory.
+#
+# Inputs are the stored z-scores (Dem, Sup, Acc). Noise of `input_noise` therefore means
+# that many standard deviations of the raw input, which re-standardizing makes exact.
+# The min-max rescaling of H_score is skipped: it does not change ranks.
+INPUTS = ("Dem", "Sup", "Acc")
+BASE_WEIGHTS = (0.5, 0.3, 0.2)  # w_dem, w_sup, w_acc in ScoreComputing.compute_scores
+SIGNS = (1.0, -1.0, 1.0)  # supply counts against opportunity
+
+
+@dataclass
+class StabilitySettings:
+    samples: int = 10_000
+    concentration: float = 100.0  # Dirichlet concentration around BASE_WEIGHTS; higher = tighter
+    input_noise: float = 0.1  # per-input noise, in standard deviations of that input
+    level: float = 90.0  # width of the central rank interval, in percent
+    seed: Optional[int] = 0  # fixed by default so re-ingesting a snapshot gives the same intervals
+    chunk_cells: int = 4_000_000  # noisy input values held at once (samples x subzones x inputs)
+    max_ranks: int = 50_000_000  # cap on samples x subzones (int32 ranks kept for the quantiles)
+
+    @classmethod
+    def from_env(cls) -> "StabilitySettings":
+        seed = os.getenv("RANK_STABILITY_SEED", "0")
+        return cls(
+            samples=max(0, int(os.getenv("RANK_STABILITY_SAMPLES", "10000"))),
+            concentration=float(os.getenv("RANK_STABILITY_CONCENTRATION", "100")),
+            input_noise=float(os.getenv("RANK_STABILITY_INPUT_NOISE", "0.1")),
+            seed=int(seed) if seed else None,
+        )
+
+
+def dense_rank_desc(h: "np.ndarray") -> "np.ndarray":
+    """Dense ranks (1 = highest) along the last axis, like pandas rank(method="dense", ascending=False)."""
+    import numpy as np
+
+    order = np.argsort(-h, axis=-1, kind="stable")
+    ordered = np.take_along_axis(h, order, axis=-1)
+    step = np.ones(ordered.shape, dtype=np.int32)
+    step[..., 1:] = ordered[..., 1:] != ordered[..., :-1]
+    ranks = np.empty_like(step)
+    np.put_along_axis(ranks, order, np.cumsum(step, axis=-1, dtype=np.int32), axis=-1)
+    return ranks
+
+
+def zscores(x: "np.ndarray") -> "np.ndarray":
+    """Standardize along axis -2 (subzones) with ddof=0; constant columns become 0."""
+    import numpy as np
+
+    mu = x.mean(axis=-2, keepdims=True)
+    sd = x.std(axis=-2, keepdims=True)
+    return np.where(sd > 0, (x - mu) / np.where(sd > 0, sd, 1.0), 0.0)
+
+
+def sample_weights(rng: "np.random.Generator", samples: int, concentration: float) -> "np.ndarray":
+    """(samples, 3) weight vectors summing to 1, centred on BASE_WEIGHTS."""
+    import numpy as np
+
+    if not math.isfinite(concentration):
+        return np.tile(np.asarray(BASE_WEIGHTS), (samples, 1))
+    return rng.dirichlet(concentration * np.asarray(BASE_WEIGHTS), size=samples)
+
+
+def simulate_ranks(
+    x: "np.ndarray",
+    weights: "np.ndarray",
+    *,
+    input_noise: float,
+    rng: "np.random.Generator",
+    chunk_cells: int = 4_000_000,
+) -> "np.ndarray":
+    """(samples, subzones) dense ranks of H for inputs x (subzones, 3) under each weight row.
+
+    Noise is drawn in sample order, so the result does not depend on the chunk size.
+    """
+    import numpy as np
+
+    samples, (n, k) = len(weights), x.shape
+    signed = weights * np.asarray(SIGNS)
+    ranks = np.empty((samples, n), dtype=np.int32)
+    chunk = max(1, chunk_cells // (n * k))
+    for start in range(0, samples, chunk):
+        w = signed[start:start + chunk]
+        noisy = np.broadcast_to(x, (len(w), n, k))
+        if input_noise > 0:
+            noisy = noisy + input_noise * rng.standard_normal((len(w), n, k))
+        h = np.einsum("snk,sk->sn", zscores(noisy), w)
+        ranks[start:start + chunk] = dense_rank_desc(h)
+    return ranks
+
+
+def _inputs(rows: Iterable[dict[str, Any]]) -> tuple[list[str], list[list[float]]]:
+    ids, values = [], []
+    for r in rows:
+        v = [r.get(c) for c in INPUTS]
+        if r.get("subzone") and all(_is_number(x) for x in v):
+            ids.append(r["subzone"])
+            values.append(v)
+    return ids, values
+
+
+def rank_intervals(rows: Iterable[dict[str, Any]], settings: Optional[StabilitySettings] = None) -> Optional[dict[str, Any]]:
+    """Rank intervals for attribute rows shaped like subzone_repo.select_subzones().
+
+    Returns {"params": ..., "intervals": {subzone: {"lo", "median", "hi"}}}, or None when
+    sampling is disabled or fewer than two rows have all inputs. Rows missing an input
+    are left out of the simulation. params["samples"] is the number actually drawn, which
+    is below params["requested_samples"] when `max_ranks` caps a large snapshot.
+    """
+    import numpy as np
+
+    settings = settings or StabilitySettings.from_env()
+    ids, values = _inputs(rows)
+    if settings.samples <= 0 or len(ids) < 2:
+        return None
+    samples = min(settings.samples, max(1, settings.max_ranks // len(ids)))
+    if samples < settings.samples:
+        log.warning("rank_stability.samples_capped", extra={
+            "requested": settings.samples, "samples": samples, "subzones": len(ids), "max_ranks": settings.max_ranks,
+        })
+    rng = np.random.default_rng(settings.seed)
+    weights = sample_weights(rng, samples, settings.concentration)
+    ranks = simulate_ranks(np.asarray(values, dtype=float), weights, input_noise=settings.input_noise,
+                           rng=rng, chunk_cells=settings.chunk_cells)
+    tail = (100.0 - settings.level) / 2
+    lo, median, hi = np.percentile(ranks, [tail, 50.0, 100.0 - tail], axis=0, method="nearest")
+    params = {**asdict(settings), "samples": samples, "requested_samples": settings.samples, "subzones": len(ids)}
+    for key in ("chunk_cells", "max_ranks"):
+        params.pop(key)
+    return {
+        "params": params,
+        "intervals": {
+            zid: {"lo": int(a), "median": int(b), "hi": int(c)} for zid, a, b, c in zip(ids, lo, median, hi)
+        },
+    }
+
+
+def _is_number(v: Any) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v)
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import gzip
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..db import autocommit_connection, get_session
+from ..repositories import geometry_repo, snapshot_repo, subzone_repo
+from . import auth_service, json_service, snapshot_service
+from .data_service import DATA_DIR
+from .log_service import get_logger
+
+log = get_logger("retention")
+
+# Arbitrary constant so only one worker process runs retention at a time
+_ADVISORY_LOCK_KEY = 2006_0030
+
+
+@dataclass
+class RetentionPolicy:
+    enabled: bool = False  # background archival; run_retention() itself always applies the policy
+    keep_last: int = 10
+    keep_tagged: bool = True
+    archive_dir: Path = DATA_DIR / "archive"
+    export_dir: Path = DATA_DIR / "out"
+    batch_size: int = 500
+    interval_seconds: int = 3600
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        return cls(
+            enabled=os.getenv("SNAPSHOT_RETENTION_ENABLED", "0").lower() in ("1", "true", "yes"),
+            keep_last=max(1, int(os.getenv("SNAPSHOT_KEEP_LAST", "10"))),
+            keep_tagged=os.getenv("SNAPSHOT_KEEP_TAGGED", "1").lower() not in ("0", "false", "no"),
+            archive_dir=Path(os.getenv("SNAPSHOT_ARCHIVE_DIR", str(DATA_DIR / "archive"))),
+            batch_size=max(1, int(os.getenv("SNAPSHOT_RETENTION_BATCH", "500"))),
+            interval_seconds=int(os.getenv("SNAPSHOT_RETENTION_INTERVAL", "3600")),
+        )
+
+
+def select_expired(live: list[tuple[str, bool, Optional[str]]], policy: RetentionPolicy) -> list[str]:
+    """Pick snapshots to archive from (id, is_current, tag) rows ordered newest first.
+
+    Keeps the current snapshot, the newest `keep_last`, and tagged snapshots.
+    """
+    expired: list[str] = []
+    for i, (sid, is_current, tag) in enumerate(live):
+        if is_current or i < policy.keep_last or (policy.keep_tagged and tag):
+            continue
+        expired.append(sid)
+    return expired
+
+
+def archive_path_for(policy: RetentionPolicy, snapshot_id: str) -> Path:
+    return policy.archive_dir / f"{snapshot_id}.geojson.gz"
+
+
+def write_archive(session: Session, snapshot_id: str, path: Path) -> Path:
+    """Write the snapshot's FeatureCollection (plus metadata) to a gzip file atomically."""
+    snap = snapshot_repo.get_snapshot(session, snapshot_id)
+    fc = subzone_repo.select_features_fc(session, snapshot_id)
+    fc["snapshot"] = {
+        "id": snapshot_id,
+        "created_at": snap.created_at.isoformat() if snap and snap.created_at else None,
+        "created_by": snap.created_by if snap else None,
+        "note": snap.note if snap else None,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with gzip.open(tmp, "wb") as fh:
+        fh.write(json_service.dumps(fc))
+    os.replace(tmp, path)
+    return path
+
+
+def archive_snapshot(snapshot_id: str, policy: RetentionPolicy) -> Optional[int]:
+    """Archive one snapshot to disk, then delete its subzone rows in bounded batches.
+
+    The snapshot row is locked and re-checked first: one that became current or was
+    tagged since it was selected is skipped. Each batch commits on its own so the live
+    table is never locked for long, and stops if the snapshot was restored meanwhile.
+    The snapshot's versioned artifacts and columnar store are removed; restoring rewrites
+    them. Returns the number of rows deleted, or None when the snapshot was skipped.
+    """
+    path = archive_path_for(policy, snapshot_id)
+    with get_session() as s:
+        snap = snapshot_repo.lock_snapshot(s, snapshot_id)
+        if snap is None or snap.archived_at is not None or snap.is_current or (policy.keep_tagged and snap.tag):
+            log.info("retention.skipped", extra={"snapshot_id": snapshot_id})
+            return None
+        write_archive(s, snapshot_id, path)
+        snapshot_repo.mark_archived(s, snapshot_id, str(path))
+    snapshot_service.remove_artifacts(policy.export_dir, snapshot_id)
+    deleted = 0
+    while True:
+        with get_session() as s:
+            snap = snapshot_repo.lock_snapshot(s, snapshot_id)
+            if snap is None or snap.archived_at is None:
+                break
+            n = subzone_repo.delete_batch(s, snapshot_id, policy.batch_size)
+        deleted += n
+        if n < policy.batch_size:
+            break
+    return deleted
+
+
+def purge_orphan_geometries(policy: RetentionPolicy) -> int:
+    purged = 0
+    while True:
+        with get_session() as s:
+            n = geometry_repo.delete_orphans(s, policy.batch_size)
+        purged += n
+        if n < policy.batch_size:
+            break
+    return purged
+
+
+def run_retention(policy: Optional[RetentionPolicy] = None) -> dict[str, Any]:
+    """Apply the retention policy once. Safe to call from several workers concurrently.
+
+    The advisory lock is session-level on an autocommit connection, so it spans the
+    run without holding a transaction open; each archival step commits on its own.
+    """
+    policy = policy or RetentionPolicy.from_env()
+    with autocommit_connection() as lock_conn:
+        got = lock_conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": _ADVISORY_LOCK_KEY}).scalar()
+        if not got:
+            return {"skipped": True, "archived": [], "rows_deleted": 0, "geometries_purged": 0}
+        try:
+            with get_session() as s:
+                expired = select_expired(snapshot_repo.list_live_snapshots(s), policy)
+            rows = 0
+            archived = []
+            for sid in expired:
+                deleted = archive_snapshot(sid, policy)
+                if deleted is not None:
+                    archived.append(sid)
+                    rows += deleted
+            purged = purge_orphan_geometries(policy) if archived else 0
+            return {"skipped": False, "archived": archived, "rows_deleted": rows, "geometries_purged": purged}
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": _ADVISORY_LOCK_KEY})
+
+
+def restore_archived(session: Session, snapshot_id: str) -> int:
+    """Re-ingest an archived snapshot's rows from its archive file. Returns rows inserted.
+
+    Any artifacts or columnar store left for the snapshot are removed first, so they are
+    rebuilt from the restored rows.
+    """
+    # Locked so a concurrent archive_snapshot either finishes marking it first or sees it restored
+    snap = snapshot_repo.lock_snapshot(session, snapshot_id)
+    if not snap or not snap.archived_at:
+        return 0
+    if not snap.archive_path or not Path(snap.archive_path).exists():
+        raise ValueError("Snapshot archive file is missing")
+    with gzip.open(snap.archive_path, "rb") as fh:
+        fc = json_service.loads(fh.read())
+    snapshot_service.remove_artifacts(DATA_DIR / "out", snapshot_id)
+    inserted = snapshot_service.bulk_ingest_geojson(session, fc, snapshot_id)
+    snapshot_repo.clear_archived(session, snapshot_id)
+    return inserted
+
+
+_worker: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+def start_retention_worker(policy: Optional[RetentionPolicy] = None) -> Optional[threading.Thread]:
+    """Start a daemon thread running every `interval_seconds` (0 disables).
+
+    It always purges expired user tokens; it archives snapshots only when the policy
+    is enabled (SNAPSHOT_RETENTION_ENABLED=1).
+    """
+    global _worker
+    policy = policy or RetentionPolicy.from_env()
+    if policy.interval_seconds <= 0 or (_worker is not None and _worker.is_alive()):
+        return _worker
+
+    def loop() -> None:
+        while not _stop.wait(policy.interval_seconds):
+            try:
+                result = run_retention(policy) if policy.enabled else {"archived": []}
+                if result["archived"]:
+                    log.info("retention.archived", extra={
+                        "snapshots": result["archived"],
+                        "rows_deleted": result["rows_deleted"],
+                        "geometries_purged": result["geometries_purged"],
+                    })
+            except Exception:
+                log.exception("retention.failed")
+            try:
+                purged = auth_service.purge_expired_user_tokens()
+                if purged:
+                    log.info("retention.user_tokens_purged", extra={"rows": purged})
+            except Exception:
+                log.exception("retention.user_tokens_failed")
+
+    _stop.clear()
+    _worker = threading.Thread(target=loop, name="snapshot-retention", daemon=True)
+    _worker.start()
+    return _worker
+
+
+def stop_retention_worker() -> None:
+    _stop.set()
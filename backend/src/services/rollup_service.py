@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import bisect
+import math
+from typing import Any, Iterable, Optional
+
+# Per-snapshot aggregates, computed once at ingest and stored in snapshot_rollups so
+# summary questions (largest population, planning-area totals, distributions) never
+# scan the subzone rows. One rollup covers the whole snapshot (planning_area ALL_AREAS)
+# and one each planning area.
+#
+#   stats[metric] = {count, sum, mean, min, min_subzone, min_rank, max, max_subzone, max_rank,
+#                    p10, p25, p50, p75, p90}     (min_rank/max_rank: H_rank of that subzone)
+#   rank_bands    = {"1-10": n, "11-50": n, "51-100": n, "101+": n}  subzones per H_rank band
+ALL_AREAS = ""
+
+METRICS = (
+    "population", "pop_0_25", "pop_25_65", "pop_65plus",
+    "hawker", "mrt", "bus",
+    "H_score", "Dem", "Sup", "Acc",
+)
+PERCENTILES = (10, 25, 50, 75, 90)
+RANK_BANDS = ((1, 10), (11, 50), (51, 100), (101, None))
+
+
+def percentile(sorted_values: list[float], q: float) -> Optional[float]:
+    """Linear-interpolated percentile of pre-sorted values (NumPy's default method)."""
+    if not sorted_values:
+        return None
+    pos = (len(sorted_values) - 1) * q / 100.0
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def percentile_rank(sorted_values: list[float], value: Any) -> Optional[float]:
+    """Share of values <= `value`, in percent (0-100, one decimal); None for missing values."""
+    if not sorted_values or not _is_number(value):
+        return None
+    return round(100.0 * bisect.bisect_right(sorted_values, value) / len(sorted_values), 1)
+
+
+def band_label(lo: int, hi: Optional[int]) -> str:
+    return f"{lo}-{hi}" if hi is not None else f"{lo}+"
+
+
+def _metric_stats(rows: list[dict[str, Any]], metric: str) -> dict[str, Any]:
+    pairs = [(r[metric], r["subzone"], r.get("H_rank")) for r in rows if _is_number(r.get(metric))]
+    if not pairs:
+        return {"count": 0}
+    values = sorted(p[0] for p in pairs)
+    # Ties go to the first subzone by name, so results do not depend on row order
+    lo = min(pairs, key=lambda p: (p[0], p[1]))
+    hi = min(pairs, key=lambda p: (-p[0], p[1]))
+    total = sum(values) if all(isinstance(v, int) for v in values) else math.fsum(values)
+    out = {
+        "count": len(values),
+        "sum": total,
+        "mean": total / len(values),
+        "min": lo[0],
+        "min_subzone": lo[1],
+        "min_rank": lo[2],
+        "max": hi[0],
+        "max_subzone": hi[1],
+        "max_rank": hi[2],
+    }
+    for q in PERCENTILES:
+        out[f"p{q}"] = percentile(values, q)
+    return out
+
+
+def _rank_bands(rows: list[dict[str, Any]]) -> dict[str, int]:
+    bands = {band_label(lo, hi): 0 for lo, hi in RANK_BANDS}
+    for r in rows:
+        rank = r.get("H_rank")
+        if not _is_number(rank):
+            continue
+        for lo, hi in RANK_BANDS:
+            if rank >= lo and (hi is None or rank <= hi):
+                bands[band_label(lo, hi)] += 1
+                break
+    return bands
+
+
+def rollup(rows: list[dict[str, Any]], planning_area: str = ALL_AREAS) -> dict[str, Any]:
+    return {
+        "planning_area": planning_area,
+        "subzones": len(rows),
+        "stats": {m: _metric_stats(rows, m) for m in METRICS},
+        "rank_bands": _rank_bands(rows),
+    }
+
+
+def compute_rollups(rows: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Rollups for the whole snapshot and each planning area.
+
+    rows: attribute rows shaped like subzone_repo.select_subzones().
+    """
+    rows = list(rows)
+    areas: dict[str, list[dict[str, Any]]] = {}
+    for r in rows:
+        if r.get("planning_area"):
+            areas.setdefault(r["planning_area"], []).append(r)
+    return [rollup(rows)] + [rollup(area_rows, area) for area, area_rows in sorted(areas.items())]
+
+
+def _is_number(v: Any) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v)
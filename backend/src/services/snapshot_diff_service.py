@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Iterable, Optional
+
+# Attribute columns compared between snapshots (keys as returned by subzone_repo.select_attribute_rows)
+DIFF_ATTRIBUTES = (
+    "planning_area",
+    "population",
+    "pop_0_25",
+    "pop_25_65",
+    "pop_65plus",
+    "hawker",
+    "mrt",
+    "bus",
+    "H_score",
+    "H_rank",
+    "Dem",
+    "Sup",
+    "Acc",
+)
+
+
+def _same(a: Any, b: Any) -> bool:
+    if isinstance(a, float) or isinstance(b, float):
+        if a is None or b is None:
+            return a is b
+        return math.isclose(float(a), float(b), rel_tol=1e-9, abs_tol=1e-12)
+    return a == b
+
+
+def diff_rows(
+    old_rows: Iterable[dict[str, Any]],
+    new_rows: Iterable[dict[str, Any]],
+) -> dict[str, Any]:
+    """Compare two snapshots' attribute rows keyed by `subzone`.
+
+    Each row carries the DIFF_ATTRIBUTES plus a `geom_hash`. Returns
+    { added: [ids], removed: [ids], changed: [ {subzone, attributes, rank_from, rank_to,
+      rank_delta, geometry_changed} ], unchanged: int }.
+    rank_delta is positive when a subzone moved up (towards rank 1).
+    """
+    old = {r["subzone"]: r for r in old_rows}
+    new = {r["subzone"]: r for r in new_rows}
+
+    added = sorted(k for k in new if k not in old)
+    removed = sorted(k for k in old if k not in new)
+    changed: list[dict[str, Any]] = []
+    unchanged = 0
+    for sid in sorted(k for k in new if k in old):
+        a, b = old[sid], new[sid]
+        attrs = {
+            k: [a.get(k), b.get(k)]
+            for k in DIFF_ATTRIBUTES
+            if not _same(a.get(k), b.get(k))
+        }
+        geometry_changed = a.get("geom_hash") != b.get("geom_hash")
+        if not attrs and not geometry_changed:
+            unchanged += 1
+            continue
+        rank_from, rank_to = a.get("H_rank"), b.get("H_rank")
+        changed.append({
+            "subzone": sid,
+            "attributes": attrs,
+            "rank_from": rank_from,
+            "rank_to": rank_to,
+            "rank_delta": (rank_from - rank_to) if rank_from is not None and rank_to is not None else None,
+            "geometry_changed": geometry_changed,
+        })
+    return {"added": added, "removed": removed, "changed": changed, "unchanged": unchanged}
+
+
+def summarize(diff: dict[str, Any], top: int = 5) -> dict[str, Any]:
+    """Small human-facing summary: counts plus the largest rank moves."""
+    moves = [c for c in diff["changed"] if c.get("rank_delta")]
+    moves.sort(key=lambda c: abs(c["rank_delta"]), reverse=True)
+    return {
+        "added": len(diff["added"]),
+        "removed": len(diff["removed"]),
+        "changed": len(diff["changed"]),
+        "unchanged": diff["unchanged"],
+        "geometry_changed": sum(1 for c in diff["changed"] if c["geometry_changed"]),
+        "rank_moves": len(moves),
+        "largest_rank_moves": [
+            {"subzone": c["subzone"], "rank_from": c["rank_from"], "rank_to": c["rank_to"], "rank_delta": c["rank_delta"]}
+            for c in moves[:top]
+        ],
+    }
+
+
+def build_delta(
+    diff: dict[str, Any],
+    features_by_id: dict[str, dict[str, Any]],
+    *,
+    from_snapshot: str,
+    to_snapshot: str,
+) -> dict[str, Any]:
+    """Assemble the delta payload clients apply to their local FeatureCollection.
+
+    `features` holds added and changed subzones from the target snapshot. Geometry is
+    only included when it is new or changed; otherwise it is null and the client keeps
+    its local geometry. `removed` lists subzone ids to drop.
+    """
+    geom_changed = {c["subzone"] for c in diff["changed"] if c["geometry_changed"]}
+    keep_geom = set(diff["added"]) | geom_changed
+    feats: list[dict[str, Any]] = []
+    for sid in list(diff["added"]) + [c["subzone"] for c in diff["changed"]]:
+        f = features_by_id.get(sid)
+        if not f:
+            continue
+        feats.append({
+            "type": "Feature",
+            "properties": f.get("properties"),
+            "geometry": f.get("geometry") if sid in keep_geom else None,
+        })
+    return {
+        "from": from_snapshot,
+        "to": to_snapshot,
+        "features": feats,
+        "removed": list(diff["removed"]),
+        "changes": diff["changed"],
+        "summary": summarize(diff),
+    }
+
+
+def empty_delta(from_snapshot: Optional[str], to_snapshot: Optional[str]) -> dict[str, Any]:
+    return {
+        "from": from_snapshot,
+        "to": to_snapshot,
+        "features": [],
+        "removed": [],
+        "changes": [],
+        "summary": summarize({"added": [], "removed": [], "changed": [], "unchanged": 0}),
+    }
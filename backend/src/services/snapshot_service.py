@@ -1,33 +1,223 @@
 from __future__ import annotations
 
+import importlib.util
+import os
+import shutil
+import threading
+import time
 from pathlib import Path
 from typing import Any, Optional
 
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from ..repositories import snapshot_repo, subzone_repo
+from ..db import get_session, invalidate_replica_check
+from ..repositories import geometry_repo, job_repo, rank_stability_repo, rollup_repo, snapshot_repo, subzone_repo
+from . import (
+    geometry_service, job_service, json_service, rank_stability_service, rollup_service, snapshot_store_service,
+)
+from .log_service import get_logger
+
+log = get_logger("snapshots")
 
 
 def bulk_ingest_geojson(session: Session, geojson: dict[str, Any], snapshot_id: str) -> int:
     """Insert all features from a GeoJSON FeatureCollection for the snapshot.
 
+    Geometries are content-addressed: only polygons whose hash is not already stored
+    are written to `geometries`; subzone rows reference them by hash. The snapshot's
+    rollups are computed from the inserted rows in the same transaction. Rank intervals
+    take seconds, so they are not: see write_rank_stability / ensure_rank_stability.
     Returns the number of inserted rows.
     """
-    feats = (geojson or {}).get("features") or []
-    return subzone_repo.insert_many(session, snapshot_id, feats)
+    feats = list((geojson or {}).get("features") or [])
+    hashes = [geometry_service.geometry_hash(f.get("geometry")) for f in feats]
+    new_geoms = geometry_repo.insert_missing(
+        session, {h: f.get("geometry") for h, f in zip(hashes, feats) if h}
+    )
+    inserted = subzone_repo.insert_many(session, snapshot_id, feats, geom_hashes=hashes)
+    if new_geoms and subzone_repo.has_postgis(session):
+        # Populate the spatial column server-side so bbox/point queries can use the GiST index
+        geometry_repo.populate_postgis(session)
+    write_rollups(session, snapshot_id)
+    return inserted
+
+
+def write_rollups(session: Session, snapshot_id: str) -> int:
+    """(Re)compute and store the snapshot's per-planning-area rollups. Returns rollups written."""
+    rows = subzone_repo.select_subzones(session, snapshot_id)
+    return rollup_repo.replace_rollups(session, snapshot_id, rollup_service.compute_rollups(rows))
+
+
+def write_rank_stability(session: Session, snapshot_id: str) -> int:
+    """(Re)compute and store the snapshot's Monte Carlo rank intervals. Returns subzones covered.
+
+    Takes about a second per 10k samples, so only background paths call it: refresh and
+    recompute jobs, ScoreComputing --snapshot, and the job enqueue_rank_stability queues
+    for snapshots that have none. Skipped (0) when RANK_STABILITY_SAMPLES=0 or NumPy is
+    not installed.
+    """
+    settings = rank_stability_service.StabilitySettings.from_env()
+    if settings.samples <= 0:
+        return 0
+    rows = subzone_repo.select_subzones(session, snapshot_id)
+    t0 = time.perf_counter()
+    try:
+        result = rank_stability_service.rank_intervals(rows, settings)
+    except ImportError:
+        log.warning("rank_stability.numpy_missing", extra={"snapshot_id": snapshot_id})
+        return 0
+    stored = rank_stability_repo.replace_stability(session, snapshot_id, result)
+    log.info("rank_stability.computed", extra={
+        "snapshot_id": snapshot_id, "subzones": stored, "samples": result["params"]["samples"] if result else 0,
+        "duration_ms": round((time.perf_counter() - t0) * 1000, 1),
+    })
+    return stored
+
+
+def enqueue_rank_stability(session: Session, snapshot_id: str) -> Optional[str]:
+    """Queue a background job computing the snapshot's rank intervals, in the caller's transaction.
+
+    Returns the id of the queued job, or of one already queued or running for the
+    snapshot; the snapshot row is locked so concurrent callers queue only one. Returns
+    None when the intervals are stored, the snapshot is unknown or archived, or sampling
+    is disabled (RANK_STABILITY_SAMPLES=0) or unavailable (no NumPy).
+    """
+    settings = rank_stability_service.StabilitySettings.from_env()
+    if settings.samples <= 0 or importlib.util.find_spec("numpy") is None:
+        return None
+    snap = snapshot_repo.lock_snapshot(session, snapshot_id)
+    if snap is None or snap.archived_at is not None or rank_stability_repo.get_stability(session, snapshot_id):
+        return None
+    params = {"snapshot_id": str(snapshot_id)}
+    job = job_repo.find_active(session, kind="rank_stability", params=params)
+    if job is not None:
+        return job.id
+    return job_service.enqueue(session, kind="rank_stability", params=params)
+
+
+def ensure_rank_stability(snapshot_id: str) -> int:
+    """Compute and store the snapshot's rank intervals unless they are stored already.
+
+    Runs in the job worker (see enqueue_rank_stability). Returns subzones covered, 0 for
+    unknown or archived snapshots.
+    """
+    try:
+        with get_session() as s:
+            stored = rank_stability_repo.get_stability(s, snapshot_id)
+            if stored is not None:
+                return len(stored["intervals"])
+            snap = snapshot_repo.get_snapshot(s, snapshot_id)
+            if snap is None or snap.archived_at is not None:
+                return 0
+            return write_rank_stability(s, snapshot_id)
+    except IntegrityError:
+        # An ingest job stored them first
+        with get_session() as s:
+            stored = rank_stability_repo.get_stability(s, snapshot_id)
+        return len(stored["intervals"]) if stored else 0
+
+
+def dedupe_legacy_geometries(session: Session, *, batch_size: int = 200) -> int:
+    """Move inline `subzones.geom_geojson` copies into the shared `geometries` table.
+
+    Processes rows in batches and returns the number of rows migrated.
+    """
+    migrated = 0
+    while True:
+        batch = subzone_repo.select_legacy_geometries(session, batch_size)
+        if not batch:
+            break
+        hashed = [(sid, zid, geometry_service.geometry_hash(geom), geom) for sid, zid, geom in batch]
+        geometry_repo.insert_missing(session, {h: g for _, _, h, g in hashed})
+        migrated += subzone_repo.set_geom_hashes(session, [(sid, zid, h) for sid, zid, h, _ in hashed])
+        session.flush()
+    if migrated and subzone_repo.has_postgis(session):
+        geometry_repo.populate_postgis(session)
+    return migrated
 
 
-def export_current_geojson(session: Session, snapshot_id: str, export_dir: str | Path) -> Path:
-    """Assemble a FeatureCollection from DB and write it to the export directory.
+ARTIFACT_NAME = "hawker_opportunities_ver2.geojson"
+
+
+def artifact_path(export_dir: str | Path, snapshot_id: str) -> Path:
+    """Versioned, immutable export of one snapshot: <export_dir>/snapshots/<id>/<ARTIFACT_NAME>."""
+    return Path(export_dir) / "snapshots" / snapshot_id / ARTIFACT_NAME
+
+
+def remove_artifacts(export_dir: str | Path, snapshot_id: str) -> None:
+    """Delete the snapshot's versioned artifact directory (GeoJSON and columnar store)."""
+    snapshot_store_service.evict(snapshot_id)
+    shutil.rmtree(Path(export_dir) / "snapshots" / snapshot_id, ignore_errors=True)
+
+
+def write_artifacts(session: Session, snapshot_id: str, export_dir: str | Path) -> Path:
+    """Write the snapshot's FeatureCollection (and its columnar store) to its versioned path once.
 
-    The filename is hawker_opportunities_ver2.geojson to match the frontend expectation.
+    Snapshots never change after ingest, so existing artifacts are reused as is.
+    Returns the GeoJSON artifact path.
     """
+    path = artifact_path(export_dir, snapshot_id)
+    store = snapshot_store_service.store_path(export_dir, snapshot_id)
+    need_store = snapshot_store_service.available() and not store.exists()
+    if path.exists() and not need_store:
+        return path
     fc = subzone_repo.select_features_fc(session, snapshot_id)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(json_service.dumps(fc))
+        os.replace(tmp, path)
+    if need_store:
+        snapshot_store_service.write_store(fc, store, snapshot_id=snapshot_id)
+    return path
+
+
+def swap_current_pointer(export_dir: str | Path, snapshot_id: str) -> Path:
+    """Point <export_dir>/<ARTIFACT_NAME> at the snapshot's artifact with one atomic rename.
+
+    The pointer is a relative symlink; where symlinks are not permitted (Windows without
+    developer mode) a hard link is used, and a copy only as a last resort. Readers that
+    already opened the previous artifact keep reading it unchanged.
+    """
     export_dir = Path(export_dir)
-    export_dir.mkdir(parents=True, exist_ok=True)
-    out_path = export_dir / "hawker_opportunities_ver2.geojson"
-    out_path.write_text(_json_dumps(fc), encoding="utf-8")
-    return out_path
+    target = artifact_path(export_dir, snapshot_id)
+    if not target.exists():
+        raise FileNotFoundError(f"No artifact for snapshot {snapshot_id}")
+    pointer = export_dir / ARTIFACT_NAME
+    tmp = export_dir / f".{ARTIFACT_NAME}.{os.getpid()}.{threading.get_ident()}.tmp"
+    tmp.unlink(missing_ok=True)
+    try:
+        os.symlink(os.path.relpath(target, export_dir), tmp)
+    except (OSError, NotImplementedError):
+        try:
+            os.link(target, tmp)
+        except OSError:
+            shutil.copyfile(target, tmp)
+    os.replace(tmp, pointer)
+    return pointer
+
+
+def export_current_geojson(session: Session, snapshot_id: str, export_dir: str | Path) -> Path:
+    """Make the snapshot's artifact the current export once `session` commits.
+
+    Writes the versioned artifact if it does not exist yet; the pointer swap waits for
+    the commit so the file never runs ahead of `snapshots.is_current`. Returns the
+    pointer path (hawker_opportunities_ver2.geojson, as the frontend expects).
+    """
+    write_artifacts(session, snapshot_id, export_dir)
+
+    def swap(_s: Session) -> None:
+        # The replica has not seen this commit yet: route reads to the primary until it has
+        invalidate_replica_check()
+        try:
+            swap_current_pointer(export_dir, snapshot_id)
+        except Exception:
+            log.exception("snapshot.pointer_swap_failed", extra={"snapshot_id": snapshot_id})
+
+    event.listen(session, "after_commit", swap, once=True)
+    return Path(export_dir) / ARTIFACT_NAME
 
 
 def create_snapshot_and_ingest(
@@ -40,7 +230,8 @@ def create_snapshot_and_ingest(
 ) -> str:
     """Create a snapshot and ingest all features. Returns snapshot_id.
 
-    Controller should call export_current_geojson() after marking current.
+    Controller should call export_current_geojson() after marking current (or
+    write_artifacts() right away so publishing later is only a pointer swap).
     """
     sid = snapshot_repo.create_snapshot(session, note=note, created_by=created_by)
     bulk_ingest_geojson(session, geojson, sid)
@@ -49,10 +240,4 @@ def create_snapshot_and_ingest(
     return sid
 
 
-def _json_dumps(obj: Any) -> str:
-    import json
-
-    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
-
-
 
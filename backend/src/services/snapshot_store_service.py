@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
+
+from .geometry_service import BBox, geometry_bbox, point_in_geometry
+from .json_service import dumps as _dumps, loads
+from .log_service import get_logger
+
+if TYPE_CHECKING:
+    import numpy as np
+
+log = get_logger("snapshots.store")
+
+# Columnar copy of a snapshot, written once next to its GeoJSON artifact as an
+# uncompressed Arrow IPC file. Every worker memory-maps it read-only, so the pages
+# live once in the OS page cache however many uvicorn/gunicorn workers serve it.
+# Geometries are kept as each feature's pre-encoded GeoJSON (served as is) plus
+# envelope columns for spatial filtering; no per-worker dicts are built.
+STORE_NAME = "features.arrow"
+STORE_VERSION = "1"
+
+# (column, feature property, arrow type name); row dicts use the column names
+_ATTRIBUTES = [
+    ("subzone", "SUBZONE_N", "string"),
+    ("planning_area", "PLN_AREA_N", "string"),
+    ("population", "population", "int64"),
+    ("pop_0_25", "pop_0_25", "int64"),
+    ("pop_25_65", "pop_25_65", "int64"),
+    ("pop_65plus", "pop_65plus", "int64"),
+    ("hawker", "hawker", "int64"),
+    ("mrt", "mrt", "int64"),
+    ("bus", "bus", "int64"),
+    ("H_score", "H_score", "float64"),
+    ("H_rank", "H_rank", "int64"),
+    ("Dem", "Dem", "float64"),
+    ("Sup", "Sup", "float64"),
+    ("Acc", "Acc", "float64"),
+]
+_BBOX = ("minx", "miny", "maxx", "maxy")
+
+_pyarrow_ok: Optional[bool] = None
+
+
+def available() -> bool:
+    """True when SNAPSHOT_STORE is not disabled and pyarrow is installed."""
+    global _pyarrow_ok
+    if os.getenv("SNAPSHOT_STORE", "1").lower() in ("0", "false", "no"):
+        return False
+    if _pyarrow_ok is None:
+        try:
+            import pyarrow  # noqa: F401
+
+            _pyarrow_ok = True
+        except ImportError:
+            log.warning("store.pyarrow_missing")
+            _pyarrow_ok = False
+    return _pyarrow_ok
+
+
+def _number(v: Any, kind: str) -> Optional[float | int]:
+    try:
+        return int(v) if kind == "int64" else float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def write_store(fc: dict[str, Any], path: str | Path, *, snapshot_id: Optional[str] = None) -> Path:
+    """Write a FeatureCollection as an Arrow IPC file (atomic rename). Requires pyarrow."""
+    import pyarrow as pa
+
+    feats = list(fc.get("features") or [])
+    props = [f.get("properties") or {} for f in feats]
+    columns: dict[str, Any] = {}
+    for col, prop, kind in _ATTRIBUTES:
+        values = [p.get(prop) for p in props]
+        if kind == "string":
+            columns[col] = pa.array([None if v is None else str(v) for v in values], pa.string())
+        else:
+            columns[col] = pa.array([_number(v, kind) for v in values], getattr(pa, kind)())
+    boxes = [geometry_bbox(f.get("geometry")) or (float("nan"),) * 4 for f in feats]
+    for j, col in enumerate(_BBOX):
+        columns[col] = pa.array([b[j] for b in boxes], pa.float64())
+    columns["feature"] = pa.array([_dumps(f) for f in feats], pa.binary())
+    header = {k: v for k, v in fc.items() if k not in ("type", "features")}
+    meta = {"store_version": STORE_VERSION, "snapshot_id": snapshot_id or "", "header": _dumps(header)}
+    table = pa.table(columns).replace_schema_metadata(meta)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+    return path
+
+
+class SnapshotStore:
+    """Read-only, memory-mapped view of one snapshot's store file.
+
+    Numeric columns and the feature bytes are NumPy views over the mapping: nothing is
+    copied until a response body is assembled.
+    """
+
+    def __init__(self, path: str | Path):
+        import numpy as np
+        import pyarrow as pa
+
+        self.path = Path(path)
+        self._source = pa.memory_map(str(self.path), "r")
+        table = pa.ipc.open_file(self._source).read_all().combine_chunks()
+        meta = table.schema.metadata or {}
+        self.snapshot_id = meta.get(b"snapshot_id", b"").decode() or None
+        header = loads(meta.get(b"header", b"{}"))
+        head = b'{"type":"FeatureCollection",'
+        for k, v in header.items():
+            head += _dumps(k) + b":" + _dumps(v) + b","
+        self._head = head + b'"features":['
+        self.table = table
+        # Views straight over the mapped buffers (Array.to_numpy would also pull in pandas)
+        self.bounds = {c: _float_view(table.column(c).chunk(0)) for c in _BBOX}
+        feature = table.column("feature").chunk(0)
+        _, offsets, data = feature.buffers()
+        self._offsets = np.frombuffer(offsets, dtype=np.int32, count=len(feature) + 1, offset=feature.offset * 4)
+        self._data = memoryview(data)
+        # Built on first use by find() / distribution()
+        self._index: Optional[dict[str, int]] = None
+        self._sorted: dict[str, list[float]] = {}
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def feature_bytes(self, i: int) -> bytes:
+        return self._data[self._offsets[i]:self._offsets[i + 1]].tobytes()
+
+    def feature(self, i: int) -> dict[str, Any]:
+        return loads(self.feature_bytes(i))
+
+    def query(self, bbox: BBox) -> "np.ndarray":
+        """Row indices whose envelope intersects bbox (rows without geometry never match)."""
+        import numpy as np
+
+        b = self.bounds
+        hit = (b["minx"] <= bbox[2]) & (b["maxx"] >= bbox[0]) & (b["miny"] <= bbox[3]) & (b["maxy"] >= bbox[1])
+        return np.flatnonzero(hit)
+
+    def to_bytes(self, ids: Optional[Any] = None) -> bytes:
+        """FeatureCollection of the given rows (all rows when ids is None)."""
+        if ids is None:
+            ids = range(len(self))
+        return self._head + b",".join(self.feature_bytes(i) for i in ids) + b"]}"
+
+    def find_at(self, lon: float, lat: float) -> Optional[dict[str, Any]]:
+        for i in self.query((lon, lat, lon, lat)):
+            feat = self.feature(int(i))
+            if point_in_geometry(feat.get("geometry"), lon, lat):
+                return feat
+        return None
+
+    def find(self, subzone: str) -> Optional[int]:
+        """Row index of a subzone id, or None."""
+        if self._index is None:
+            index: dict[str, int] = {}
+            for i, name in enumerate(self.table.column("subzone").chunk(0).to_pylist()):
+                if name is not None:
+                    index.setdefault(name, i)
+            self._index = index
+        return self._index.get(subzone)
+
+    def row(self, i: int) -> dict[str, Any]:
+        """One attribute row, shaped like rows()."""
+        return {c: self.table.column(c).chunk(0)[i].as_py() for c, _, _ in _ATTRIBUTES}
+
+    def distribution(self, column: str) -> list[float]:
+        """Sorted non-null values of a numeric column (cached; the snapshot never changes)."""
+        values = self._sorted.get(column)
+        if values is None:
+            values = sorted(v for v in self.table.column(column).chunk(0).to_pylist() if v is not None and v == v)
+            self._sorted[column] = values
+        return values
+
+    def rows(self, *, planning_area: Optional[str] = None, rank_top: Optional[int] = None) -> list[dict[str, Any]]:
+        """Attribute rows shaped like subzone_repo.select_subzones()."""
+        # Column-wise to_pylist only: table-level pyarrow operations import pandas
+        values = {c: self.table.column(c).chunk(0).to_pylist() for c, _, _ in _ATTRIBUTES}
+        area, rank = values["planning_area"], values["H_rank"]
+        keep = [
+            i for i in range(len(self))
+            if (not planning_area or area[i] == planning_area)
+            and (not rank_top or (rank[i] is not None and rank[i] <= rank_top))
+        ]
+        return [{c: v[i] for c, v in values.items()} for i in keep]
+
+
+def _float_view(arr: Any) -> "np.ndarray":
+    import numpy as np
+
+    _, values = arr.buffers()
+    return np.frombuffer(values, dtype=np.float64, count=len(arr), offset=arr.offset * 8)
+
+
+_stores: "OrderedDict[str, SnapshotStore]" = OrderedDict()
+_lock = threading.Lock()
+_MAX_OPEN = 4
+
+
+def store_path(export_dir: str | Path, snapshot_id: str) -> Path:
+    return Path(export_dir) / "snapshots" / snapshot_id / STORE_NAME
+
+
+def open_store(export_dir: str | Path, snapshot_id: str, loader) -> Optional[SnapshotStore]:
+    """Map the snapshot's store, writing it first from loader() if it does not exist yet.
+
+    loader() returns the snapshot's FeatureCollection, or None if there is no such snapshot.
+
+    Returns None when the store is unavailable (disabled, pyarrow missing, or the file
+    cannot be built) so callers fall back to their in-memory paths.
+    """
+    if not available():
+        return None
+    with _lock:
+        store = _stores.get(snapshot_id)
+        if store is not None:
+            _stores.move_to_end(snapshot_id)
+            return store
+    path = store_path(export_dir, snapshot_id)
+    try:
+        if not path.exists():
+            fc = loader()
+            if fc is None:  # unknown snapshot: nothing to materialize
+                return None
+            write_store(fc, path, snapshot_id=snapshot_id)
+        store = SnapshotStore(path)
+    except Exception:
+        log.exception("store.open_failed", extra={"snapshot_id": snapshot_id})
+        return None
+    with _lock:
+        _stores[snapshot_id] = store
+        while len(_stores) > _MAX_OPEN:
+            _stores.popitem(last=False)
+    return store
+
+
+def evict(snapshot_id: str) -> None:
+    """Drop this process's mapping of a snapshot's store (e.g. before its file is removed)."""
+    with _lock:
+        _stores.pop(snapshot_id, None)
+
+
+def clear() -> None:
+    with _lock:
+        _stores.clear()
@@ -0,0 +1,22 @@
+"""Shared fixtures: a fresh SQLite database per test (see backend/bench/sqlite_compat.py).
+
+Run from the repository root: python -m pytest backend/tests
+"""
+from __future__ import annotations
+
+import pytest
+
+from backend.bench.sqlite_compat import create_schema
+from backend.src import db
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    monkeypatch.setenv("DATABASE_URL", url)
+    monkeypatch.setattr(db, "_engine", None)
+    monkeypatch.setattr(db, "_SessionLocal", None)
+    create_schema(url)
+    yield url
+    if db._engine is not None:
+        db._engine.dispose()
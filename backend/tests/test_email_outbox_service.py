@@ -0,0 +1,89 @@
+"""Outbox delivery: claiming, per-message outcomes and connection failures."""
+from __future__ import annotations
+
+import smtplib
+
+import pytest
+from sqlalchemy import select
+
+from backend.src import db
+from backend.src.models.email_outbox import EmailOutbox
+from backend.src.repositories import email_outbox_repo
+from backend.src.services import email_outbox_service as eo
+
+
+class FakeConnection:
+    """Stands in for SmtpConnection; refuses the addresses in `refuse`."""
+
+    def __init__(self, settings: eo.OutboxSettings, refuse: set[str]):
+        self.settings = settings
+        self.refuse = refuse
+        self.sent: list[str] = []
+        self.closed = 0
+
+    def send(self, msg) -> None:  # noqa: ANN001
+        to = msg["To"]
+        if to in self.refuse:
+            raise smtplib.SMTPRecipientsRefused({to: (550, b"5.1.1 No such user")})
+        self.sent.append(to)
+
+    def close(self) -> None:
+        self.closed += 1
+
+
+def _enqueue(*addrs: str) -> None:
+    with db.get_session() as s:
+        for addr in addrs:
+            email_outbox_repo.enqueue(s, kind="verify", to_addr=addr, subject="Verify", body_text="hi")
+
+
+def _statuses() -> dict[str, tuple[str, int]]:
+    with db.get_session() as s:
+        return {r.to_addr: (r.status, r.attempts) for r in s.execute(select(EmailOutbox)).scalars()}
+
+
+def test_refused_recipient_fails_only_its_message(database):
+    _enqueue("a@example.com", "bad@example.com", "c@example.com")
+    settings = eo.OutboxSettings(batch_size=10)
+    conn = FakeConnection(settings, refuse={"bad@example.com"})
+
+    stats = eo.deliver_due(conn, settings)  # type: ignore[arg-type]
+
+    assert stats == {"claimed": 3, "sent": 2, "retried": 0, "failed": 1}
+    assert conn.sent == ["a@example.com", "c@example.com"]
+    assert conn.closed == 0
+    assert _statuses() == {
+        "a@example.com": ("sent", 1),
+        "bad@example.com": ("failed", 1),
+        "c@example.com": ("sent", 1),
+    }
+
+
+def test_dropped_connection_releases_rest_of_batch(database):
+    _enqueue("a@example.com", "b@example.com")
+    settings = eo.OutboxSettings(batch_size=10, retry_base_seconds=0)
+
+    class Dropping(FakeConnection):
+        def send(self, msg) -> None:  # noqa: ANN001
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+
+    conn = Dropping(settings, refuse=set())
+    stats = eo.deliver_due(conn, settings)  # type: ignore[arg-type]
+
+    assert stats == {"claimed": 2, "sent": 0, "retried": 1, "failed": 0}
+    assert conn.closed == 1
+    assert _statuses() == {"a@example.com": ("pending", 1), "b@example.com": ("pending", 0)}
+
+
+@pytest.mark.parametrize("exc, expected", [
+    (smtplib.SMTPRecipientsRefused({"x@example.com": (550, b"no")}), False),
+    (smtplib.SMTPDataError(554, b"rejected"), False),
+    (smtplib.SMTPSenderRefused(451, b"try later", "me@example.com"), False),
+    (smtplib.SMTPServerDisconnected("closed"), True),
+    (smtplib.SMTPConnectError(421, b"busy"), True),
+    (smtplib.SMTPAuthenticationError(535, b"bad credentials"), True),
+    (ConnectionRefusedError(111, "Connection refused"), True),
+    (TimeoutError("timed out"), True),
+])
+def test_is_connection_error(exc, expected):
+    assert eo._is_connection_error(exc) is expected
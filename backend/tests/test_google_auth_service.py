@@ -0,0 +1,53 @@
+"""Google signing key cache: stale keys are served while the certs endpoint is down."""
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from backend.src.services.google_auth_service import KeyCache, KeySet
+
+
+class FlakySource:
+    def __init__(self):
+        self.calls = 0
+        self.down = False
+
+    def __call__(self) -> KeySet:
+        self.calls += 1
+        if self.down:
+            raise OSError("certs endpoint unreachable")
+        return KeySet(keys={"k1": "key-1"}, max_age=0.0)  # expires immediately
+
+
+def test_stale_keys_served_with_backoff_while_refresh_fails():
+    source = FlakySource()
+    cache = KeyCache(source, max_stale=60.0, retry_base=0.2)
+    assert cache.get("k1") == "key-1"
+
+    source.down = True
+    assert cache.get("k1") == "key-1"  # refresh failed: stale key, retry scheduled
+    assert cache.get("k1") == "key-1"  # within the backoff: no fetch at all
+    assert source.calls == 2
+
+    time.sleep(0.25)
+    assert cache.get("k1") == "key-1"
+    assert source.calls == 3  # retried once the backoff ran out
+
+    source.down = False
+    time.sleep(0.45)  # second failure doubled the backoff to 0.4 s
+    assert cache.get("k1") == "key-1"
+    assert source.calls == 4
+    assert cache._failures == 0
+
+
+def test_unknown_kid_or_too_stale_still_fails():
+    source = FlakySource()
+    cache = KeyCache(source, max_stale=0.05, retry_base=10.0)
+    cache.get("k1")
+    source.down = True
+    with pytest.raises(ValueError, match="unavailable"):
+        cache.get("k2")
+    time.sleep(0.1)
+    with pytest.raises(ValueError, match="unavailable"):
+        cache.get("k1")
@@ -0,0 +1,35 @@
+"""Every JSON backend encodes the same payload to the same bytes."""
+from __future__ import annotations
+
+import importlib.util
+import json
+
+import pytest
+
+from backend.src.services import json_service
+
+PAYLOAD = {
+    "features": [{"properties": {"SUBZONE_N": "TAMPINES EAST", "H_score": float("nan"), "Acc": 0.25}}],
+    "bounds": (float("inf"), -float("inf")),
+    "note": "Pasir Ris – Tampines",
+}
+
+
+def _load(backend: str, monkeypatch):
+    monkeypatch.setenv("JSON_BACKEND", backend)
+    spec = importlib.util.spec_from_file_location(f"json_service_{backend}", json_service.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("backend", ["stdlib", "orjson", "msgspec"])
+def test_non_finite_floats_become_null(backend, monkeypatch):
+    if backend != "stdlib" and importlib.util.find_spec(backend) is None:
+        pytest.skip(f"{backend} is not installed")
+    body = _load(backend, monkeypatch).dumps(PAYLOAD)
+    assert body == (
+        '{"features":[{"properties":{"SUBZONE_N":"TAMPINES EAST","H_score":null,"Acc":0.25}}],'
+        '"bounds":[null,null],"note":"Pasir Ris – Tampines"}'
+    ).encode("utf-8")
+    assert json.loads(body)["features"][0]["properties"]["H_score"] is None
@@ -0,0 +1,50 @@
+"""Rank intervals for snapshots ingested without them: queued once, never sampled in a request."""
+from __future__ import annotations
+
+import json
+
+from sqlalchemy import select
+
+from backend.src import db
+from backend.src.controllers import admin_controller, data_controller
+from backend.src.models.job import Job
+from backend.src.repositories import snapshot_repo
+from backend.src.services import data_service, job_service, snapshot_service
+
+
+def _ingest_sample() -> str:
+    fc = json.loads((data_service.DATA_DIR / "out" / "hawker_opportunities_ver2.geojson").read_bytes())
+    with db.get_session() as s:
+        sid = snapshot_repo.create_snapshot(s, note="seed")
+        snapshot_service.bulk_ingest_geojson(s, fc, sid)
+    return sid
+
+
+def test_missing_intervals_are_queued_once(database, monkeypatch):
+    monkeypatch.setenv("RANK_STABILITY_SAMPLES", "200")
+    sid = _ingest_sample()
+
+    with db.get_session() as s:
+        first = data_controller.rank_stability(s, snapshot=sid)
+        second = data_controller.rank_stability(s, snapshot=sid, subzone_ids=["TAMPINES EAST"])
+    assert first["status"] == "pending"
+    assert second == first
+    with db.get_session() as s:
+        jobs = [(j.id, j.kind, j.params) for j in s.execute(select(Job)).scalars()]
+    assert jobs == [(first["job_id"], "rank_stability", {"snapshot_id": sid})]
+
+    result = admin_controller.run_rank_stability_job(job_service.JobContext(job_id=jobs[0][0], params=jobs[0][2]))
+    assert result == {"snapshot_id": sid, "subzones": 332}
+
+    with db.get_session() as s:
+        stored = data_controller.rank_stability(s, snapshot=sid, subzone_ids=["TAMPINES EAST"])
+    assert stored["samples"] == 200
+    assert list(stored["intervals"]) == ["TAMPINES EAST"]
+
+
+def test_disabled_sampling_queues_nothing(database, monkeypatch):
+    monkeypatch.setenv("RANK_STABILITY_SAMPLES", "0")
+    sid = _ingest_sample()
+    with db.get_session() as s:
+        assert data_controller.rank_stability(s, snapshot=sid) is None
+        assert s.execute(select(Job)).first() is None
@@ -0,0 +1,56 @@
+"""Archival re-checks a snapshot under its row lock before archiving it."""
+from __future__ import annotations
+
+import pytest
+
+from backend.src import db
+from backend.src.repositories import snapshot_repo
+from backend.src.services import retention_service, snapshot_service
+
+
+def _feature(name: str) -> dict:
+    ring = [[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 0.0]]
+    return {"type": "Feature", "properties": {"SUBZONE_N": name, "H_score": 0.5, "H_rank": 1},
+            "geometry": {"type": "Polygon", "coordinates": [ring]}}
+
+
+@pytest.fixture
+def policy(database, tmp_path):
+    return retention_service.RetentionPolicy(keep_last=1, archive_dir=tmp_path / "archive",
+                                             export_dir=tmp_path / "out")
+
+
+def _snapshot() -> str:
+    with db.get_session() as s:
+        sid = snapshot_repo.create_snapshot(s)
+        snapshot_service.bulk_ingest_geojson(s, {"type": "FeatureCollection", "features": [_feature("A")]}, sid)
+    return sid
+
+
+def _archived(sid: str) -> bool:
+    with db.get_session() as s:
+        return snapshot_repo.get_snapshot(s, sid).archived_at is not None
+
+
+def test_snapshot_made_current_after_selection_is_skipped(policy):
+    sid = _snapshot()
+    with db.get_session() as s:
+        snapshot_repo.set_current_snapshot(s, sid)
+    assert retention_service.archive_snapshot(sid, policy) is None
+    assert not _archived(sid)
+    assert not retention_service.archive_path_for(policy, sid).exists()
+
+
+def test_snapshot_tagged_after_selection_is_skipped(policy):
+    sid = _snapshot()
+    with db.get_session() as s:
+        snapshot_repo.set_tag(s, sid, "baseline")
+    assert retention_service.archive_snapshot(sid, policy) is None
+    assert not _archived(sid)
+
+
+def test_untouched_snapshot_is_archived(policy):
+    sid = _snapshot()
+    assert retention_service.archive_snapshot(sid, policy) is not None
+    assert _archived(sid)
+    assert retention_service.archive_path_for(policy, sid).exists()
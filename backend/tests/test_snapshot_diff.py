@@ -0,0 +1,32 @@
+"""Snapshot diffs between legacy rows (inline geometry) and content-addressed rows."""
+from __future__ import annotations
+
+from backend.src import db
+from backend.src.controllers import data_controller
+from backend.src.repositories import snapshot_repo, subzone_repo
+from backend.src.services import snapshot_service
+
+
+def _feature(name: str, score: float, x0: float) -> dict:
+    ring = [[x0, 1.0], [x0 + 1, 1.0], [x0 + 1, 2.0], [x0, 1.0]]
+    return {
+        "type": "Feature",
+        "properties": {"SUBZONE_N": name, "PLN_AREA_N": "AREA", "H_score": score, "H_rank": 1},
+        "geometry": {"type": "Polygon", "coordinates": [ring]},
+    }
+
+
+def test_legacy_rows_hash_like_ingest(database):
+    fc = {"type": "FeatureCollection", "features": [_feature("A", 0.5, 0.0), _feature("B", 0.4, 5.0)]}
+    moved = _feature("B", 0.4, 9.0)
+    with db.get_session() as s:
+        old = snapshot_repo.create_snapshot(s, note="legacy")
+        subzone_repo.insert_many(s, old, fc["features"])  # no geom_hashes: inline geometry only
+        new = snapshot_repo.create_snapshot(s, note="hashed")
+        snapshot_service.bulk_ingest_geojson(s, {**fc, "features": [fc["features"][0], moved]}, new)
+
+    with db.get_session() as s:
+        diff = data_controller.diff_snapshots(s, old, new)
+
+    assert diff["unchanged"] == 1
+    assert [(c["subzone"], c["geometry_changed"]) for c in diff["changed"]] == [("B", True)]
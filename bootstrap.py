@@ -59,6 +59,23 @@ def apply_schema():
         print("    Make sure your DATABASE_URL is correct and the database is accessible.")
         raise SystemExit(1)
 
+def migrate_geometries():
+    if not APPLY_SCHEMA:
+        return
+    # Move inline subzone geometries from older snapshots into the shared geometries table
+    sys.path.insert(0, str(REPO_ROOT))
+    from dotenv import load_dotenv
+    load_dotenv(str(ENV_PATH))
+    try:
+        from backend.src.db import get_session
+        from backend.src.services.snapshot_service import dedupe_legacy_geometries
+        with get_session() as s:
+            n = dedupe_legacy_geometries(s)
+        print(f"    Deduplicated {n} legacy subzone geometries")
+    except Exception as e:
+        print(f"    ERROR: Failed to deduplicate geometries: {e}")
+        raise SystemExit(1)
+
 def create_admin_user():
     if not CREATE_ADMIN:
         return
@@ -99,6 +116,7 @@ def main():
     try:
         ensure_deps()
         apply_schema()
+        migrate_geometries()
         create_admin_user()
         start_backend()
         print("\nDone.")
@@ -3,6 +3,9 @@ import {
   apiLogin,
   apiListSnapshots,
   apiRefreshGeoJSON,
+  apiRecompute,
+  apiWaitForJob,
+  type AdminJob,
   apiRestoreSnapshot,
   apiLogout,
   type LoginResponse,
@@ -26,6 +29,7 @@ export default function AdminPage() {
   const [geojsonText, setGeojsonText] = useState("");
   const [snapshots, setSnapshots] = useState<any[]>([]);
   const [busy, setBusy] = useState(false);
+  const [job, setJob] = useState<AdminJob | null>(null);
   const [error, setError] = useState<string | null>(null);
   const [users, setUsers] = useState<AdminUser[]>([]);
   const [createEmail, setCreateEmail] = useState("");
@@ -81,12 +85,35 @@ export default function AdminPage() {
         alert("Invalid GeoJSON JSON");
         return;
       }
-      await apiRefreshGeoJSON(token, data, note || undefined);
+      const { job_id } = await apiRefreshGeoJSON(token, data, note || undefined);
+      await waitForJob(job_id);
+    } catch (err: any) {
+      setError(err?.message || "Refresh failed");
+    } finally {
+      setBusy(false);
+    }
+  }
+
+  async function handleRecompute() {
+    setBusy(true);
+    try {
+      const { job_id } = await apiRecompute(token, { note: note || undefined });
+      await waitForJob(job_id);
+    } catch (err: any) {
+      setError(err?.message || "Recompute failed");
+    } finally {
+      setBusy(false);
+    }
+  }
+
+  async function waitForJob(jobId: string) {
+    try {
+      await apiWaitForJob(token, jobId, setJob);
+      setError(null);
+    } finally {
       await refreshSnapshots();
       // warm file endpoint
       fetch("/data/opportunity.geojson?t=" + Date.now()).catch(() => {});
-    } finally {
-      setBusy(false);
     }
   }
 
@@ -256,8 +283,23 @@ export default function AdminPage() {
                     onClick={handleRefresh}
                     className="px-4 py-2 rounded-lg text-white bg-green-600 hover:bg-green-700 font-semibold shadow"
                   >
-                    {busy ? "Uploading…" : "Refresh Dataset"}
+                    {busy ? "Working…" : "Refresh Dataset"}
+                  </button>
+                  <button
+                    disabled={busy}
+                    onClick={handleRecompute}
+                    className="ml-2 px-4 py-2 rounded-lg text-white bg-violet-600 hover:bg-violet-700 font-semibold shadow"
+                  >
+                    Recompute from data/
                   </button>
+                  {job && (
+                    <div className="mt-2 text-sm text-gray-700">
+                      {job.kind} · {job.status}
+                      {job.stage ? ` · ${job.stage}` : ""} ·{" "}
+                      {Math.round((job.progress || 0) * 100)}%
+                      {job.error ? ` · ${job.error}` : ""}
+                    </div>
+                  )}
                 </div>
                 <div>
                   <h3 className="text-md font-bold text-violet-700 mb-2">
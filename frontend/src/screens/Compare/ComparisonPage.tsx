@@ -1,7 +1,9 @@
 import React, { useEffect, useMemo, useState } from 'react'
-import { fetchOpportunityGeoJSON } from '../../services/api'
+import { fetchSubzoneCompare, SubzoneCompareEntry } from '../../services/api'
 import { heroBackgroundStyle, heroOverlayClass } from '../../theme/heroStyles'
 
+type HistoryRow = NonNullable<SubzoneCompareEntry['history']>[number]
+
 function parseIds(): string[] {
   const hash = window.location.hash || ''
   const q = hash.split('?')[1] || ''
@@ -11,8 +13,8 @@ function parseIds(): string[] {
 }
 
 export default function ComparisonPage(){
-  const [gj, setGj] = useState<any | null>(null)
   const [ids, setIds] = useState<string[]>(parseIds())
+  const [entries, setEntries] = useState<SubzoneCompareEntry[]>([])
 
   useEffect(()=>{
     const onHash = () => setIds(parseIds())
@@ -20,21 +22,21 @@ export default function ComparisonPage(){
     return ()=> window.removeEventListener('hashchange', onHash)
   }, [])
 
-  useEffect(()=>{ fetchOpportunityGeoJSON().then(setGj).catch(console.error) }, [])
-
-  const items = useMemo(()=>{
-    if(!gj) return [] as any[]
-    const list: any[] = []
-    for(const id of ids){
-      const f = gj.features.find((f:any)=>{
-        const p = f?.properties ?? {}
-        const fid = f?.id ?? p.SUBZONE_N ?? p.subzone
-        return String(fid) === String(id)
-      })
-      if(f) list.push(f)
-    }
-    return list
-  }, [gj, ids])
+  // Attributes, percentiles and rank history of just these subzones in one request
+  useEffect(()=>{
+    if(!ids.length){ setEntries([]); return }
+    fetchSubzoneCompare(ids, { history: 12 }).then(r => setEntries(r.subzones)).catch(console.error)
+  }, [ids])
+
+  const items = useMemo(
+    () => entries.map(e => ({ properties: e.attributes, percentiles: e.percentiles, rankInterval: e.rank_interval })),
+    [entries],
+  )
+  const history = useMemo(() => {
+    const out: Record<string, HistoryRow[]> = {}
+    for(const e of entries) out[e.subzone] = e.history ?? []
+    return out
+  }, [entries])
 
   function goBack(){ window.location.hash = '#/map' }
 
@@ -58,10 +60,14 @@ export default function ComparisonPage(){
             const p = f?.properties ?? {}
             const title = p.SUBZONE_N ?? p.subzone ?? '—'
             const rankVal = p.H_rank ?? p.h_rank
+            const ri = f?.rankInterval
             return (
               <div key={i} className="border border-gray-200 rounded-xl p-4 bg-white">
                 <div className="font-semibold text-gray-900">{title}</div>
-                <div className="text-xs text-gray-500">Rank {rankVal ?? '—'}</div>
+                <div className="text-xs text-gray-500">
+                  Rank {rankVal ?? '—'}
+                  {ri ? <span title="Rank range under perturbed weights and inputs (Monte Carlo)"> (likely {ri.lo}–{ri.hi})</span> : null}
+                </div>
               </div>
             )
           })}
@@ -72,6 +78,12 @@ export default function ComparisonPage(){
           {renderCompareRows(items)}
         </div>
 
+        {/* Rank per snapshot, oldest first */}
+        <div className="border border-gray-200 rounded-xl p-4 mb-4 bg-white overflow-auto">
+          <div className="text-sm font-semibold mb-2">Rank history</div>
+          <RankHistory ids={ids} history={history} />
+        </div>
+
         {/* Grouped bar chart for age groups */}
         <div className="border border-gray-200 rounded-xl p-4 bg-white overflow-auto">
           <div className="text-sm font-semibold mb-2">Population by age group</div>
@@ -107,34 +119,70 @@ function fmtInt(v: any){
 function renderCompareRows(items: any[]){
   const p0 = items[0]?.properties ?? {}
   const p1 = items[1]?.properties ?? {}
-  const rows: Array<{ label: string, a: number | null, b: number | null, fmt: (v:any)=>string }>= [
-    { label: 'H_score', a: numOrNull(p0.H_score ?? p0.h_score), b: numOrNull(p1.H_score ?? p1.h_score), fmt: fmtNum },
-    { label: 'Z_Dem', a: numOrNull(p0.Dem ?? p0.dem), b: numOrNull(p1.Dem ?? p1.dem), fmt: fmtNum },
-    { label: 'Z_Sup', a: numOrNull(p0.Sup ?? p0.sup), b: numOrNull(p1.Sup ?? p1.sup), fmt: fmtNum },
-    { label: 'Z_Acc', a: numOrNull(p0.Acc ?? p0.acc), b: numOrNull(p1.Acc ?? p1.acc), fmt: fmtNum },
-    { label: 'Total population', a: numOrNull(p0.population), b: numOrNull(p1.population), fmt: fmtInt },
-    { label: 'No. of MRT', a: numOrNull(p0.mrt), b: numOrNull(p1.mrt), fmt: fmtInt },
-    { label: 'No. of Bus stops', a: numOrNull(p0.bus), b: numOrNull(p1.bus), fmt: fmtInt },
-    { label: 'No. of Hawker centres', a: numOrNull(p0.hawker), b: numOrNull(p1.hawker), fmt: fmtInt },
+  const q0 = items[0]?.percentiles ?? {}
+  const q1 = items[1]?.percentiles ?? {}
+  const rows: Array<{ label: string, key?: string, a: number | null, b: number | null, fmt: (v:any)=>string }>= [
+    { label: 'H_score', key: 'H_score', a: numOrNull(p0.H_score ?? p0.h_score), b: numOrNull(p1.H_score ?? p1.h_score), fmt: fmtNum },
+    { label: 'Z_Dem', key: 'Dem', a: numOrNull(p0.Dem ?? p0.dem), b: numOrNull(p1.Dem ?? p1.dem), fmt: fmtNum },
+    { label: 'Z_Sup', key: 'Sup', a: numOrNull(p0.Sup ?? p0.sup), b: numOrNull(p1.Sup ?? p1.sup), fmt: fmtNum },
+    { label: 'Z_Acc', key: 'Acc', a: numOrNull(p0.Acc ?? p0.acc), b: numOrNull(p1.Acc ?? p1.acc), fmt: fmtNum },
+    { label: 'Total population', key: 'population', a: numOrNull(p0.population), b: numOrNull(p1.population), fmt: fmtInt },
+    { label: 'No. of MRT', key: 'mrt', a: numOrNull(p0.mrt), b: numOrNull(p1.mrt), fmt: fmtInt },
+    { label: 'No. of Bus stops', key: 'bus', a: numOrNull(p0.bus), b: numOrNull(p1.bus), fmt: fmtInt },
+    { label: 'No. of Hawker centres', key: 'hawker', a: numOrNull(p0.hawker), b: numOrNull(p1.hawker), fmt: fmtInt },
   ]
 
   return (
     <div className="flex flex-col divide-y divide-gray-100">
       {rows.map(r => (
-        <RowCompare key={r.label} label={r.label} a={r.a} b={r.b} fmt={r.fmt} />
+        <RowCompare key={r.label} label={r.label} a={r.a} b={r.b} fmt={r.fmt}
+          pa={r.key ? q0[r.key] : null} pb={r.key ? q1[r.key] : null} />
       ))}
     </div>
   )
 }
 
-function RowCompare({ label, a, b, fmt }: { label: string, a: number | null, b: number | null, fmt: (v:any)=>string }){
+function RowCompare({ label, a, b, fmt, pa, pb }: { label: string, a: number | null, b: number | null, fmt: (v:any)=>string, pa?: number | null, pb?: number | null }){
   const aIsGreater = (a ?? -Infinity) > (b ?? -Infinity)
   const bIsGreater = (b ?? -Infinity) > (a ?? -Infinity)
   return (
     <div className="grid grid-cols-[240px_1fr_1fr] items-center py-2 gap-3">
       <div className="text-sm text-gray-600">{label}</div>
-      <div className={`text-sm text-right px-2 py-1 rounded ${aIsGreater ? 'bg-violet-50 text-violet-700 font-semibold' : 'text-gray-800'}`}>{fmt(a)}</div>
-      <div className={`text-sm text-right px-2 py-1 rounded ${bIsGreater ? 'bg-violet-50 text-violet-700 font-semibold' : 'text-gray-800'}`}>{fmt(b)}</div>
+      <div className={`text-sm text-right px-2 py-1 rounded ${aIsGreater ? 'bg-violet-50 text-violet-700 font-semibold' : 'text-gray-800'}`}>{fmt(a)}<Pct value={pa} /></div>
+      <div className={`text-sm text-right px-2 py-1 rounded ${bIsGreater ? 'bg-violet-50 text-violet-700 font-semibold' : 'text-gray-800'}`}>{fmt(b)}<Pct value={pb} /></div>
+    </div>
+  )
+}
+
+// Percentile within the current snapshot
+function Pct({ value }: { value?: number | null }){
+  if(value === null || value === undefined) return null
+  return <span className="ml-2 text-xs font-normal text-gray-400">p{Math.round(value)}</span>
+}
+
+function RankHistory({ ids, history }: { ids: string[], history: Record<string, HistoryRow[]> }){
+  const snapshots: Array<{ id: string, created_at: string | null }> = []
+  const seen = new Set<string>()
+  for(const id of ids){
+    for(const row of history[id] ?? []){
+      if(!seen.has(row.snapshot_id)){
+        seen.add(row.snapshot_id)
+        snapshots.push({ id: row.snapshot_id, created_at: row.created_at })
+      }
+    }
+  }
+  snapshots.sort((a, b) => String(a.created_at).localeCompare(String(b.created_at)))
+  if(!snapshots.length) return <div className="text-sm text-gray-500">No history yet</div>
+  const rankAt = (id: string, sid: string) => history[id]?.find(r => r.snapshot_id === sid)?.H_rank
+  return (
+    <div className="flex flex-col divide-y divide-gray-100">
+      {snapshots.map(s => (
+        <div key={s.id} className="grid grid-cols-[240px_1fr_1fr] items-center py-2 gap-3">
+          <div className="text-sm text-gray-600">{s.created_at ? new Date(s.created_at).toLocaleDateString() : s.id.slice(0, 8)}</div>
+          <div className="text-sm text-right px-2 py-1">{fmtInt(rankAt(ids[0], s.id))}</div>
+          <div className="text-sm text-right px-2 py-1">{fmtInt(rankAt(ids[1], s.id))}</div>
+        </div>
+      ))}
     </div>
   )
 }
@@ -40,6 +40,124 @@ export async function fetchBusStopsGeoJSON() {
 
 // --- Admin/Auth API ---
 
+export type SubzoneHistoryRow = {
+  snapshot_id: string
+  created_at: string | null
+  is_current: boolean
+  tag: string | null
+  planning_area: string | null
+  population: number | null
+  hawker: number | null
+  mrt: number | null
+  bus: number | null
+  H_score: number | null
+  H_rank: number | null
+  Dem: number | null
+  Sup: number | null
+  Acc: number | null
+}
+
+export async function fetchSubzoneHistory(ids: string[], last?: number): Promise<{ subzones: Record<string, SubzoneHistoryRow[]> }> {
+  const token = (typeof window !== 'undefined') ? (localStorage.getItem('accessToken') || '') : ''
+  const params = new URLSearchParams({ ids: ids.join(',') })
+  if (last) params.set('last', String(last))
+  const r = await fetch(`/subzones/history?${params}`, {
+    headers: token ? { 'Authorization': `Bearer ${token}` } : undefined,
+  })
+  if (!r.ok) throw new Error('Failed to load subzone history')
+  return r.json()
+}
+
+export type MetricStats = {
+  count: number
+  sum?: number
+  mean?: number
+  min?: number
+  min_subzone?: string
+  min_rank?: number | null
+  max?: number
+  max_subzone?: string
+  max_rank?: number | null
+  p10?: number
+  p25?: number
+  p50?: number
+  p75?: number
+  p90?: number
+}
+
+export type SubzoneStats = {
+  snapshot_id: string
+  planning_area: string | null
+  subzones: number
+  stats: Record<string, MetricStats>
+  rank_bands: Record<string, number>
+  planning_areas?: Array<Omit<SubzoneStats, 'snapshot_id' | 'planning_areas'>>
+}
+
+export async function fetchSubzoneStats(opts: { planningArea?: string, areas?: boolean } = {}): Promise<SubzoneStats> {
+  const token = (typeof window !== 'undefined') ? (localStorage.getItem('accessToken') || '') : ''
+  const params = new URLSearchParams()
+  if (opts.planningArea) params.set('planning_area', opts.planningArea)
+  if (opts.areas) params.set('areas', 'true')
+  const r = await fetch(`/subzones/stats?${params}`, {
+    headers: token ? { 'Authorization': `Bearer ${token}` } : undefined,
+  })
+  if (!r.ok) throw new Error('Failed to load subzone stats')
+  return r.json()
+}
+
+export type RankInterval = { lo: number, median: number, hi: number }
+
+export type RankIntervals = {
+  snapshot_id: string
+  samples: number
+  params: { samples: number, requested_samples: number, concentration: number, input_noise: number, level: number, seed: number | null, subzones: number }
+  intervals: Record<string, RankInterval>
+}
+
+// 202 while a background job computes intervals for a snapshot that has none yet
+export type RankIntervalsPending = { snapshot_id: string, status: 'pending', job_id: string }
+
+export async function fetchRankIntervals(opts: { ids?: string[], snapshot?: string } = {}): Promise<RankIntervals | RankIntervalsPending> {
+  const token = (typeof window !== 'undefined') ? (localStorage.getItem('accessToken') || '') : ''
+  const params = new URLSearchParams()
+  if (opts.ids?.length) params.set('ids', opts.ids.join(','))
+  if (opts.snapshot) params.set('snapshot', opts.snapshot)
+  const r = await fetch(`/subzones/rank-intervals?${params}`, {
+    headers: token ? { 'Authorization': `Bearer ${token}` } : undefined,
+  })
+  if (!r.ok) throw new Error('Failed to load rank intervals')
+  return r.json()
+}
+
+export type SubzoneCompareEntry = {
+  subzone: string
+  attributes: Record<string, any>
+  percentiles: Record<string, number | null>
+  rank_interval: RankInterval | null
+  geometry?: any
+  history?: Array<{ snapshot_id: string, created_at: string | null, H_score: number | null, H_rank: number | null }>
+}
+
+export type SubzoneCompare = {
+  snapshot_id: string
+  subzones: SubzoneCompareEntry[]
+  missing: string[]
+}
+
+export async function fetchSubzoneCompare(ids: string[], opts: { geometry?: boolean, tolerance?: number, history?: number } = {}): Promise<SubzoneCompare> {
+  const token = (typeof window !== 'undefined') ? (localStorage.getItem('accessToken') || '') : ''
+  const params = new URLSearchParams({ ids: ids.join(',') })
+  if (opts.geometry) params.set('geometry', 'true')
+  if (opts.tolerance !== undefined) params.set('tolerance', String(opts.tolerance))
+  if (opts.history) params.set('history', String(opts.history))
+  const r = await fetch(`/subzones/compare?${params}`, {
+    headers: token ? { 'Authorization': `Bearer ${token}` } : undefined,
+  })
+  if (!r.ok) throw new Error('Failed to load subzone comparison')
+  return r.json()
+}
+
 export type LoginResponse = {
   access_token: string
   access_expires_at: number
@@ -81,7 +199,18 @@ export async function apiListSnapshots(token: string){
   return r.json()
 }
 
-export async function apiRefreshGeoJSON(token: string, geojson: any, note?: string){
+export type AdminJob = {
+  id: string
+  kind: string
+  status: 'queued' | 'running' | 'succeeded' | 'failed'
+  progress: number
+  stage?: string | null
+  result?: any
+  error?: string | null
+}
+
+// Refresh and recompute run as background jobs: these return { job_id } right away
+export async function apiRefreshGeoJSON(token: string, geojson: any, note?: string): Promise<{ job_id: string }>{
   const r = await fetch('/admin/refresh', {
     method: 'POST', headers: { 'Content-Type': 'application/json', 'Authorization': `Bearer ${token}` },
     body: JSON.stringify({ geojson, note })
@@ -90,6 +219,33 @@ export async function apiRefreshGeoJSON(token: string, geojson: any, note?: stri
   return r.json()
 }
 
+export async function apiRecompute(token: string, params: { mode?: string, note?: string } = {}): Promise<{ job_id: string }>{
+  const r = await fetch('/admin/jobs/recompute', {
+    method: 'POST', headers: { 'Content-Type': 'application/json', 'Authorization': `Bearer ${token}` },
+    body: JSON.stringify(params)
+  })
+  if(!r.ok) throw new Error('Failed to start recompute')
+  return r.json()
+}
+
+export async function apiGetJob(token: string, jobId: string): Promise<AdminJob>{
+  const r = await fetch(`/admin/jobs/${encodeURIComponent(jobId)}`, {
+    headers: { 'Authorization': `Bearer ${token}` }
+  })
+  if(!r.ok) throw new Error('Failed to load job')
+  return r.json()
+}
+
+export async function apiWaitForJob(token: string, jobId: string, onProgress?: (job: AdminJob) => void, intervalMs = 1500): Promise<AdminJob>{
+  for(;;){
+    const job = await apiGetJob(token, jobId)
+    onProgress?.(job)
+    if(job.status === 'succeeded') return job
+    if(job.status === 'failed') throw new Error(job.error || 'Job failed')
+    await new Promise(res => setTimeout(res, intervalMs))
+  }
+}
+
 export async function apiRestoreSnapshot(token: string, snapshotId: string){
   const r = await fetch(`/admin/snapshots/${encodeURIComponent(snapshotId)}/restore`, {
     method: 'POST', headers: { 'Authorization': `Bearer ${token}` }
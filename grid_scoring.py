@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# grid_scoring.py
+# Grid scoring mode for ScoreComputing.py (--mode grid).
+#
+# The island is tessellated into square cells (100-250 m) or H3 hexagons. Each
+# cell gets:
+#   population   census subzone population split by the share of the subzone's
+#                area the cell covers (areal weighting), per age group
+#   hawker/mrt/bus   points inside the cell
+#   parent       the subzone (and planning area) the cell overlaps most
+# Overlays and point counts run in chunks on a process pool; geometries travel
+# to the workers as WKB. Accessibility and 2SFCA supply are then computed for all
+# cells at once with accessibility.py and scored exactly like subzones.
+# Cell ids (e.g. "SQ250-118-52", or the H3 index) go in the `subzone` field so
+# the output can be ingested as a regular snapshot.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+import accessibility
+import ScoreComputing as sc
+
+POP_COLUMNS = ["population", "pop_0_25", "pop_25_65", "pop_65plus"]
+POINT_COLUMNS = ["hawker", "mrt", "bus"]
+CHUNK_SIZE = 20_000
+
+
+# ------------- Tessellation (EPSG:3414) -------------
+def square_cells(zones: gpd.GeoSeries, size: float = 250.0) -> gpd.GeoDataFrame:
+    """Square cells of `size` metres on a grid anchored at the zones' lower-left corner,
+    kept when they intersect a zone."""
+    minx, miny, maxx, maxy = zones.total_bounds
+    nx = int(np.ceil((maxx - minx) / size))
+    ny = int(np.ceil((maxy - miny) / size))
+    ix, iy = np.meshgrid(np.arange(nx), np.arange(ny))
+    ix, iy = ix.ravel(), iy.ravel()
+    x0, y0 = minx + ix * size, miny + iy * size
+    boxes = shapely.box(x0, y0, x0 + size, y0 + size)
+    hit = np.unique(zones.sindex.query(boxes, predicate="intersects")[0])
+    tag = f"SQ{size:g}"
+    ids = [f"{tag}-{i}-{j}" for i, j in zip(ix[hit], iy[hit])]
+    return gpd.GeoDataFrame({"cell_id": ids}, geometry=boxes[hit], crs=accessibility.SVY21)
+
+
+def h3_cells(zones: gpd.GeoSeries, resolution: int = 9) -> gpd.GeoDataFrame:
+    """H3 cells (h3 >= 4) whose centres fall inside a zone, plus one cell per zone too
+    small to contain a centre."""
+    try:
+        import h3
+    except ImportError:
+        raise SystemExit("h3 is not installed (pip install 'h3>=4'); use --grid square instead")
+    wgs = zones.to_crs(4326)
+    cells = set()
+    for geom in wgs:
+        found = h3.geo_to_cells(geom.__geo_interface__, resolution)
+        if not found:
+            p = geom.representative_point()
+            found = [h3.latlng_to_cell(p.y, p.x, resolution)]
+        cells.update(found)
+    ids = sorted(cells)
+    polys = [shapely.Polygon([(lng, lat) for lat, lng in h3.cell_to_boundary(c)]) for c in ids]
+    return gpd.GeoDataFrame({"cell_id": ids}, geometry=polys, crs=4326).to_crs(accessibility.SVY21)
+
+
+# ------------- Per-chunk overlay (runs in worker processes) -------------
+_STATE = {}
+
+
+def _init_worker(zone_wkb, zone_pop, point_xy):
+    """Pool initializer: zones, their population columns and POI coordinates, once per worker."""
+    zones = shapely.from_wkb(zone_wkb)
+    _STATE["zones"] = zones
+    _STATE["zone_tree"] = shapely.STRtree(zones)
+    _STATE["zone_area"] = shapely.area(zones)
+    _STATE["zone_pop"] = zone_pop
+    _STATE["points"] = {k: shapely.points(v) if len(v) else np.empty(0, dtype=object) for k, v in point_xy.items()}
+
+
+def _overlay_chunk(cell_wkb):
+    """Population shares, parent zone and POI counts for one chunk of cells."""
+    cells = shapely.from_wkb(cell_wkb)
+    n = len(cells)
+    zones, zone_area, zone_pop = _STATE["zones"], _STATE["zone_area"], _STATE["zone_pop"]
+
+    ci, zi = _STATE["zone_tree"].query(cells, predicate="intersects")
+    overlap = shapely.area(shapely.intersection(cells[ci], zones[zi]))
+    share = np.divide(overlap, zone_area[zi], out=np.zeros_like(overlap), where=zone_area[zi] > 0)
+    pop = np.zeros((n, zone_pop.shape[1]))
+    np.add.at(pop, ci, share[:, None] * zone_pop[zi])
+
+    # Parent: the zone with the largest overlap (ties go to the lower zone index)
+    parent = np.full(n, -1, dtype=np.intp)
+    order = np.lexsort((zi, -overlap, ci))
+    first = np.unique(ci[order], return_index=True)[1]
+    parent[ci[order][first]] = zi[order][first]
+
+    tree = shapely.STRtree(cells)
+    counts = {}
+    for name, pts in _STATE["points"].items():
+        if not len(pts):
+            counts[name] = np.zeros(n, dtype=np.int64)
+            continue
+        pi, cj = tree.query(pts, predicate="intersects")
+        # A point on a shared edge counts once, for the first cell
+        _, keep = np.unique(pi, return_index=True)
+        counts[name] = np.bincount(cj[keep], minlength=n)
+    return pop, parent, counts
+
+
+def overlay_cells(cells: gpd.GeoDataFrame, zones: gpd.GeoSeries, zone_pop: np.ndarray, point_xy: dict,
+                  workers: int = None, chunk_size: int = CHUNK_SIZE):
+    """Run _overlay_chunk over `cells` in chunks; results are concatenated in cell order."""
+    cell_wkb = shapely.to_wkb(cells.geometry.values)
+    chunks = [cell_wkb[i:i + chunk_size] for i in range(0, len(cell_wkb), chunk_size)]
+    init_args = (shapely.to_wkb(zones.values), zone_pop, point_xy)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(chunks) <= 1:
+        _init_worker(*init_args)
+        results = [_overlay_chunk(c) for c in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            results = list(pool.map(_overlay_chunk, chunks))
+    pop = np.vstack([r[0] for r in results])
+    parent = np.concatenate([r[1] for r in results])
+    counts = {k: np.concatenate([r[2][k] for r in results]) for k in point_xy}
+    return pop, parent, counts
+
+
+# ------------- Pipeline -------------
+def run_grid_pipeline(
+    *,
+    mp=sc.MP, pop_csv=sc.POP, hawk=sc.HAWK, mrt=sc.MRT, bus=sc.BUS, out=sc.OUT,
+    grid: str = "square", cell_size: float = 250.0, h3_resolution: int = 9,
+    access_model: str = "count", supply_model: str = "count", cache_dir=sc.CACHE_DIR,
+    workers: int = None, timer: sc.StageTimer = sc._NO_TIMER,
+) -> gpd.GeoDataFrame:
+    """Score grid cells instead of subzones and write `out`. Returns the exported GeoDataFrame."""
+    # Validate options before minutes of loading, tessellation and overlay
+    if grid not in ("square", "h3"):
+        raise ValueError(f"unknown grid {grid!r}; expected 'square' or 'h3'")
+    if access_model not in ("decay", "count"):
+        raise ValueError(f"unknown access model {access_model!r}")
+    if supply_model not in ("2sfca", "count"):
+        raise ValueError(f"unknown supply model {supply_model!r}")
+    workers = workers or os.cpu_count() or 1
+    gdf_poly, gdf_hawk, gdf_station, gdf_bus = sc.load_layers(mp, hawk, mrt, bus, workers, timer)
+    with timer.stage("load_population"):
+        pop = sc.load_population(pop_csv)
+        zones = gdf_poly[["subzone", "planarea", "geometry"]].merge(pop, on="subzone", how="left")
+        zone_pop = zones[POP_COLUMNS].fillna(0).to_numpy(dtype=float)
+        zone_geom = zones.geometry.to_crs(accessibility.SVY21).reset_index(drop=True)
+
+    with timer.stage("tessellate"):
+        if grid == "square":
+            cells = square_cells(zone_geom, cell_size)
+        else:
+            cells = h3_cells(zone_geom, h3_resolution)
+
+    with timer.stage("overlay_cells"):
+        point_xy = {
+            "hawker": accessibility.point_xy(gdf_hawk),
+            "mrt": accessibility.point_xy(gdf_station),
+            "bus": accessibility.point_xy(gdf_bus),
+        }
+        cell_pop, parent, counts = overlay_cells(cells, zone_geom, zone_pop, point_xy, workers=workers)
+
+    with timer.stage("cell_attributes"):
+        gdf = cells.rename(columns={"cell_id": "subzone"})
+        gdf["name"] = gdf["subzone"]
+        has_parent = parent >= 0
+        gdf["parent_subzone"] = np.where(has_parent, zones["subzone"].to_numpy()[parent.clip(0)], "")
+        gdf["planarea"] = np.where(has_parent, zones["planarea"].to_numpy()[parent.clip(0)], "")
+        for j, col in enumerate(POP_COLUMNS):
+            gdf[col] = cell_pop[:, j]
+        for col in POINT_COLUMNS:
+            gdf[col] = counts[col].astype(int)
+
+    if access_model == "decay" or supply_model == "2sfca":
+        weight = np.where(cell_pop[:, 0] > 0, cell_pop[:, 0], 1e-9)
+        xy = accessibility.point_xy(gpd.GeoDataFrame(geometry=gdf.geometry.centroid, crs=accessibility.SVY21))
+        origins = accessibility.Origins(xy=xy, zone=np.arange(len(gdf)), weight=weight, n_zones=len(gdf))
+    if access_model == "decay":
+        with timer.stage("accessibility"):
+            for col, values in sc.compute_access(origins, gdf_station, gdf_bus).items():
+                gdf[col] = values
+    if supply_model == "2sfca":
+        with timer.stage("supply_2sfca"):
+            gdf["hawker_2sfca"] = sc.compute_supply(origins, gdf_hawk, cache_dir)
+
+    with timer.stage("score"):
+        gdf = sc.compute_scores(gdf)
+
+    with timer.stage("reproject_output"):
+        gdf_out = gdf[sc.OUT_COLUMNS + ["parent_subzone"]].copy()
+        # Integer head counts for the snapshot columns; scores used the fractional shares
+        for col in POP_COLUMNS:
+            gdf_out[col] = gdf_out[col].round().astype(int)
+        gdf_out = gdf_out.to_crs(4326)
+    with timer.stage("write_output"):
+        gdf_out.to_file(out, driver="GeoJSON")
+    return gdf_out